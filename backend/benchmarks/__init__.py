@@ -0,0 +1,7 @@
+"""
+Benchmark suite for the Grocery Management System API.
+
+Usage (from the backend directory):
+    python -m benchmarks.seed --products 100000 --output gs_data_100k.sql
+    python -m benchmarks.run --catalog-sizes 1000 10000 --concurrency 1 8
+"""
@@ -0,0 +1,505 @@
+"""
+Load tests and micro-benchmarks of the API and of the DAO hot paths.
+
+Each scenario is run for each catalog size and each concurrency level:
+`--concurrency` threads send `--requests` requests in total, after
+`--warmup` untimed requests. The throughput and the p50/p95/p99 latencies
+are printed, written as JSON to `--output`, and compared with a stored
+baseline: the run fails when a case is slower than its baseline by more
+than `--tolerance`.
+
+By default the scenarios run in process against the SQLite storage engine,
+in a temporary database file seeded with generated products. With `--url`
+they are sent over HTTP to a running server instead, whose database must
+already hold the catalog (see `benchmarks.seed`).
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+# Stored baseline compared with each run
+BASELINE_PATH: str = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+# Metrics compared with the baseline: throughput must not drop,
+# and the tail latencies must not grow, by more than the tolerance
+HIGHER_IS_BETTER: Tuple[str, ...] = ("throughput",)
+LOWER_IS_BETTER: Tuple[str, ...] = ("p95", "p99")
+
+
+class HTTPClient:
+    """
+    Send the requests of the scenarios to a running server.
+    """
+
+    def __init__(self, url: str) -> None:
+        self.url: str = url.rstrip("/")
+
+    def request(
+        self, method: str, path: str, body: Optional[Any] = None, decode: bool = False
+    ) -> Tuple[int, Any]:
+        data: Optional[bytes] = None if body is None else json.dumps(body).encode()
+        request: urllib.request.Request = urllib.request.Request(
+            self.url + path,
+            data=data,
+            method=method,
+            headers={"Content-Type": "application/json"},
+        )
+        try:
+            with urllib.request.urlopen(request) as response:
+                return response.status, read_body(response.read(), decode)
+        except urllib.error.HTTPError as e:
+            return e.code, read_body(e.read(), decode)
+
+
+class InProcessClient:
+    """
+    Send the requests of the scenarios to the Flask app, without a network.
+    """
+
+    def __init__(self, app: Any) -> None:
+        self.client: Any = app.test_client()
+
+    def request(
+        self, method: str, path: str, body: Optional[Any] = None, decode: bool = False
+    ) -> Tuple[int, Any]:
+        response: Any = self.client.open(path, method=method, json=body)
+        return response.status_code, read_body(response.get_data(), decode)
+
+
+def read_body(data: bytes, decode: bool) -> Any:
+    """
+    Decode a JSON response body when the scenario needs it,
+    so that decoding does not count in the latency of the server.
+    Return None for another body.
+    """
+    if not decode:
+        return None
+    try:
+        return json.loads(data)
+    except ValueError:
+        return None
+
+
+@dataclass
+class Context:
+    """
+    State of a worker thread of a scenario.
+    """
+
+    client: Any
+    rng: random.Random
+    product_ids: Sequence[int]
+    app: Any = None
+
+    def product_id(self) -> int:
+        """
+        Pick a random product of the catalog.
+        """
+        return self.rng.choice(self.product_ids)
+
+    def product(self) -> Dict[str, Any]:
+        """
+        Generate a new product.
+        """
+        return {
+            "name": f"benchmark product {self.rng.randrange(1 << 30)}",
+            "uom_id": self.rng.randint(1, 2),
+            "price_per_unit": float(self.rng.randrange(50, 20000, 50)),
+        }
+
+
+@dataclass
+class Scenario:
+    """
+    A benchmarked operation. `prepare` runs untimed before each operation,
+    and its result is passed to `operation`, which returns a status code.
+    """
+
+    operation: Callable[[Context, Any], int]
+    prepare: Optional[Callable[[Context], Any]] = None
+    in_process_only: bool = False
+
+
+def create_product(context: Context) -> Optional[int]:
+    """
+    Create a product to be deleted by the timed operation.
+    """
+    status, body = context.client.request(
+        "POST", "/products", context.product(), decode=True
+    )
+    return body["product_id"] if status == 201 else None
+
+
+def place_order(context: Context, _: Any) -> int:
+    items: List[Dict[str, Any]] = [
+        {"product_id": context.product_id(), "quantity": context.rng.randint(1, 5)}
+        for _ in range(context.rng.randint(1, 5))
+    ]
+    return context.client.request(
+        "POST", "/orders", {"customer_name": "benchmark", "items": items}
+    )[0]
+
+
+def dao(function: Callable[[Context, Any], Any]) -> Callable[[Context, Any], int]:
+    """
+    Run a DAO function with a connection checked out from the pool of the app,
+    as a request would. The operation fails when the function returns None.
+    """
+
+    def operation(context: Context, prepared: Any) -> int:
+        from database.sql_connection import get_sql_connection
+
+        with context.app.app_context():
+            result: Any = function(get_sql_connection(), context)
+        return 500 if result is None else 200
+
+    return operation
+
+
+def dao_all_products(cnx: Any, context: Context) -> Any:
+    from services import service_products
+
+    # Measure the database read, not the cache
+    service_products.product_cache.clear()
+    return service_products.get_all_products(cnx)
+
+
+def dao_products_page(cnx: Any, context: Context) -> Any:
+    from services import service_products
+
+    return service_products.get_products_page(
+        cnx, limit=100, after=context.product_id()
+    )
+
+
+def dao_search(cnx: Any, context: Context) -> Any:
+    from services import service_products
+
+    return service_products.search_products(
+        cnx, context.rng.choice(["rice", "organic sug", "tomatos", "bottle 12"])
+    )
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    "list_products": Scenario(lambda c, _: c.client.request("GET", "/products")[0]),
+    "page_products": Scenario(
+        lambda c, _: c.client.request("GET", "/products?limit=100")[0]
+    ),
+    "get_product": Scenario(
+        lambda c, _: c.client.request("GET", f"/products/{c.product_id()}")[0]
+    ),
+    "insert_product": Scenario(
+        lambda c, _: c.client.request("POST", "/products", c.product())[0]
+    ),
+    "update_product": Scenario(
+        lambda c, _: c.client.request(
+            "PUT", f"/products/{c.product_id()}", c.product()
+        )[0]
+    ),
+    "delete_product": Scenario(
+        lambda c, product_id: c.client.request("DELETE", f"/products/{product_id}")[0],
+        prepare=create_product,
+    ),
+    "place_order": Scenario(place_order),
+    "dao_all_products": Scenario(dao(dao_all_products), in_process_only=True),
+    "dao_products_page": Scenario(dao(dao_products_page), in_process_only=True),
+    "dao_search": Scenario(dao(dao_search), in_process_only=True),
+}
+
+
+def percentile(values: List[float], q: float) -> float:
+    """
+    Compute a percentile by linear interpolation between the closest ranks.
+
+    Input:  values (list)   | the sorted values
+    Input:  q (float)       | the percentile, between 0 and 100
+    Output: the percentile of the values
+    """
+    if not values:
+        return 0.0
+
+    rank: float = (len(values) - 1) * q / 100
+    low: int = int(rank)
+    high: int = min(low + 1, len(values) - 1)
+
+    return values[low] + (values[high] - values[low]) * (rank - low)
+
+
+def run_scenario(
+    scenario: Scenario,
+    make_client: Callable[[], Any],
+    concurrency: int,
+    requests: int,
+    product_ids: Sequence[int],
+    warmup: int = 0,
+    app: Any = None,
+) -> Dict[str, float]:
+    """
+    Run a scenario with `concurrency` threads sending `requests` requests.
+
+    Input:  scenario (Scenario)     | the scenario to run
+    Input:  make_client (Callable)  | a factory of the clients of the threads
+    Input:  concurrency (int)       | the number of threads
+    Input:  requests (int)          | the number of timed requests
+    Input:  product_ids (Sequence)  | the IDs of the products of the catalog
+    Input:  warmup (int)            | the number of untimed requests
+    Input:  app (Flask)             | the app, for the in-process DAO scenarios
+    Output: a dictionary of the figures of the run, latencies in milliseconds
+    """
+    remaining: List[int] = [requests]
+    lock: threading.Lock = threading.Lock()
+    barrier: threading.Barrier = threading.Barrier(concurrency + 1)
+    latencies: List[List[float]] = [[] for _ in range(concurrency)]
+    errors: List[int] = [0] * concurrency
+
+    contexts: List[Context] = [
+        Context(make_client(), random.Random(worker), product_ids, app)
+        for worker in range(concurrency)
+    ]
+    for number in range(warmup):
+        context: Context = contexts[number % concurrency]
+        prepared: Any = scenario.prepare(context) if scenario.prepare else None
+        scenario.operation(context, prepared)
+
+    def worker(index: int) -> None:
+        context: Context = contexts[index]
+        barrier.wait()
+        while True:
+            with lock:
+                if remaining[0] == 0:
+                    return
+                remaining[0] -= 1
+
+            prepared: Any = scenario.prepare(context) if scenario.prepare else None
+            start: float = time.perf_counter()
+            try:
+                status: int = scenario.operation(context, prepared)
+            except Exception:
+                status = 599
+            latencies[index].append((time.perf_counter() - start) * 1000)
+            if status >= 400:
+                errors[index] += 1
+
+    threads: List[threading.Thread] = [
+        threading.Thread(target=worker, args=(index,), daemon=True)
+        for index in range(concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start: float = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed: float = time.perf_counter() - start
+
+    values: List[float] = sorted(v for thread in latencies for v in thread)
+
+    return {
+        "requests": len(values),
+        "errors": sum(errors),
+        "duration": round(elapsed, 3),
+        "throughput": round(len(values) / elapsed, 1) if elapsed else 0.0,
+        "mean": round(sum(values) / len(values), 3) if values else 0.0,
+        "p50": round(percentile(values, 50), 3),
+        "p95": round(percentile(values, 95), 3),
+        "p99": round(percentile(values, 99), 3),
+        "max": round(values[-1], 3) if values else 0.0,
+    }
+
+
+def compare(
+    results: Dict[str, Dict[str, float]],
+    baseline: Dict[str, Dict[str, float]],
+    tolerance: float,
+) -> List[str]:
+    """
+    Compare the results of a run with a baseline.
+    Cases missing from the baseline are not compared.
+
+    Input:  results (dict)      | the figures of the run, by case
+    Input:  baseline (dict)     | the figures of the baseline, by case
+    Input:  tolerance (float)   | the accepted slowdown, 0.2 for 20%
+    Output: the list of the regressions, empty if there is none
+    """
+    regressions: List[str] = []
+
+    for case, figures in results.items():
+        reference: Optional[Dict[str, float]] = baseline.get(case)
+        if reference is None:
+            continue
+
+        for metric in HIGHER_IS_BETTER:
+            if figures[metric] < reference[metric] * (1 - tolerance):
+                regressions.append(
+                    f"{case}: {metric} {figures[metric]} < baseline {reference[metric]}"
+                )
+        for metric in LOWER_IS_BETTER:
+            if figures[metric] > reference[metric] * (1 + tolerance):
+                regressions.append(
+                    f"{case}: {metric} {figures[metric]} > baseline {reference[metric]}"
+                )
+        if figures["errors"] > reference["errors"]:
+            regressions.append(
+                f"{case}: {figures['errors']} errors > baseline {reference['errors']}"
+            )
+
+    return regressions
+
+
+def create_in_process_app(
+    sqlite_path: str, pool_size: int, group_commit: bool = False
+) -> Any:
+    """
+    Create the Flask app, configured to use the SQLite storage engine.
+    """
+    from server import create_app
+
+    return create_app(
+        {
+            "DB_ENGINE": "sqlite",
+            "DB_SQLITE_PATH": sqlite_path,
+            "DB_SQLITE_SEED": True,
+            "DB_POOL_MAX_SIZE": pool_size,
+            "GROUP_COMMIT": group_commit,
+        }
+    )
+
+
+def seed_catalog(app: Any, catalog_size: int) -> List[int]:
+    """
+    Grow the catalog of the in-process app to `catalog_size` products,
+    and return the IDs of its products.
+    """
+    from benchmarks.seed import seed_products
+    from database.sql_connection import get_sql_connection
+    from services import service_products
+
+    with app.app_context():
+        cnx: Any = get_sql_connection()
+        seed_products(cnx, catalog_size)
+        cursor: Any = cnx.cursor()
+        cursor.execute("SELECT product_id FROM products")
+        product_ids: List[int] = [row[0] for row in cursor]
+        cursor.close()
+    service_products.product_cache.clear()
+
+    return product_ids
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(
+        description="Benchmark the Grocery Management System API"
+    )
+    parser.add_argument("--url", help="benchmark a running server over HTTP")
+    parser.add_argument(
+        "--sqlite-path", help="SQLite database of the in-process benchmarks"
+    )
+    parser.add_argument("--pool-size", type=int, default=10)
+    parser.add_argument(
+        "--group-commit", action="store_true", help="commit the writes in groups"
+    )
+    parser.add_argument(
+        "--scenarios", nargs="+", choices=sorted(SCENARIOS), default=sorted(SCENARIOS)
+    )
+    parser.add_argument("--catalog-sizes", nargs="+", type=int, default=[1000])
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 8])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--output", default="benchmark-results.json")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument(
+        "--save-baseline", action="store_true", help="store the results as baseline"
+    )
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args: argparse.Namespace = parser.parse_args(argv)
+
+    app: Any = None
+    make_client: Callable[[], Any]
+    if args.url:
+        make_client = lambda: HTTPClient(args.url)  # noqa: E731
+    else:
+        sqlite_path: str = args.sqlite_path or os.path.join(
+            tempfile.mkdtemp(prefix="gs-benchmark-"), "gs.db"
+        )
+        app = create_in_process_app(sqlite_path, args.pool_size, args.group_commit)
+        make_client = lambda: InProcessClient(app)  # noqa: E731
+
+    results: Dict[str, Dict[str, float]] = {}
+    for catalog_size in sorted(args.catalog_sizes):
+        # Against a running server, the catalog is expected
+        # to have been loaded from a generated SQL file
+        product_ids: Sequence[int] = (
+            seed_catalog(app, catalog_size)
+            if app is not None
+            else range(1, catalog_size + 1)
+        )
+
+        for name in args.scenarios:
+            scenario: Scenario = SCENARIOS[name]
+            if scenario.in_process_only and app is None:
+                continue
+
+            for concurrency in args.concurrency:
+                case: str = f"{name}/catalog={catalog_size}/concurrency={concurrency}"
+                results[case] = run_scenario(
+                    scenario,
+                    make_client,
+                    concurrency,
+                    args.requests,
+                    product_ids,
+                    warmup=args.warmup,
+                    app=app,
+                )
+                figures: Dict[str, float] = results[case]
+                print(
+                    f"{case:<55} {figures['throughput']:>9.1f} req/s"
+                    f"  p50 {figures['p50']:>8.2f} ms  p95 {figures['p95']:>8.2f} ms"
+                    f"  p99 {figures['p99']:>8.2f} ms  errors {figures['errors']}"
+                )
+
+    report: Dict[str, Any] = {
+        "meta": {
+            "target": args.url or "in-process sqlite",
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "requests": args.requests,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as output:
+        json.dump(report, output, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as output:
+            json.dump(report, output, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}, run with --save-baseline to store one")
+        return 0
+
+    with open(args.baseline, encoding="utf-8") as baseline:
+        regressions: List[str] = compare(
+            results, json.load(baseline)["results"], args.tolerance
+        )
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
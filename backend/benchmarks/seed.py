@@ -0,0 +1,176 @@
+"""
+Generator of large product catalogs for the benchmarks.
+
+The catalogs extend the sample data of `database/gs_data.sql`: they start
+with its units of measure, products and order, then add generated products.
+A catalog can be written as a SQL file to load into MySQL, or inserted
+directly through a database connection.
+"""
+
+import argparse
+import itertools
+import random
+import sys
+from typing import Dict, Iterator, List, Optional, TextIO, Union
+
+from mysql.connector import MySQLConnection
+from mysql.connector.cursor import MySQLCursor
+
+from database.sqlite_connection import DATA_PATH
+from services.service_products import insert_products_batch
+
+# Number of products of the sample data, generated products come after them
+SAMPLE_PRODUCTS: int = 10
+
+# Words used to build the names of the generated products
+BRANDS: List[str] = ["fresh", "local", "organic", "premium", "family", "classic"]
+ITEMS: List[str] = [
+    "toothpaste",
+    "rice",
+    "meat",
+    "fish",
+    "broiler chicken",
+    "sugar",
+    "oil",
+    "soap",
+    "domestic gas",
+    "flour",
+    "beans",
+    "milk",
+    "coffee",
+    "tea",
+    "salt",
+    "tomatoes",
+]
+PACKS: List[str] = ["bag", "bottle", "box", "can", "pack", "jar"]
+
+
+def generate_products(
+    count: int, seed: int = 0
+) -> Iterator[Dict[str, Union[int, str, float]]]:
+    """
+    Generate products with realistic names, units of measure and prices.
+    The same seed always generates the same products.
+
+    Input:  count (int)     | the number of products to generate
+    Input:  seed (int)      | the seed of the random generator
+    Output: an iterator of dictionaries representing the products
+    """
+    generator: random.Random = random.Random(seed)
+
+    for number in range(1, count + 1):
+        yield {
+            "name": f"{generator.choice(BRANDS)} {generator.choice(ITEMS)} ({generator.choice(PACKS)} {number})",
+            "uom_id": generator.randint(1, 2),
+            "price_per_unit": float(generator.randrange(50, 20000, 50)),
+        }
+
+
+def batched(
+    products: Iterator[Dict[str, Union[int, str, float]]], batch_size: int
+) -> Iterator[List[Dict[str, Union[int, str, float]]]]:
+    """
+    Split the generated products into lists of at most `batch_size` products.
+    """
+    batch: List[Dict[str, Union[int, str, float]]] = []
+    for product in products:
+        batch.append(product)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def quote(value: str) -> str:
+    """
+    Quote a string as a SQL literal.
+    """
+    return "'" + value.replace("\\", "\\\\").replace("'", "''") + "'"
+
+
+def write_sql(
+    output: TextIO, count: int, seed: int = 0, batch_size: int = 1000
+) -> None:
+    """
+    Write the sample data followed by generated products
+    up to `count` products, as multi-row INSERT statements.
+
+    Input:  output (TextIO)     | the file to write to
+    Input:  count (int)         | the number of products of the catalog
+    Input:  seed (int)          | the seed of the random generator
+    Input:  batch_size (int)    | the number of products per statement
+    """
+    with open(DATA_PATH, encoding="utf-8") as data:
+        for line in data:
+            # The sample data ends with a query, not with inserts
+            if line.startswith("SELECT"):
+                break
+            output.write(line)
+
+    generated: int = max(count - SAMPLE_PRODUCTS, 0)
+    output.write(f"-- Insert {generated} generated records into the 'products' table\n")
+    for batch in batched(generate_products(generated, seed), batch_size):
+        values: str = ",\n".join(
+            f"({quote(p['name'])}, {p['uom_id']}, {p['price_per_unit']})" for p in batch
+        )
+        output.write(
+            "INSERT INTO `gs`.`products` (`name`, `uom_id`, `price_per_unit`) VALUES\n"
+            f"{values};\n"
+        )
+
+
+def seed_products(
+    cnx: MySQLConnection, count: int, seed: int = 0, batch_size: int = 10000
+) -> int:
+    """
+    Insert generated products until the catalog holds `count` products.
+
+    Input:  cnx (MySQLConnection)   | a database connection object
+    Input:  count (int)             | the number of products of the catalog
+    Input:  seed (int)              | the seed of the random generator
+    Input:  batch_size (int)        | the number of products per transaction
+    Output: the number of inserted products
+    """
+    cursor: MySQLCursor = cnx.cursor()
+    cursor.execute("SELECT COUNT(*) FROM products")
+    existing: int = cursor.fetchone()[0]
+    cursor.close()
+
+    missing: int = max(count - existing, 0)
+    # Skip the products that were generated by an earlier call
+    generated: int = max(existing - SAMPLE_PRODUCTS, 0)
+    products: Iterator[Dict[str, Union[int, str, float]]] = itertools.islice(
+        generate_products(generated + missing, seed), generated, None
+    )
+
+    for batch in batched(products, batch_size):
+        insert_products_batch(cnx, batch)
+
+    return missing
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Write a catalog as a SQL file, to load into MySQL with:
+        mysql gs < gs_data_100k.sql
+    """
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(
+        description="Generate a product catalog extending gs_data.sql"
+    )
+    parser.add_argument("--products", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--output", default="-")
+    args: argparse.Namespace = parser.parse_args(argv)
+
+    if args.output == "-":
+        write_sql(sys.stdout, args.products, args.seed, args.batch_size)
+        return
+
+    with open(args.output, "w", encoding="utf-8") as output:
+        write_sql(output, args.products, args.seed, args.batch_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,347 @@
+"""
+Group commit of the writes of concurrent requests
+
+Each write normally runs in its own transaction, so the write throughput
+is bounded by one log flush per request. With `GROUP_COMMIT` enabled, the
+writes are handed to a background writer instead. It collects the writes
+arriving within `GROUP_COMMIT_MAX_DELAY` seconds, up to
+`GROUP_COMMIT_MAX_BATCH` of them, and runs them in a single transaction
+on its own connection. Each write runs inside a savepoint, so a failing
+write is rolled back alone and its error is raised in the request that
+submitted it, while the others are committed together. The writes run in
+a context of the app that started the writer, so that they use its
+settings (e.g. its slow-query log) as they would in their request.
+
+`GROUP_COMMIT_DURABILITY` selects when a request gets its result:
+    "commit"     | once the transaction holding its write is committed
+    "statement"  | once all the writes of its group ran, before the commit:
+                   the request does not wait for the log flush, but its
+                   write is lost if the commit fails
+"""
+
+import os
+import queue
+import threading
+import time
+from typing import Any, Callable, List, Optional, Tuple
+
+from flask import Flask, current_app, has_app_context
+from mysql.connector import Error, MySQLConnection
+
+from database.instrumentation import InstrumentedConnection
+from database.sql_connection import get_pool
+from services.metrics import GROUP_COMMIT_SIZE
+
+# Durability modes, see the module docstring
+DURABILITY_MODES: Tuple[str, ...] = ("commit", "statement")
+
+# Idle time after which the connection of the writer is pinged, in seconds
+PING_INTERVAL: float = 30.0
+
+# Savepoint set around each write of a group
+SAVEPOINT: str = "SAVEPOINT group_write"
+RELEASE_SAVEPOINT: str = "RELEASE SAVEPOINT group_write"
+ROLLBACK_TO_SAVEPOINT: str = "ROLLBACK TO SAVEPOINT group_write"
+
+
+class PendingWrite:
+    """
+    A write waiting in the queue, then for its result.
+    """
+
+    def __init__(
+        self,
+        operation: Callable[[MySQLConnection], Any],
+        on_commit: Optional[Callable[[Any], None]] = None,
+    ) -> None:
+        """
+        Input:  operation (Callable)    | runs the write on a connection, without committing
+        Input:  on_commit (Callable)    | called with the result once the write is committed
+        """
+        self.operation: Callable[[MySQLConnection], Any] = operation
+        self.on_commit: Optional[Callable[[Any], None]] = on_commit
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self._done: threading.Event = threading.Event()
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def finish(self, error: Optional[BaseException] = None) -> None:
+        """
+        Hand the result, or the error, to the waiting request.
+        """
+        if not self.done:
+            self.error = error
+            self._done.set()
+
+    def wait(self) -> Any:
+        """
+        Wait for the write to be processed.
+
+        Output: the result of the operation
+        Raises: the error of the operation or of the commit
+        """
+        self._done.wait()
+        if self.error is not None:
+            raise self.error
+
+        return self.result
+
+
+class GroupCommitQueue:
+    """
+    A queue of writes committed in groups by a background writer thread.
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], MySQLConnection],
+        max_batch: int = 64,
+        max_delay: float = 0.002,
+        durability: str = "commit",
+        app: Optional[Flask] = None,
+    ) -> None:
+        """
+        Input:  connect (Callable)  | opens the connection of the writer
+        Input:  max_batch (int)     | the maximum number of writes per transaction
+        Input:  max_delay (float)   | the time the writer waits for more writes
+                                      after the first one of a group, in seconds
+        Input:  durability (str)    | "commit" or "statement", see the module docstring
+        Input:  app (Flask)         | the app whose context the writes run in, if any
+        """
+        if durability not in DURABILITY_MODES:
+            raise ValueError(
+                f"Unknown durability: {durability} ({', '.join(DURABILITY_MODES)})"
+            )
+        if max_batch < 1:
+            raise ValueError("max_batch must be at least 1")
+
+        self.connect: Callable[[], MySQLConnection] = connect
+        self.max_batch: int = max_batch
+        self.max_delay: float = max_delay
+        self.durability: str = durability
+        self.app: Optional[Flask] = app
+        # Process owning the writer thread and its connection
+        self.pid: int = os.getpid()
+
+        self._queue: "queue.Queue[PendingWrite]" = queue.Queue()
+        self._cnx: Optional[MySQLConnection] = None
+        self._used_at: float = 0.0
+        self._thread: threading.Thread = threading.Thread(
+            target=self._run, name="group-commit", daemon=True
+        )
+        self._thread.start()
+
+    def submit(
+        self,
+        operation: Callable[[MySQLConnection], Any],
+        on_commit: Optional[Callable[[Any], None]] = None,
+    ) -> Any:
+        """
+        Queue a write and wait for its result.
+
+        Input:  operation (Callable)    | runs the write on a connection, without committing
+        Input:  on_commit (Callable)    | called with the result once the write is committed
+        Output: the result of the operation
+        Raises: the error of the operation or of the commit
+        """
+        write: PendingWrite = PendingWrite(operation, on_commit)
+        self._queue.put(write)
+
+        return write.wait()
+
+    def _collect(self) -> List[PendingWrite]:
+        """
+        Wait for a write, then for more writes until the group is full
+        or `max_delay` seconds have passed.
+        """
+        batch: List[PendingWrite] = [self._queue.get()]
+        deadline: float = time.monotonic() + self.max_delay
+
+        while len(batch) < self.max_batch:
+            remaining: float = deadline - time.monotonic()
+            try:
+                batch.append(
+                    self._queue.get(timeout=remaining)
+                    if remaining > 0
+                    else self._queue.get_nowait()
+                )
+            except queue.Empty:
+                break
+
+        return batch
+
+    def _run(self) -> None:
+        """
+        Commit the groups of writes, forever.
+        """
+        while True:
+            batch: List[PendingWrite] = self._collect()
+            try:
+                if self.app is None:
+                    self._commit(batch)
+                else:
+                    with self.app.app_context():
+                        self._commit(batch)
+            except BaseException as e:
+                # The writer must outlive any failure, the requests
+                # still waiting get the error instead
+                print(f"Error committing writes: {e}")
+                for write in batch:
+                    write.finish(e)
+
+    def _connection(self) -> MySQLConnection:
+        """
+        Return the connection of the writer, opened on first use
+        and after a failure, and pinged after being idle.
+        """
+        if self._cnx is None:
+            self._cnx = InstrumentedConnection(self.connect())
+        elif time.monotonic() - self._used_at > PING_INTERVAL:
+            # The server may have dropped the connection while it was idle
+            self._cnx.ping(reconnect=True)
+        self._used_at = time.monotonic()
+
+        return self._cnx
+
+    def _drop_connection(self) -> None:
+        cnx: Optional[MySQLConnection] = self._cnx
+        self._cnx = None
+        if cnx is not None:
+            try:
+                cnx.close()
+            except Error:
+                pass
+
+    def _commit(self, batch: List[PendingWrite]) -> None:
+        """
+        Run a group of writes in one transaction, each within a savepoint.
+        When the transaction is aborted, e.g. by a deadlock, the write that
+        failed gets the error and the other writes, including the ones that
+        already ran, are run again in a new transaction. No write is answered
+        before the whole group ran, so none is answered with a result that
+        was rolled back.
+        """
+        GROUP_COMMIT_SIZE.observe(len(batch))
+        committed: List[PendingWrite] = []
+
+        try:
+            cnx: MySQLConnection = self._connection()
+            if cnx.in_transaction:
+                cnx.rollback()
+            cnx.start_transaction()
+            cursor: Any = cnx.cursor()
+
+            for write in batch:
+                cursor.execute(SAVEPOINT)
+                try:
+                    write.result = write.operation(cnx)
+                    cursor.execute(RELEASE_SAVEPOINT)
+                except Exception as e:
+                    try:
+                        cursor.execute(ROLLBACK_TO_SAVEPOINT)
+                    except Error:
+                        # The whole transaction was rolled back
+                        cnx.rollback()
+                        write.finish(e)
+                        remaining: List[PendingWrite] = [w for w in batch if not w.done]
+                        if remaining:
+                            self._commit(remaining)
+                        return
+                    write.finish(e)
+                    continue
+
+                committed.append(write)
+
+            if self.durability == "statement":
+                # Every write of the group ran and can no longer be
+                # rolled back by another one, only by the commit
+                for write in committed:
+                    write.finish()
+
+            cnx.commit()
+        except Error as e:
+            print(f"Error committing writes: {e}")
+            self._drop_connection()
+            for write in batch:
+                write.finish(e)
+            return
+
+        for write in committed:
+            if write.on_commit is not None:
+                try:
+                    write.on_commit(write.result)
+                except Exception as e:
+                    print(f"Error running the commit hook of a write: {e}")
+            write.finish()
+
+
+# Serializes the creation of the queue by the first writes of a process
+_queue_lock: threading.Lock = threading.Lock()
+
+
+def get_write_queue() -> Optional[GroupCommitQueue]:
+    """
+    Return the group-commit queue of the current app, started on first use,
+    or None when group commit is disabled.
+    The writer connects to the primary with the settings of its pool,
+    outside of the pool so that it never waits for the requests it serves.
+
+    Output: the GroupCommitQueue object of the current process or None
+    """
+    if not has_app_context() or not current_app.config.get("GROUP_COMMIT"):
+        return None
+
+    write_queue: Optional[GroupCommitQueue] = current_app.config.get("write_queue")
+
+    if write_queue is None or write_queue.pid != os.getpid():
+        with _queue_lock:
+            write_queue = current_app.config.get("write_queue")
+            if write_queue is None or write_queue.pid != os.getpid():
+                pool = get_pool()
+                write_queue = current_app.config["write_queue"] = GroupCommitQueue(
+                    lambda: pool.connector(**pool.connect_args),
+                    max_batch=current_app.config.get("GROUP_COMMIT_MAX_BATCH", 64),
+                    max_delay=current_app.config.get("GROUP_COMMIT_MAX_DELAY", 0.002),
+                    durability=current_app.config.get(
+                        "GROUP_COMMIT_DURABILITY", "commit"
+                    ),
+                    app=current_app._get_current_object(),
+                )
+
+    return write_queue
+
+
+def run_write(
+    cnx: MySQLConnection,
+    operation: Callable[[MySQLConnection], Any],
+    on_commit: Optional[Callable[[Any], None]] = None,
+) -> Any:
+    """
+    Run a write and commit it: in its own transaction on the given
+    connection, or in a group through the queue when group commit is enabled.
+
+    Input:  cnx (MySQLConnection)   | the connection of the request
+    Input:  operation (Callable)    | runs the write on a connection, without committing
+    Input:  on_commit (Callable)    | called with the result once the write is committed
+    Output: the result of the operation
+    Raises: the error of the operation or of the commit,
+            in which case the write is rolled back
+    """
+    write_queue: Optional[GroupCommitQueue] = get_write_queue()
+    if write_queue is not None:
+        return write_queue.submit(operation, on_commit)
+
+    try:
+        result: Any = operation(cnx)
+        cnx.commit()
+    except Exception:
+        cnx.rollback()
+        raise
+
+    if on_commit is not None:
+        on_commit(result)
+
+    return result
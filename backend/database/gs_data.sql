@@ -18,7 +18,7 @@ INSERT INTO `gs`.`products` (`name`, `uom_id`, `price_per_unit`) VALUES ('domest
 INSERT INTO `gs`.`orders` (`customer_name`, `total`, `date`) VALUES ('Tony', 2000, '2024-08-13 00:00:00');
 
 -- Insert records into the 'order_details' table
-INSERT INTO `gs`.`order_details` (`order_id`, `product_id`, `quantity`, `total_price`) VALUES (1, 1, 2, 2400);
+INSERT INTO `gs`.`order_details` (`order_id`, `product_id`, `uom_id`, `quantity`, `total_price`) VALUES (1, 1, 2, 2, 2400);
 
 -- Join products with units of measure (uom) tables
 SELECT products.product_id, products.name, products.uom_id, products.price_per_unit, uom.uom_name FROM products INNER JOIN uom ON products.uom_id=uom.uom_id;
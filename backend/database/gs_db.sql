@@ -1,3 +1,5 @@
+-- The SQLite version of this schema is gs_db_sqlite.sql, keep both files in sync
+
 -- Create the 'gs' database if it does not exists
 CREATE DATABASE IF NOT EXISTS `gs`;
 
@@ -38,13 +40,78 @@ CREATE TABLE `gs`.`orders` (
 );
 
 -- Create the 'order_details' table with the necessary columns and constraints
+-- An order holds one line per product, hence the (order_id, product_id) primary key
+-- Each line keeps the unit of measure of its product when the order was placed
 CREATE TABLE `gs`.`order_details` (
     `order_id` INT NOT NULL,
     `product_id` INT NOT NULL,
+    `uom_id` INT NOT NULL,
     `quantity` DOUBLE NOT NULL,
     `total_price` DOUBLE NOT NULL,
-    PRIMARY KEY (`order_id`),
+    PRIMARY KEY (`order_id`, `product_id`),
     INDEX `fk_product_id_idx` (`product_id` ASC),
     CONSTRAINT `fk_order_id` FOREIGN KEY (`order_id`) REFERENCES `gs`.`orders` (`order_id`) ON DELETE NO ACTION ON UPDATE RESTRICT,
     CONSTRAINT `fk_product_id` FOREIGN KEY (`product_id`) REFERENCES `gs`.`products` (`product_id`) ON DELETE NO ACTION ON UPDATE RESTRICT
 );
+
+-- The statements below are idempotent: to upgrade an existing database,
+-- run them from here on, then fill the rollups with `flask rebuild-rollups`
+
+-- Create the sales rollup tables, kept up to date by each order placement
+-- and rebuilt from the order history with `flask rebuild-rollups`
+CREATE TABLE IF NOT EXISTS `gs`.`sales_daily` (
+    `day` DATE NOT NULL,
+    `orders` INT NOT NULL,
+    `units` DOUBLE NOT NULL,
+    `revenue` DOUBLE NOT NULL,
+    PRIMARY KEY (`day`)
+);
+
+CREATE TABLE IF NOT EXISTS `gs`.`sales_daily_product` (
+    `day` DATE NOT NULL,
+    `product_id` INT NOT NULL,
+    `units` DOUBLE NOT NULL,
+    `revenue` DOUBLE NOT NULL,
+    PRIMARY KEY (`day`, `product_id`)
+);
+
+CREATE TABLE IF NOT EXISTS `gs`.`sales_daily_uom` (
+    `day` DATE NOT NULL,
+    `uom_id` INT NOT NULL,
+    `units` DOUBLE NOT NULL,
+    `revenue` DOUBLE NOT NULL,
+    PRIMARY KEY (`day`, `uom_id`)
+);
+
+-- Create the 'inventory' table holding the stock of the tracked products
+-- Products without a row are not tracked and never run out of stock
+-- The index on 'stock' serves the low-stock queries
+CREATE TABLE IF NOT EXISTS `gs`.`inventory` (
+    `product_id` INT NOT NULL,
+    `stock` DOUBLE NOT NULL,
+    `version` INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (`product_id`),
+    INDEX `stock_idx` (`stock` ASC),
+    CONSTRAINT `stock_not_negative` CHECK (`stock` >= 0),
+    CONSTRAINT `fk_inventory_product_id` FOREIGN KEY (`product_id`) REFERENCES `gs`.`products` (`product_id`) ON DELETE CASCADE ON UPDATE RESTRICT
+);
+
+-- Create the 'catalog_version' table holding the version of the catalog
+-- shared by the processes serving the API, bumped after every product write
+-- It holds a single row, read by each process to pick up the writes of the others
+CREATE TABLE IF NOT EXISTS `gs`.`catalog_version` (
+    `id` TINYINT NOT NULL,
+    `version` BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (`id`)
+);
+
+INSERT IGNORE INTO `gs`.`catalog_version` (`id`, `version`) VALUES (1, 0);
+
+-- Migrate an existing 'order_details' table created with 'order_id' alone as the primary key
+-- ALTER TABLE `gs`.`order_details` DROP PRIMARY KEY, ADD PRIMARY KEY (`order_id`, `product_id`);
+
+-- Migrate an existing 'order_details' table created without 'uom_id',
+-- the lines of the past orders take the current unit of measure of their product
+-- ALTER TABLE `gs`.`order_details` ADD COLUMN `uom_id` INT NULL AFTER `product_id`;
+-- UPDATE `gs`.`order_details` INNER JOIN `gs`.`products` ON `order_details`.`product_id` = `products`.`product_id` SET `order_details`.`uom_id` = `products`.`uom_id`;
+-- ALTER TABLE `gs`.`order_details` MODIFY COLUMN `uom_id` INT NOT NULL;
@@ -0,0 +1,84 @@
+-- SQLite version of the 'gs' database schema (see gs_db.sql),
+-- used by the in-process storage engine (DB_ENGINE = "sqlite")
+-- Keep both files in sync when the schema changes
+
+-- Create the 'uom' (Unit of Measure) table with the necessary columns and primary key
+CREATE TABLE IF NOT EXISTS `uom` (
+    `uom_id` INTEGER PRIMARY KEY AUTOINCREMENT,
+    `uom_name` VARCHAR(45) NOT NULL
+);
+
+-- Create the 'products' table with the necessary columns, primary key and foreign key
+CREATE TABLE IF NOT EXISTS `products` (
+    `product_id` INTEGER PRIMARY KEY AUTOINCREMENT,
+    `name` VARCHAR(100) NOT NULL,
+    `uom_id` INT NOT NULL REFERENCES `uom` (`uom_id`),
+    `price_per_unit` DOUBLE NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS `fk_uom_id_idx` ON `products` (`uom_id`);
+
+-- Create the 'orders' table with the necessary columns and primary key
+CREATE TABLE IF NOT EXISTS `orders` (
+    `order_id` INTEGER PRIMARY KEY AUTOINCREMENT,
+    `customer_name` VARCHAR(100) NOT NULL,
+    `total` DOUBLE NOT NULL,
+    `date` DATETIME NOT NULL
+);
+
+-- Create the 'order_details' table with the necessary columns and constraints
+-- An order holds one line per product, hence the (order_id, product_id) primary key
+-- Each line keeps the unit of measure of its product when the order was placed
+CREATE TABLE IF NOT EXISTS `order_details` (
+    `order_id` INT NOT NULL REFERENCES `orders` (`order_id`),
+    `product_id` INT NOT NULL REFERENCES `products` (`product_id`),
+    `uom_id` INT NOT NULL,
+    `quantity` DOUBLE NOT NULL,
+    `total_price` DOUBLE NOT NULL,
+    PRIMARY KEY (`order_id`, `product_id`)
+);
+
+CREATE INDEX IF NOT EXISTS `fk_product_id_idx` ON `order_details` (`product_id`);
+
+-- Create the sales rollup tables, kept up to date by each order placement
+CREATE TABLE IF NOT EXISTS `sales_daily` (
+    `day` DATE NOT NULL,
+    `orders` INT NOT NULL,
+    `units` DOUBLE NOT NULL,
+    `revenue` DOUBLE NOT NULL,
+    PRIMARY KEY (`day`)
+);
+
+CREATE TABLE IF NOT EXISTS `sales_daily_product` (
+    `day` DATE NOT NULL,
+    `product_id` INT NOT NULL,
+    `units` DOUBLE NOT NULL,
+    `revenue` DOUBLE NOT NULL,
+    PRIMARY KEY (`day`, `product_id`)
+);
+
+CREATE TABLE IF NOT EXISTS `sales_daily_uom` (
+    `day` DATE NOT NULL,
+    `uom_id` INT NOT NULL,
+    `units` DOUBLE NOT NULL,
+    `revenue` DOUBLE NOT NULL,
+    PRIMARY KEY (`day`, `uom_id`)
+);
+
+-- Create the 'inventory' table holding the stock of the tracked products
+CREATE TABLE IF NOT EXISTS `inventory` (
+    `product_id` INTEGER PRIMARY KEY REFERENCES `products` (`product_id`) ON DELETE CASCADE,
+    `stock` DOUBLE NOT NULL CHECK (`stock` >= 0),
+    `version` INT NOT NULL DEFAULT 0
+);
+
+CREATE INDEX IF NOT EXISTS `stock_idx` ON `inventory` (`stock`);
+
+-- Create the 'catalog_version' table holding the version of the catalog
+-- shared by the processes serving the API, bumped after every product write
+CREATE TABLE IF NOT EXISTS `catalog_version` (
+    `id` INTEGER PRIMARY KEY,
+    `version` BIGINT NOT NULL DEFAULT 0
+);
+
+INSERT OR IGNORE INTO `catalog_version` (`id`, `version`) VALUES (1, 0);
@@ -0,0 +1,202 @@
+"""
+Timing of the database queries run by the DAO functions
+
+The connection checked out for a request is wrapped so that each of its
+cursors records the execution time of its queries, the time spent fetching
+their rows and the number of rows returned. Queries are labelled with the
+name of the DAO function running them and with their SQL operation.
+Queries slower than the threshold of the slow-query log are also logged.
+"""
+
+import sys
+import time
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from flask import has_request_context, request
+from mysql.connector import Error, MySQLConnection
+
+from services.metrics import FETCH_DURATION, QUERY_DURATION, QUERY_ERRORS, ROWS
+from services.slow_queries import SlowQueryLog, get_slow_query_log
+
+
+def operation_of(query: str) -> str:
+    """
+    Return the SQL operation of a query: SELECT, INSERT, UPDATE...
+    """
+    return query.lstrip().split(None, 1)[0].upper() if query.strip() else ""
+
+
+class InstrumentedCursor:
+    """
+    A cursor recording the time spent in its queries.
+    Other attributes are those of the wrapped cursor.
+    """
+
+    def __init__(
+        self,
+        cursor: Any,
+        connection: MySQLConnection,
+        owner: Optional["InstrumentedConnection"] = None,
+    ) -> None:
+        self._cursor: Any = cursor
+        self._connection: MySQLConnection = connection
+        # Wrapped connection counting the queries run by its cursors
+        self._owner: Optional[InstrumentedConnection] = owner
+        # Name of the DAO function that ran the last query
+        self._function: str = ""
+        # Slow query whose plan waits for its rows to be read:
+        # (log, entry, query, params), see `SlowQueryLog.complete()`
+        self._pending: Optional[Tuple[SlowQueryLog, Dict[str, Any], str, Any]] = None
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._cursor, name)
+
+    def _execute(
+        self, method: Any, query: str, args: Sequence[Any], kwargs: Any, many: bool
+    ) -> Any:
+        self._complete_pending(final=True)
+
+        # The caller of execute() is the DAO function, two frames up
+        self._function = sys._getframe(2).f_code.co_name
+        operation: str = operation_of(query)
+        if self._owner is not None:
+            self._owner.queries += 1
+        started: float = time.perf_counter()
+        try:
+            result: Any = method(query, *args, **kwargs)
+        except Error:
+            QUERY_ERRORS.inc(self._function, operation)
+            QUERY_DURATION.observe(
+                time.perf_counter() - started, self._function, operation
+            )
+            raise
+
+        duration: float = time.perf_counter() - started
+        QUERY_DURATION.observe(duration, self._function, operation)
+        slow_query_log: SlowQueryLog = get_slow_query_log()
+        if duration >= slow_query_log.threshold:
+            params: Any = args[0] if args else kwargs.get("params")
+            entry: Dict[str, Any] = slow_query_log.record(
+                self._connection,
+                query,
+                params,
+                duration,
+                operation,
+                self._function,
+                (
+                    request.url_rule.rule
+                    if has_request_context() and request.url_rule
+                    else None
+                ),
+                self._cursor.rowcount,
+                many=many,
+            )
+            # With its rows unread, the plan of the query waits for them
+            if "explain" in entry and getattr(self._connection, "unread_result", False):
+                self._pending = (slow_query_log, entry, query, params)
+
+        return result
+
+    def _complete_pending(self, final: bool = False, explain: bool = True) -> None:
+        """
+        Capture the plan of the pending slow query once its rows are read,
+        or write its entry without a plan when the rows are abandoned.
+
+        Input:  final (bool)    | whether the rows can no longer be read
+        Input:  explain (bool)  | whether the connection may still be queried
+        """
+        if self._pending is None:
+            return
+
+        unread: bool = bool(getattr(self._connection, "unread_result", False))
+        if unread and not final:
+            return
+
+        slow_query_log, entry, query, params = self._pending
+        self._pending = None
+        slow_query_log.complete(
+            self._connection if explain and not unread else None, entry, query, params
+        )
+
+    def execute(self, query: str, *args: Any, **kwargs: Any) -> Any:
+        return self._execute(self._cursor.execute, query, args, kwargs, False)
+
+    def executemany(self, query: str, *args: Any, **kwargs: Any) -> Any:
+        return self._execute(self._cursor.executemany, query, args, kwargs, True)
+
+    def _fetched(self, started: float, rows: int) -> None:
+        FETCH_DURATION.observe(time.perf_counter() - started, self._function)
+        ROWS.inc(self._function, amount=rows)
+
+    def fetchone(self) -> Any:
+        started: float = time.perf_counter()
+        row: Any = self._cursor.fetchone()
+        self._fetched(started, 0 if row is None else 1)
+        self._complete_pending()
+        return row
+
+    def fetchmany(self, *args: Any, **kwargs: Any) -> List[Any]:
+        started: float = time.perf_counter()
+        rows: List[Any] = self._cursor.fetchmany(*args, **kwargs)
+        self._fetched(started, len(rows))
+        self._complete_pending()
+        return rows
+
+    def fetchall(self) -> List[Any]:
+        started: float = time.perf_counter()
+        rows: List[Any] = self._cursor.fetchall()
+        self._fetched(started, len(rows))
+        self._complete_pending()
+        return rows
+
+    def __iter__(self) -> Iterator[Any]:
+        # Time the whole iteration, recorded once when it ends
+        elapsed: float = 0.0
+        rows: int = 0
+        iterator: Iterator[Any] = iter(self._cursor)
+        try:
+            while True:
+                started: float = time.perf_counter()
+                try:
+                    row: Any = next(iterator)
+                except StopIteration:
+                    return
+                finally:
+                    elapsed += time.perf_counter() - started
+                rows += 1
+                yield row
+        finally:
+            FETCH_DURATION.observe(elapsed, self._function)
+            ROWS.inc(self._function, amount=rows)
+            self._complete_pending()
+
+    def close(self) -> Any:
+        # Rows left unread are dropped with the cursor: the entry is written
+        # without a plan, and the statement explained the next time it is slow
+        result: Any = self._cursor.close()
+        self._complete_pending(final=True)
+        return result
+
+    def __del__(self) -> None:
+        # The connection may be back in its pool: write the entry without a plan
+        self._complete_pending(final=True, explain=False)
+
+
+class InstrumentedConnection:
+    """
+    A connection whose cursors record the time spent in their queries.
+    Other attributes are those of the wrapped connection.
+    """
+
+    def __init__(self, connection: MySQLConnection) -> None:
+        self.connection: MySQLConnection = connection
+        # Number of queries run by the cursors of the connection
+        self.queries: int = 0
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.connection, name)
+
+    def cursor(self, *args: Any, **kwargs: Any) -> InstrumentedCursor:
+        return InstrumentedCursor(
+            self.connection.cursor(*args, **kwargs), self.connection, self
+        )
@@ -2,20 +2,566 @@
 Module to handle connection with the MySQL database
 """
 
-from mysql.connector import MySQLConnection, connect
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 
-# Global variable to hold a MySQL connection object
-__cnx: MySQLConnection = None
+from flask import (
+    Response,
+    current_app,
+    g,
+    has_app_context,
+    has_request_context,
+    request,
+)
+from mysql.connector import Error, MySQLConnection, connect
+from mysql.connector.errors import PoolError
 
+from database import sqlite_connection
+from database.instrumentation import InstrumentedConnection
+from services.metrics import DB_ROUTING, POOL_WAIT
 
-def get_sql_connection() -> MySQLConnection:
+# Storage engines, each with the function opening a connection with it.
+# The SQLite engine runs in-process and exposes the same connection API.
+ENGINES: Dict[str, Callable[..., MySQLConnection]] = {
+    "mysql": connect,
+    "sqlite": sqlite_connection.connect,
+}
+
+# Methods of the requests that may be served by a replica
+READ_METHODS: Tuple[str, ...] = ("GET", "HEAD")
+
+# Cookie holding the time until which the reads of a client go to the primary
+STICKY_COOKIE: str = "gs_primary_until"
+
+# Default settings used to open a connection with the MySQL database
+DEFAULT_CONNECT_ARGS: Dict[str, Any] = {
+    "user": "root",
+    "password": "",
+    "host": "127.0.0.1",
+    "database": "gs",
+}
+
+
+class ConnectionPool:
     """
-    Establish and return a MySQL connection.
-    Output: a MySQL connection object
+    A thread-safe pool of MySQL connections.
+
+    Connections are checked out for the duration of a request and returned
+    to the pool afterwards. A connection that has been idle for longer than
+    `ping_interval` seconds is pinged on checkout and reconnected if the
+    server dropped it. When every connection is in use, callers wait up to
+    `timeout` seconds for one to be released before a PoolError is raised.
     """
-    global __cnx
 
-    if __cnx is None:
-        __cnx = connect(user="root", password="", host="127.0.0.1", database="gs")
+    def __init__(
+        self,
+        min_size: int = 1,
+        max_size: int = 10,
+        timeout: float = 5.0,
+        ping_interval: float = 30.0,
+        connector: Optional[Callable[..., MySQLConnection]] = None,
+        **connect_args: Any,
+    ) -> None:
+        """
+        Create the pool and open `min_size` connections up front.
+
+        Input:  min_size (int)          | the number of connections kept open
+        Input:  max_size (int)          | the maximum number of open connections
+        Input:  timeout (float)         | the maximum time to wait for a connection
+        Input:  ping_interval (float)   | the idle time after which a connection is pinged
+        Input:  connector (Callable)    | the function opening a connection,
+                                          defaults to the MySQL `connect()`
+        Input:  connect_args            | the arguments passed to the connector
+        """
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError("Invalid pool size: expected 0 <= min_size <= max_size")
+
+        self.min_size: int = min_size
+        self.max_size: int = max_size
+        self.timeout: float = timeout
+        self.ping_interval: float = ping_interval
+        self.connector: Callable[..., MySQLConnection] = connector or connect
+        self.connect_args: Dict[str, Any] = connect_args or dict(DEFAULT_CONNECT_ARGS)
+        # Process owning the connections, see `get_pool()`
+        self.pid: int = os.getpid()
+
+        # Idle connections, each stored with the time it was released
+        self._idle: List[Tuple[MySQLConnection, float]] = []
+        # Number of connections currently open (idle + in use)
+        self._size: int = 0
+        self._in_use: int = 0
+        self._closed: bool = False
+        self._cond: threading.Condition = threading.Condition()
+
+        # Counters exposed through `stats()`
+        self._checkouts: int = 0
+        self._waits: int = 0
+        self._wait_time: float = 0.0
+        self._max_wait_time: float = 0.0
+        self._timeouts: int = 0
+        self._reconnects: int = 0
+
+        for _ in range(min_size):
+            self._idle.append((self._open(), time.monotonic()))
+            self._size += 1
+
+    def _open(self) -> MySQLConnection:
+        """
+        Open a new connection with the database.
+        """
+        return self.connector(**self.connect_args)
+
+    def _discard(self, cnx: MySQLConnection) -> None:
+        """
+        Close a connection that is no longer usable, ignoring any error.
+        """
+        try:
+            cnx.close()
+        except Error:
+            pass
+
+    def acquire(self, timeout: Optional[float] = None) -> MySQLConnection:
+        """
+        Check out a connection from the pool.
+
+        Input:  timeout (float)     | the maximum time to wait, defaults to the pool timeout
+        Output: a live MySQL connection object
+        """
+        timeout = self.timeout if timeout is None else timeout
+        started: float = time.monotonic()
+        deadline: float = started + timeout
+        waited: bool = False
+        cnx: Optional[MySQLConnection] = None
+        released_at: float = 0.0
+
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise PoolError("Connection pool is closed")
+                if self._idle:
+                    cnx, released_at = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    # Reserve a slot, the connection is opened outside the lock
+                    self._size += 1
+                    break
+                remaining: float = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolError(
+                        f"Timed out after {timeout}s waiting for a database connection"
+                    )
+                waited = True
+                self._cond.wait(remaining)
+
+            self._in_use += 1
+            self._checkouts += 1
+            wait_time: float = time.monotonic() - started
+            if waited:
+                self._waits += 1
+                self._wait_time += wait_time
+                self._max_wait_time = max(self._max_wait_time, wait_time)
+
+        try:
+            if cnx is None:
+                cnx = self._open()
+            elif time.monotonic() - released_at >= self.ping_interval:
+                self._ensure_alive(cnx)
+        except Error:
+            with self._cond:
+                self._in_use -= 1
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+        return cnx
+
+    def _ensure_alive(self, cnx: MySQLConnection) -> None:
+        """
+        Ping a connection and transparently reconnect it if it was dropped.
+        """
+        try:
+            cnx.ping(reconnect=False)
+        except Error:
+            cnx.reconnect(attempts=1, delay=0)
+            with self._cond:
+                self._reconnects += 1
+
+    def release(self, cnx: MySQLConnection) -> None:
+        """
+        Return a connection to the pool.
+
+        Any transaction left open by the caller is rolled back. A connection
+        that cannot be reset, or that still has unread rows pending from an
+        abandoned unbuffered query, is closed instead of being put back in
+        the pool: dropping it is cheaper than reading the rest of the rows.
+
+        Input:  cnx (MySQLConnection)   | the connection to return
+        """
+        reusable: bool = not cnx.unread_result
+        try:
+            if reusable and cnx.in_transaction:
+                cnx.rollback()
+        except Error:
+            reusable = False
+
+        with self._cond:
+            self._in_use -= 1
+            reusable = reusable and not self._closed
+            if reusable:
+                self._idle.append((cnx, time.monotonic()))
+            else:
+                self._size -= 1
+            self._cond.notify()
+
+        if not reusable:
+            self._discard(cnx)
+
+    def stats(self) -> Dict[str, Union[int, float]]:
+        """
+        Return a snapshot of the pool counters.
+
+        Output: a dictionary with the pool size, usage and wait statistics
+        """
+        with self._cond:
+            return {
+                "size": self._size,
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "checkouts": self._checkouts,
+                "waits": self._waits,
+                "wait_time_total": round(self._wait_time, 6),
+                "wait_time_max": round(self._max_wait_time, 6),
+                "timeouts": self._timeouts,
+                "reconnects": self._reconnects,
+            }
+
+    def close(self) -> None:
+        """
+        Close every idle connection and refuse further checkouts.
+        Connections still in use are closed when they are released.
+        """
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            self._cond.notify_all()
+
+        for cnx, _ in idle:
+            self._discard(cnx)
+
+
+def parse_endpoints(value: str) -> List[Dict[str, Union[str, int]]]:
+    """
+    Parse a comma-separated list of database endpoints, e.g. "db1:3306,db2".
+
+    Input:  value (str)     | the endpoints, each a host with an optional port
+    Output: the connection arguments of each endpoint
+    """
+    endpoints: List[Dict[str, Union[str, int]]] = []
+
+    for endpoint in filter(None, (e.strip() for e in value.split(","))):
+        host, _, port = (
+            endpoint.rpartition(":") if ":" in endpoint else (endpoint, "", "")
+        )
+        endpoints.append({"host": host, "port": int(port)} if port else {"host": host})
+
+    return endpoints
+
+
+def create_pool(
+    config: Dict[str, Any],
+    endpoint: Optional[Dict[str, Any]] = None,
+    min_size: Optional[int] = None,
+) -> ConnectionPool:
+    """
+    Create a connection pool from the Flask app config.
+    `DB_ENGINE` selects the storage engine, "mysql" (default) or "sqlite".
+
+    Input:  config (dict)   | the Flask app config
+    Input:  endpoint (dict) | connection arguments overriding the ones of the primary,
+                              to connect to a replica
+    Input:  min_size (int)  | the number of connections opened up front,
+                              defaults to `DB_POOL_MIN_SIZE`
+    Output: a ConnectionPool object
+    """
+    engine: str = config.get("DB_ENGINE", "mysql")
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown DB_ENGINE: {engine}")
+
+    max_size: int = config.get("DB_POOL_MAX_SIZE", 10)
+    connect_args: Dict[str, Any] = config.get("DB_CONNECT_ARGS", DEFAULT_CONNECT_ARGS)
+
+    if engine == "sqlite" and "database" not in (endpoint or {}):
+        connect_args = sqlite_connection.create_connect_args(config)
+    connect_args = {**connect_args, **(endpoint or {})}
+
+    if engine == "sqlite" and "mode=memory" in connect_args["database"]:
+        # Connections to a shared in-memory database lock whole tables
+        # and do not wait for each other, so they are used one at a time
+        max_size = 1
+
+    return ConnectionPool(
+        min_size=min(
+            config.get("DB_POOL_MIN_SIZE", 1) if min_size is None else min_size,
+            max_size,
+        ),
+        max_size=max_size,
+        timeout=config.get("DB_POOL_TIMEOUT", 5.0),
+        ping_interval=config.get("DB_POOL_PING_INTERVAL", 30.0),
+        connector=ENGINES[engine],
+        **connect_args,
+    )
+
+
+class ReplicaSet:
+    """
+    The connection pools of the read replicas, used in turn.
+
+    A replica that cannot be connected to is skipped for `retry_interval`
+    seconds, and reads fail over to the other replicas, then to the primary.
+    A replica whose pool is exhausted is skipped for the current read only.
+    """
+
+    def __init__(self, pools: List[ConnectionPool], retry_interval: float = 30.0):
+        """
+        Input:  pools (list)            | the pools of the replicas
+        Input:  retry_interval (float)  | the time a failed replica is skipped
+        """
+        self.pools: List[ConnectionPool] = pools
+        self.retry_interval: float = retry_interval
+        # Process owning the connections, see `get_pool()`
+        self.pid: int = os.getpid()
+
+        # Time until which each replica is skipped
+        self._down_until: List[float] = [0.0] * len(pools)
+        self._next: int = 0
+        self._lock: threading.Lock = threading.Lock()
+
+    def acquire(self) -> Optional[Tuple[ConnectionPool, MySQLConnection]]:
+        """
+        Check out a connection from the next healthy replica.
+
+        Output: a tuple (pool, connection), or None if no replica is available
+        """
+        with self._lock:
+            start: int = self._next
+            self._next = (self._next + 1) % len(self.pools)
+
+        for offset in range(len(self.pools)):
+            index: int = (start + offset) % len(self.pools)
+            if self._down_until[index] > time.monotonic():
+                continue
+
+            pool: ConnectionPool = self.pools[index]
+            try:
+                return pool, pool.acquire()
+            except PoolError:
+                continue
+            except Error as e:
+                print(f"Error connecting to replica {index}: {e}")
+                self._down_until[index] = time.monotonic() + self.retry_interval
+                DB_ROUTING.inc("replica_down")
+
+        return None
+
+    def stats(self) -> List[Dict[str, Union[int, float, bool]]]:
+        """
+        Return the health and the pool statistics of each replica.
+
+        Output: a list of dictionaries, one per replica
+        """
+        now: float = time.monotonic()
+
+        return [
+            {"healthy": down_until <= now, **pool.stats()}
+            for pool, down_until in zip(self.pools, self._down_until)
+        ]
+
+
+# Serializes the creation of the pool by the first requests of a process
+_pool_lock: threading.Lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    """
+    Return the connection pool of the current app, created from the app
+    config on first use, so that no connection is opened before the app
+    serves its first request.
+
+    A pool created before the process was forked belongs to the parent:
+    its sockets are shared with it and must not be used by the child,
+    which opens its own pool instead.
+
+    Output: the ConnectionPool object of the current process
+    """
+    pool: Optional[ConnectionPool] = current_app.config.get("pool")
+
+    if pool is None or pool.pid != os.getpid():
+        with _pool_lock:
+            pool = current_app.config.get("pool")
+            if pool is None or pool.pid != os.getpid():
+                pool = current_app.config["pool"] = create_pool(current_app.config)
+
+    return pool
+
+
+def get_replicas() -> Optional[ReplicaSet]:
+    """
+    Return the replica pools of the current app, created on first use
+    like the primary pool, or None when no replica is configured.
+    The replica pools open their connections when they are first used.
+
+    Output: the ReplicaSet object of the current process or None
+    """
+    if not current_app.config.get("DB_REPLICAS"):
+        return None
+
+    replicas: Optional[ReplicaSet] = current_app.config.get("replicas")
+
+    if replicas is None or replicas.pid != os.getpid():
+        with _pool_lock:
+            replicas = current_app.config.get("replicas")
+            if replicas is None or replicas.pid != os.getpid():
+                replicas = current_app.config["replicas"] = ReplicaSet(
+                    [
+                        create_pool(current_app.config, endpoint, min_size=0)
+                        for endpoint in current_app.config["DB_REPLICAS"]
+                    ],
+                    current_app.config.get("DB_REPLICA_RETRY_INTERVAL", 30.0),
+                )
+
+    return replicas
+
+
+def reads_from_replica() -> bool:
+    """
+    Tell whether the current request may read from a replica: it is a read
+    (GET or HEAD) and the client has not written within the sticky window,
+    in which case it reads its own writes from the primary.
+
+    Output: True if the request may be served by a replica
+    """
+    if not has_request_context() or request.method not in READ_METHODS:
+        return False
+
+    try:
+        return float(request.cookies.get(STICKY_COOKIE, 0)) <= time.time()
+    except ValueError:
+        return True
+
+
+def is_replica_connection(cnx: Any) -> bool:
+    """
+    Tell whether a connection is the replica connection of the current request.
+    What it reads may lag behind the primary, hence behind the catalog version.
+
+    Input:  cnx (MySQLConnection)   | a MySQL connection object
+    Output: True if the connection is connected to a replica
+    """
+    return has_app_context() and cnx is not None and cnx is g.get("replica_cnx")
+
+
+def served_by_replica() -> bool:
+    """
+    Tell whether the current request has read from a replica,
+    in which case its response must not be tagged with the catalog version.
+
+    Output: True if a query of the request ran on a replica
+    """
+    if not has_app_context():
+        return False
+
+    replica_cnx: Optional[InstrumentedConnection] = g.get("replica_cnx")
+
+    return replica_cnx is not None and replica_cnx.queries > 0
+
+
+def get_sql_connection(read_only: Optional[bool] = None) -> MySQLConnection:
+    """
+    Return the MySQL connection checked out for the current request.
+    The connection is taken from the app's pool on first use and
+    returned to it by `close_sql_connection()` on teardown.
+
+    Reads are served by a replica when replicas are configured, and by
+    the primary when none is available. A request that already holds
+    a connection to the primary keeps reading from it.
+
+    Input:  read_only (bool)    | whether the connection is only used to read,
+                                  by default, when the request is a read
+                                  that may be served by a replica
+    Output: a MySQL connection object, whose queries are timed
+    """
+    if read_only is None:
+        read_only = reads_from_replica()
+
+    if read_only and "cnx" not in g:
+        if "replica_cnx" not in g:
+            g.replica_cnx = None
+            replicas: Optional[ReplicaSet] = get_replicas()
+            checkout: Optional[Tuple[ConnectionPool, MySQLConnection]] = (
+                replicas.acquire() if replicas is not None else None
+            )
+            if checkout is not None:
+                g.replica_pool, cnx = checkout
+                g.replica_cnx = InstrumentedConnection(cnx)
+                DB_ROUTING.inc("replica")
+            elif replicas is not None:
+                DB_ROUTING.inc("failover")
+
+        if g.replica_cnx is not None:
+            return g.replica_cnx
+
+    if "cnx" not in g:
+        started: float = time.perf_counter()
+        cnx = get_pool().acquire()
+        POOL_WAIT.observe(time.perf_counter() - started)
+        g.cnx = InstrumentedConnection(cnx)
+        DB_ROUTING.inc("primary")
+
+    return g.cnx
+
+
+def stick_to_primary(response: Response) -> Response:
+    """
+    After a successful write, send the reads of the client to the primary
+    for `DB_STICKY_WINDOW` seconds, so that it reads its own writes
+    while the replicas catch up. Run after every request.
+
+    Input:  response (Response)     | the Flask response object
+    Output: the Flask response object
+    """
+    if (
+        "cnx" in g
+        and request.method not in READ_METHODS
+        and response.status_code < 400
+        and current_app.config.get("DB_REPLICAS")
+    ):
+        window: float = current_app.config.get("DB_STICKY_WINDOW", 5.0)
+        response.set_cookie(
+            STICKY_COOKIE,
+            f"{time.time() + window:.3f}",
+            max_age=int(window) + 1,
+            httponly=True,
+        )
+
+    return response
+
+
+def close_sql_connection(exception: Optional[BaseException] = None) -> None:
+    """
+    Return the connections checked out for the current request to their pool.
+
+    Input:  exception (BaseException)   | the exception raised by the request, if any
+    """
+    cnx: Optional[InstrumentedConnection] = g.pop("cnx", None)
+    replica_cnx: Optional[InstrumentedConnection] = g.pop("replica_cnx", None)
 
-    return __cnx
+    if cnx is not None:
+        get_pool().release(cnx.connection)
+    if replica_cnx is not None:
+        g.pop("replica_pool").release(replica_cnx.connection)
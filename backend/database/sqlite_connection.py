@@ -0,0 +1,293 @@
+"""
+Module to handle connection with an in-process SQLite database
+
+The DAO functions are written against the MySQL connector API. This module
+wraps `sqlite3` behind the small part of that API they use, so that the
+same DAO functions run on SQLite: for fast local testing and load testing,
+and for single-node deployments without a database server.
+"""
+
+import os
+import re
+import sqlite3
+import uuid
+from datetime import date, datetime
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from mysql.connector import errors
+
+# Path of the SQLite schema and of the sample data
+SCHEMA_PATH: str = os.path.join(os.path.dirname(__file__), "gs_db_sqlite.sql")
+DATA_PATH: str = os.path.join(os.path.dirname(__file__), "gs_data.sql")
+
+# Connections kept open to keep the in-memory databases alive,
+# an in-memory database is dropped when its last connection is closed
+_memory_databases: Dict[str, sqlite3.Connection] = {}
+
+# Store dates the way MySQL prints them
+sqlite3.register_adapter(date, lambda value: value.isoformat())
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(" "))
+
+# MySQL upserts, rewritten into their SQLite form
+_ON_DUPLICATE_KEY: re.Pattern = re.compile(r"ON DUPLICATE KEY UPDATE", re.IGNORECASE)
+_VALUES_REFERENCE: re.Pattern = re.compile(r"VALUES\((\w+)\)", re.IGNORECASE)
+
+
+def translate(query: str) -> str:
+    """
+    Translate a query written for MySQL into SQLite:
+    `%s` placeholders become `?` and `ON DUPLICATE KEY UPDATE`
+    upserts become `ON CONFLICT DO UPDATE` upserts.
+
+    Input:  query (str)     | the MySQL query
+    Output: the SQLite query
+    """
+    query = query.replace("%s", "?")
+
+    match: Optional[re.Match] = _ON_DUPLICATE_KEY.search(query)
+    if match:
+        update: str = _VALUES_REFERENCE.sub(r"excluded.\1", query[match.end() :])
+        query = f"{query[: match.start()]}ON CONFLICT DO UPDATE SET{update}"
+
+    return query
+
+
+def wrap_error(error: sqlite3.Error) -> errors.Error:
+    """
+    Convert a SQLite error into the matching MySQL connector error,
+    which is what the DAO functions catch.
+
+    Input:  error (sqlite3.Error)   | the SQLite error
+    Output: the MySQL connector error
+    """
+    if isinstance(error, sqlite3.IntegrityError):
+        return errors.IntegrityError(msg=str(error))
+    if isinstance(error, sqlite3.OperationalError):
+        return errors.OperationalError(msg=str(error))
+    if isinstance(error, sqlite3.ProgrammingError):
+        return errors.ProgrammingError(msg=str(error))
+
+    return errors.DatabaseError(msg=str(error))
+
+
+class SQLiteCursor:
+    """
+    A SQLite cursor behaving like a MySQL connector cursor.
+    """
+
+    def __init__(self, cursor: sqlite3.Cursor, dictionary: bool = False) -> None:
+        self._cursor: sqlite3.Cursor = cursor
+        self._dictionary: bool = dictionary
+        self._lastrowid: Optional[int] = None
+        self._rowcount: int = -1
+
+    def _row(self, row: Optional[Tuple[Any, ...]]) -> Any:
+        """
+        Return a row as a tuple, or as a dictionary for a dictionary cursor.
+        """
+        if row is None or not self._dictionary:
+            return row
+
+        return dict(zip((d[0] for d in self._cursor.description), row))
+
+    def execute(self, query: str, params: Sequence[Any] = ()) -> None:
+        try:
+            self._cursor.execute(translate(query), tuple(params))
+        except sqlite3.Error as e:
+            raise wrap_error(e) from e
+
+        self._lastrowid = self._cursor.lastrowid
+        self._rowcount = self._cursor.rowcount
+
+    def executemany(self, query: str, seq_params: Sequence[Sequence[Any]]) -> None:
+        """
+        Execute a query for each set of parameters.
+        Like the MySQL connector, `lastrowid` is the ID of the first
+        inserted row and `rowcount` the total number of affected rows.
+        """
+        query = translate(query)
+        first_rowid: Optional[int] = None
+        rowcount: int = 0
+
+        try:
+            for params in seq_params:
+                self._cursor.execute(query, tuple(params))
+                if first_rowid is None:
+                    first_rowid = self._cursor.lastrowid
+                rowcount += max(self._cursor.rowcount, 0)
+        except sqlite3.Error as e:
+            raise wrap_error(e) from e
+
+        self._lastrowid = first_rowid
+        self._rowcount = rowcount
+
+    def fetchone(self) -> Any:
+        return self._row(self._cursor.fetchone())
+
+    def fetchmany(self, size: int = 1) -> List[Any]:
+        return [self._row(row) for row in self._cursor.fetchmany(size)]
+
+    def fetchall(self) -> List[Any]:
+        return [self._row(row) for row in self._cursor.fetchall()]
+
+    def __iter__(self) -> Iterator[Any]:
+        return (self._row(row) for row in self._cursor)
+
+    @property
+    def lastrowid(self) -> Optional[int]:
+        return self._lastrowid
+
+    @property
+    def rowcount(self) -> int:
+        return self._rowcount
+
+    @property
+    def description(self) -> Any:
+        return self._cursor.description
+
+    def close(self) -> None:
+        self._cursor.close()
+
+
+class SQLiteConnection:
+    """
+    A SQLite connection behaving like a MySQL connector connection.
+    """
+
+    # Rows of a SQLite query are never left pending on the connection
+    unread_result: bool = False
+
+    # Statement showing the execution plan of a query
+    explain_statement: str = "EXPLAIN QUERY PLAN"
+
+    def __init__(self, connection: sqlite3.Connection) -> None:
+        self._connection: sqlite3.Connection = connection
+
+    @property
+    def in_transaction(self) -> bool:
+        return self._connection.in_transaction
+
+    def cursor(
+        self, buffered: Optional[bool] = None, dictionary: bool = False, **kwargs: Any
+    ) -> SQLiteCursor:
+        """
+        Create a cursor. `buffered` and the other MySQL options do not apply.
+        """
+        return SQLiteCursor(self._connection.cursor(), dictionary=dictionary)
+
+    def start_transaction(self) -> None:
+        try:
+            self._connection.execute("BEGIN")
+        except sqlite3.Error as e:
+            raise wrap_error(e) from e
+
+    def commit(self) -> None:
+        try:
+            self._connection.commit()
+        except sqlite3.Error as e:
+            raise wrap_error(e) from e
+
+    def rollback(self) -> None:
+        try:
+            self._connection.rollback()
+        except sqlite3.Error as e:
+            raise wrap_error(e) from e
+
+    def ping(self, reconnect: bool = False, **kwargs: Any) -> None:
+        """
+        An in-process database never drops its connections.
+        """
+
+    def reconnect(self, **kwargs: Any) -> None:
+        """
+        An in-process database never drops its connections.
+        """
+
+    def consume_results(self) -> None:
+        """
+        Rows of a SQLite query are never left pending on the connection.
+        """
+
+    def close(self) -> None:
+        self._connection.close()
+
+
+def memory_database_uri() -> str:
+    """
+    Return the URI of a new in-memory database
+    that can be shared by several connections.
+    """
+    return f"file:gs-{uuid.uuid4().hex}?mode=memory&cache=shared"
+
+
+def connect(database: str = ":memory:", **kwargs: Any) -> SQLiteConnection:
+    """
+    Open a connection with a SQLite database, creating the schema if needed.
+    In-memory databases are named by a URI from `memory_database_uri()`,
+    and stay alive for the whole life of the process.
+
+    Input:  database (str)  | the path or the URI of the database
+    Output: a SQLiteConnection object
+    """
+    uri: bool = database.startswith("file:")
+    try:
+        connection: sqlite3.Connection = sqlite3.connect(
+            database, uri=uri, check_same_thread=False, timeout=5.0
+        )
+        connection.execute("PRAGMA foreign_keys = ON")
+
+        if "mode=memory" in database:
+            if database not in _memory_databases:
+                _memory_databases[database] = sqlite3.connect(
+                    database, uri=True, check_same_thread=False
+                )
+        elif database != ":memory:":
+            # Let readers run while a write is in progress
+            connection.execute("PRAGMA journal_mode = WAL")
+    except sqlite3.Error as e:
+        raise wrap_error(e) from e
+
+    return SQLiteConnection(connection)
+
+
+def initialize(cnx: SQLiteConnection, seed: bool = False) -> None:
+    """
+    Create the tables of the database if they do not exist,
+    and load the sample data into an empty database if asked to.
+
+    Input:  cnx (SQLiteConnection)  | a SQLite connection object
+    Input:  seed (bool)             | whether to load the sample data
+    """
+    connection: sqlite3.Connection = cnx._connection
+
+    with open(SCHEMA_PATH, encoding="utf-8") as schema:
+        connection.executescript(schema.read())
+
+    if seed and connection.execute("SELECT COUNT(*) FROM uom").fetchone()[0] == 0:
+        with open(DATA_PATH, encoding="utf-8") as data:
+            # The sample data is written for MySQL, where the tables
+            # are qualified with the name of the database
+            connection.executescript(data.read().replace("`gs`.", ""))
+
+    connection.commit()
+
+
+def create_connect_args(config: Dict[str, Any]) -> Dict[str, Union[str, bool]]:
+    """
+    Build the connection arguments of a SQLite database
+    from the Flask app config, and prepare the database.
+
+    Input:  config (dict)   | the Flask app config
+    Output: the arguments to pass to `connect()`
+    """
+    database: str = config.get("DB_SQLITE_PATH", ":memory:")
+    if database == ":memory:":
+        database = memory_database_uri()
+
+    cnx: SQLiteConnection = connect(database)
+    try:
+        initialize(cnx, seed=config.get("DB_SQLITE_SEED", False))
+    finally:
+        cnx.close()
+
+    return {"database": database}
@@ -0,0 +1,111 @@
+"""
+Cache of the server-side prepared statements of the pooled connections
+
+The DAO functions run a handful of fixed statements. Instead of sending
+their text to be parsed on every call, each connection keeps one prepared
+cursor per statement, reused across requests for as long as the connection
+lives in the pool. Prepared statements belong to the server session: when
+the connection is re-established, the cache notices the new connection ID
+and prepares the statements again.
+"""
+
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+from mysql.connector import Error, MySQLConnection
+from mysql.connector.cursor import MySQLCursor
+
+from database.instrumentation import InstrumentedConnection, InstrumentedCursor
+
+
+class StatementCache:
+    """
+    The prepared cursors of a connection, one per statement.
+    A connection is only used by one request at a time, so is its cache.
+    """
+
+    def __init__(self, max_statements: int = 32) -> None:
+        """
+        Input:  max_statements (int)    | the number of statements kept prepared
+        """
+        self.max_statements: int = max_statements
+        self._cursors: "OrderedDict[Tuple[str, bool], MySQLCursor]" = OrderedDict()
+        # Session the statements were prepared in
+        self._connection_id: Optional[int] = None
+
+    def __len__(self) -> int:
+        return len(self._cursors)
+
+    def cursor(
+        self, cnx: MySQLConnection, query: str, dictionary: bool = False
+    ) -> MySQLCursor:
+        """
+        Return the prepared cursor of a statement, preparing it on first use.
+
+        Input:  cnx (MySQLConnection)   | the connection owning the cache
+        Input:  query (str)             | the statement
+        Input:  dictionary (bool)       | whether rows are returned as dictionaries
+        Output: a prepared cursor
+        """
+        connection_id: Optional[int] = getattr(cnx, "connection_id", None)
+        if connection_id != self._connection_id:
+            # The connection was re-established and its statements were lost
+            # with the previous session, there is nothing left to close
+            self._cursors.clear()
+            self._connection_id = connection_id
+
+        key: Tuple[str, bool] = (query, dictionary)
+        cursor: Optional[MySQLCursor] = self._cursors.get(key)
+        if cursor is not None:
+            self._cursors.move_to_end(key)
+            return cursor
+
+        if len(self._cursors) >= self.max_statements:
+            _, evicted = self._cursors.popitem(last=False)
+            close_cursor(evicted)
+
+        cursor = cnx.cursor(prepared=True, dictionary=dictionary)
+        self._cursors[key] = cursor
+
+        return cursor
+
+    def clear(self) -> None:
+        """
+        Close every prepared cursor.
+        """
+        for cursor in self._cursors.values():
+            close_cursor(cursor)
+        self._cursors.clear()
+
+
+def close_cursor(cursor: MySQLCursor) -> None:
+    """
+    Close a cursor, deallocating its prepared statement, ignoring any error.
+    """
+    try:
+        cursor.close()
+    except Error:
+        pass
+
+
+def prepared_cursor(cnx: Any, query: str, dictionary: bool = False) -> Any:
+    """
+    Return a cursor with the statement prepared on the connection,
+    reused by every call running the same statement on that connection.
+    The statement must be executed with the same `query` string.
+
+    Input:  cnx (MySQLConnection)   | a MySQL connection object
+    Input:  query (str)             | the statement
+    Input:  dictionary (bool)       | whether rows are returned as dictionaries
+    Output: a prepared cursor
+    """
+    if isinstance(cnx, InstrumentedConnection):
+        return InstrumentedCursor(
+            prepared_cursor(cnx.connection, query, dictionary), cnx.connection, cnx
+        )
+
+    statements: Optional[StatementCache] = getattr(cnx, "statements", None)
+    if statements is None:
+        statements = cnx.statements = StatementCache()
+
+    return statements.cursor(cnx, query, dictionary)
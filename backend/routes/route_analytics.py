@@ -0,0 +1,83 @@
+"""
+Analytics routes/endpoints for the Grocery Management System API.
+"""
+
+from datetime import date
+from typing import Dict, List, Literal, Optional, Tuple, Union
+
+from database.sql_connection import get_sql_connection
+from flask import Blueprint, Response, make_response, request
+from mysql.connector import MySQLConnection
+from services import service_analytics
+from services.serialization import json_response
+
+# Create a Blueprint for the sales analytics
+sales_analytics_bp: Blueprint = Blueprint("sales_analytics_bp", __name__)
+
+
+@sales_analytics_bp.route("/analytics/sales", methods=["GET"])
+def get_sales() -> Union[Response, Tuple[Response, Literal[400, 500]]]:
+    """
+    GET /analytics/sales
+    READ the sales figures from the precomputed rollups
+
+    Optional query string parameters:
+        from        | the first day of the report (YYYY-MM-DD), included
+        to          | the last day of the report (YYYY-MM-DD), included
+        group_by    | "day" (default), "product" or "uom"
+
+    Output: a Flask Response object
+            including HTTP status code, JSON data, and CORS headers
+    """
+    group_by: str = request.args.get("group_by", "day")
+    if group_by not in service_analytics.GROUP_BY:
+        return make_response(
+            json_response(
+                {
+                    "error": "group_by must be one of: "
+                    + ", ".join(service_analytics.GROUP_BY)
+                }
+            ),
+            400,
+        )
+
+    try:
+        date_from: Optional[date] = (
+            date.fromisoformat(request.args["from"]) if "from" in request.args else None
+        )
+        date_to: Optional[date] = (
+            date.fromisoformat(request.args["to"]) if "to" in request.args else None
+        )
+    except ValueError:
+        return make_response(
+            json_response(
+                {"error": "from and to must be dates formatted as YYYY-MM-DD"}
+            ),
+            400,
+        )
+
+    # Get the database connection checked out for this request
+    cnx: MySQLConnection = get_sql_connection()
+
+    # Get the sales figures from the rollups
+    sales: Optional[List[Dict[str, Union[int, str, float]]]] = (
+        service_analytics.get_sales(cnx, date_from, date_to, group_by)
+    )
+
+    # Declare a variable to hold the Flask response object
+    response: Union[Response, Tuple[Response, Literal[500]]]
+
+    if sales is not None:
+        # Create a Flask response object
+        response = make_response(json_response(sales), 200)
+    else:
+        # Create a response with a 500 error if the rollups could not be read
+        response = make_response(json_response({"error": "Failed to fetch sales"}), 500)
+
+    # The `Access-Control-Allow-Origin` header is part of the CORS mechanism.
+    # It tells the browser which origins are allowed to access
+    # the resources on the server.
+    # `*` means that all the origins can access the endpoint.
+    response.headers.add("Access-Control-Allow-Origin", "*")
+
+    return response
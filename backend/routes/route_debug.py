@@ -0,0 +1,30 @@
+"""
+Debugging routes/endpoints for the Grocery Management System API.
+"""
+
+from flask import Blueprint, Response
+from services.serialization import json_response
+from services.slow_queries import SlowQueryLog, get_slow_query_log
+
+# Create a Blueprint for the slow-query log
+slow_queries_bp: Blueprint = Blueprint("slow_queries_bp", __name__)
+
+
+@slow_queries_bp.route("/debug/slow-queries", methods=["GET"])
+def get_slow_queries() -> Response:
+    """
+    GET /debug/slow-queries
+    READ the most recent queries slower than the slow-query threshold,
+    with the execution plan captured the first time each query was slow
+
+    Output: a Flask Response object
+            including HTTP status code and JSON data
+    """
+    slow_query_log: SlowQueryLog = get_slow_query_log()
+
+    return json_response(
+        {
+            "threshold_ms": slow_query_log.threshold * 1000,
+            "queries": slow_query_log.entries(),
+        }
+    )
@@ -0,0 +1,94 @@
+"""
+Health routes/endpoints for the Grocery Management System API.
+"""
+
+from typing import Any, Dict, Literal, Optional, Tuple, Union
+
+from database.sql_connection import ReplicaSet, get_pool, get_replicas
+from flask import Blueprint, Response, current_app, make_response
+from mysql.connector import Error, MySQLConnection
+from services.admission import AdmissionLimiter
+from services.serialization import json_response
+
+# Create a Blueprint for the root endpoint
+root_bp: Blueprint = Blueprint("root_bp", __name__)
+
+# Create a Blueprint for the connection pool statistics
+pool_stats_bp: Blueprint = Blueprint("pool_stats_bp", __name__)
+
+# Create a Blueprint for the readiness probe
+readiness_bp: Blueprint = Blueprint("readiness_bp", __name__)
+
+
+@root_bp.route("/")
+def root() -> Response:
+    """
+    Root endpoint for the Grocery Management System API.
+
+    This endpoint returns a simple JSON message indicating that the
+    Grocery Management System API is running. It serves as a basic
+    health check or welcome message.
+
+    Output: a JSON object with a welcome message.
+    """
+    return json_response(
+        {"message": "Welcome to the Grocery Store Management System API!"}
+    )
+
+
+@pool_stats_bp.route("/pool")
+def pool_stats() -> Response:
+    """
+    Connection pool statistics endpoint.
+
+    Output: a JSON object with the number of connections in use and idle,
+            and the time spent waiting for a connection,
+            the health and statistics of each replica pool,
+            and the state of the admission control of the reads and writes.
+    """
+    stats: Dict[str, Any] = get_pool().stats()
+
+    replicas: Optional[ReplicaSet] = get_replicas()
+    if replicas is not None:
+        stats["replicas"] = replicas.stats()
+
+    limiters: Optional[Dict[str, AdmissionLimiter]] = current_app.config.get(
+        "admission"
+    )
+    if limiters is not None:
+        stats["admission"] = {
+            name: limiter.stats() for name, limiter in limiters.items()
+        }
+
+    return json_response(stats)
+
+
+@readiness_bp.route("/ready", methods=["GET"])
+def readiness() -> Union[Response, Tuple[Response, Literal[503]]]:
+    """
+    GET /ready
+    CHECK that the process can serve requests: a database connection
+    can be checked out from its pool and answers a ping.
+    The pool of the process is opened by the first check if needed.
+    Replicas are not checked, since reads fail over to the primary.
+
+    Output: a Flask Response object
+            with HTTP status code 200 when ready, 503 otherwise
+    """
+    try:
+        pool = get_pool()
+        cnx: MySQLConnection = pool.acquire(
+            timeout=current_app.config.get("READINESS_TIMEOUT", 1.0)
+        )
+        try:
+            cnx.ping(reconnect=False)
+        finally:
+            pool.release(cnx)
+    except Error as e:
+        print(f"Error checking readiness: {e}")
+        return make_response(
+            json_response({"status": "unavailable", "error": "Database unavailable"}),
+            503,
+        )
+
+    return json_response({"status": "ready"})
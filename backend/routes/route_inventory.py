@@ -0,0 +1,224 @@
+"""
+Inventory routes/endpoints for the Grocery Management System API.
+"""
+
+import math
+from typing import Any, Dict, List, Literal, Optional, Tuple, Union
+
+from database.sql_connection import get_sql_connection
+from flask import Blueprint, Response, make_response, request
+from mysql.connector import Error, MySQLConnection
+from services import service_inventory
+from services.serialization import json_response
+
+# Create a Blueprint for the stock levels
+inventory_bp: Blueprint = Blueprint("inventory_bp", __name__)
+
+# Create a Blueprint for setting the stock of a product
+set_stock_bp: Blueprint = Blueprint("set_stock_bp", __name__)
+
+# Create a Blueprint for adjusting the stock of a product
+adjust_stock_bp: Blueprint = Blueprint("adjust_stock_bp", __name__)
+
+# Maximum number of stock levels returned by one request
+MAX_INVENTORY_LIMIT: int = 1000
+
+
+def is_number(value: Any) -> bool:
+    """
+    Tell whether a decoded JSON value is a finite number,
+    the JSON decoder accepting NaN and Infinity.
+    """
+    if isinstance(value, float):
+        return math.isfinite(value)
+
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+@inventory_bp.route("/inventory", methods=["GET"])
+def get_inventory() -> Union[Response, Tuple[Response, Literal[400, 500]]]:
+    """
+    GET /inventory?max_stock={stock}&limit={limit}
+    READ the stock of the tracked products
+
+    Query parameters:
+        max_stock   | only the products whose stock is at most this value,
+                      lowest stock first (low-stock report)
+        limit       | the maximum number of products to return (default 100)
+
+    Output: a Flask Response object
+            including HTTP status code, JSON data, and CORS headers
+    """
+    max_stock: Optional[float] = request.args.get("max_stock", type=float)
+    if "max_stock" in request.args and not is_number(max_stock):
+        return make_response(
+            json_response({"error": "max_stock must be a number"}), 400
+        )
+
+    limit: Optional[int] = request.args.get("limit", type=int, default=100)
+    if limit is None or not 1 <= limit <= MAX_INVENTORY_LIMIT:
+        return make_response(
+            json_response(
+                {"error": f"limit must be between 1 and {MAX_INVENTORY_LIMIT}"}
+            ),
+            400,
+        )
+
+    # Get the database connection checked out for this request
+    cnx: MySQLConnection = get_sql_connection()
+
+    # Get the stock levels
+    levels: Optional[List[Dict[str, Union[int, str, float]]]] = (
+        service_inventory.get_inventory(cnx, max_stock, limit)
+    )
+
+    # Declare a variable to hold the Flask response object
+    response: Union[Response, Tuple[Response, Literal[500]]]
+
+    if levels is not None:
+        # Create a Flask response object, an empty list if no product matched
+        response = make_response(json_response(levels), 200)
+    else:
+        # Create a response with a 500 error if the query failed
+        response = make_response(
+            json_response({"error": "Failed to fetch inventory"}), 500
+        )
+
+    # The `Access-Control-Allow-Origin` header is part of the CORS mechanism.
+    # It tells the browser which origins are allowed to access
+    # the resources on the server.
+    # `*` means that all the origins can access the endpoint.
+    response.headers.add("Access-Control-Allow-Origin", "*")
+
+    return response
+
+
+@set_stock_bp.route("/inventory/<int:product_id>", methods=["PUT"])
+def set_stock(
+    product_id: int,
+) -> Union[Response, Tuple[Response, Literal[400, 404, 409, 500]]]:
+    """
+    PUT /inventory/<product_id>
+    SET the stock of a product, which starts to be tracked if it was not
+
+    Input: the request body, a JSON object with the new stock and optionally
+           the version the stock was read at: the stock is then only set
+           if it did not change since, 409 with the current stock otherwise
+    Output: a Flask Response object
+            including HTTP status code, JSON data, and CORS headers
+    """
+    # Parse the JSON data from the request body
+    stock_data: Any = request.get_json(silent=True)
+
+    # Validate the incoming data from the request body
+    if not isinstance(stock_data, dict) or not is_number(stock_data.get("stock")):
+        return make_response(
+            json_response({"error": "Missing required field: stock"}), 400
+        )
+    if stock_data["stock"] < 0:
+        return make_response(
+            json_response({"error": "The stock cannot be negative"}), 400
+        )
+    version: Any = stock_data.get("version")
+    if version is not None and (
+        not isinstance(version, int) or isinstance(version, bool) or version < 0
+    ):
+        return make_response(
+            json_response({"error": "version must be a positive integer"}), 400
+        )
+
+    # Get the database connection checked out for this request
+    cnx: MySQLConnection = get_sql_connection()
+
+    try:
+        level: Optional[Dict[str, Union[int, float]]] = service_inventory.set_stock(
+            cnx, product_id, stock_data["stock"], version
+        )
+    except service_inventory.StockConflictError as e:
+        # Create a response with a 409 error and the current stock
+        return make_response(
+            json_response({"error": str(e), "current": e.current}), 409
+        )
+    except Error as e:
+        print(f"Error setting stock: {e}")
+        return make_response(json_response({"error": "Failed to set stock"}), 500)
+
+    # Declare a variable to hold the Flask response object
+    response: Union[Response, Tuple[Response, Literal[404]]]
+
+    if level:
+        # Create a success response with the new stock
+        response = make_response(json_response(level), 200)
+    else:
+        # Create a response with a 404 error if the product is not found
+        response = make_response(json_response({"error": "Product not found"}), 404)
+
+    # The `Access-Control-Allow-Origin` header is part of the CORS mechanism.
+    # It tells the browser which origins are allowed to access
+    # the resources on the server.
+    # `*` means that all the origins can access the endpoint.
+    response.headers.add("Access-Control-Allow-Origin", "*")
+
+    return response
+
+
+@adjust_stock_bp.route("/inventory/<int:product_id>", methods=["PATCH"])
+def adjust_stock(
+    product_id: int,
+) -> Union[Response, Tuple[Response, Literal[400, 404, 409, 500]]]:
+    """
+    PATCH /inventory/<product_id>
+    ADJUST the stock of a tracked product, e.g. on a delivery or a count
+
+    Input: the request body, a JSON object with the delta to add to the stock,
+           negative to remove units
+    Output: a Flask Response object
+            including HTTP status code, JSON data, and CORS headers
+    """
+    # Parse the JSON data from the request body
+    stock_data: Any = request.get_json(silent=True)
+
+    # Validate the incoming data from the request body
+    if not isinstance(stock_data, dict) or not is_number(stock_data.get("delta")):
+        return make_response(
+            json_response({"error": "Missing required field: delta"}), 400
+        )
+
+    # Get the database connection checked out for this request
+    cnx: MySQLConnection = get_sql_connection()
+
+    try:
+        level: Optional[Dict[str, Union[int, float]]] = service_inventory.adjust_stock(
+            cnx, product_id, stock_data["delta"]
+        )
+    except service_inventory.InsufficientStockError as e:
+        # Create a response with a 409 error if the stock would become negative
+        return make_response(json_response({"error": str(e)}), 409)
+    except service_inventory.StockConflictError as e:
+        # Create a response with a 409 error if every attempt conflicted
+        return make_response(
+            json_response({"error": str(e), "current": e.current}), 409
+        )
+    except Error as e:
+        print(f"Error adjusting stock: {e}")
+        return make_response(json_response({"error": "Failed to adjust stock"}), 500)
+
+    # Declare a variable to hold the Flask response object
+    response: Union[Response, Tuple[Response, Literal[404]]]
+
+    if level:
+        # Create a success response with the new stock
+        response = make_response(json_response(level), 200)
+    else:
+        # Create a response with a 404 error if the product is not tracked
+        response = make_response(
+            json_response({"error": "Product not tracked in the inventory"}), 404
+        )
+
+    # The `Access-Control-Allow-Origin` header is part of the CORS mechanism.
+    # It tells the browser which origins are allowed to access
+    # the resources on the server.
+    # `*` means that all the origins can access the endpoint.
+    response.headers.add("Access-Control-Allow-Origin", "*")
+
+    return response
@@ -0,0 +1,93 @@
+"""
+Metrics routes/endpoints for the Grocery Management System API.
+
+The blueprint also instruments every request of the app: its latency,
+its status code and the number of requests in flight are recorded
+per blueprint and route.
+"""
+
+import time
+from typing import Dict, Optional, Tuple, Union
+
+from database.sql_connection import ConnectionPool
+from flask import Blueprint, Response, current_app, g, request
+from services.metrics import (
+    POOL_CONNECTIONS,
+    POOL_EVENTS,
+    REQUEST_DURATION,
+    REQUESTS_IN_FLIGHT,
+    RESPONSES,
+    registry,
+)
+
+# Create a Blueprint for the metrics
+metrics_bp: Blueprint = Blueprint("metrics_bp", __name__)
+
+# Content type of the Prometheus text format
+PROMETHEUS_CONTENT_TYPE: str = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def request_labels() -> Tuple[str, str]:
+    """
+    Return the blueprint and the route rule of the current request,
+    which keep the number of label values small unlike the URL path.
+    """
+    blueprint: str = request.blueprint or "app"
+    route: str = request.url_rule.rule if request.url_rule else "unmatched"
+
+    return blueprint, route
+
+
+@metrics_bp.before_app_request
+def start_request_timer() -> None:
+    g.metrics_labels = request_labels()
+    g.metrics_started = time.perf_counter()
+    REQUESTS_IN_FLIGHT.inc(*g.metrics_labels)
+
+
+def record_request(status: int) -> None:
+    """
+    Record the latency and the status code of the current request, once.
+    """
+    labels: Optional[Tuple[str, str]] = g.pop("metrics_labels", None)
+    if labels is None:
+        return
+
+    REQUEST_DURATION.observe(
+        time.perf_counter() - g.metrics_started, *labels, request.method
+    )
+    RESPONSES.inc(*labels, request.method, str(status))
+    REQUESTS_IN_FLIGHT.dec(*labels)
+
+
+@metrics_bp.after_app_request
+def stop_request_timer(response: Response) -> Response:
+    record_request(response.status_code)
+
+    return response
+
+
+@metrics_bp.teardown_app_request
+def record_failed_request(exception: Optional[BaseException] = None) -> None:
+    # Requests that raised an unhandled error never reach `after_app_request`
+    record_request(500)
+
+
+@metrics_bp.route("/metrics", methods=["GET"])
+def get_metrics() -> Response:
+    """
+    GET /metrics
+    READ the metrics of the API in the Prometheus text format
+
+    Output: a Flask Response object with the metrics
+    """
+    # The pool is only opened by the first request that needs the database
+    pool: Optional[ConnectionPool] = current_app.config.get("pool")
+    if pool is not None:
+        pool_stats: Dict[str, Union[int, float]] = pool.stats()
+        for state in ("in_use", "idle"):
+            POOL_CONNECTIONS.set(state, value=pool_stats[state])
+        for event in ("checkouts", "waits", "timeouts", "reconnects"):
+            POOL_EVENTS.set(event, value=pool_stats[event])
+
+    return Response(registry.render(), content_type=PROMETHEUS_CONTENT_TYPE)
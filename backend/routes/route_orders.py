@@ -0,0 +1,209 @@
+"""
+Order routes/endpoints for the Grocery Management System API.
+"""
+
+import itertools
+import math
+from datetime import date
+from typing import Any, Dict, Generator, List, Literal, Optional, Tuple, Union
+
+from database.sql_connection import get_sql_connection
+from flask import (
+    Blueprint,
+    Response,
+    current_app,
+    make_response,
+    request,
+    stream_with_context,
+)
+from mysql.connector import Error, MySQLConnection
+from services import exports, service_orders
+from services.serialization import json_response
+from services.service_inventory import InsufficientStockError
+
+# Create a Blueprint for an order placement
+insert_order_bp: Blueprint = Blueprint("insert_order_bp", __name__)
+
+# Create a Blueprint for the export of the order history
+export_orders_bp: Blueprint = Blueprint("export_orders_bp", __name__)
+
+
+def validate_order(order_data: Any) -> Optional[str]:
+    """
+    Validate the order sent in the request body.
+
+    Input:  order_data (Any)    | the decoded request body
+    Output: an error message, or None if the order is valid
+    """
+    if not isinstance(order_data, dict):
+        return "Expected a JSON object"
+
+    required_fields: List[str] = ["customer_name", "items"]
+    for field in required_fields:
+        if field not in order_data:
+            return f"Missing required field: {field}"
+
+    items: Any = order_data["items"]
+    if not isinstance(items, list) or not items:
+        return "An order needs at least one item"
+
+    for item in items:
+        if not isinstance(item, dict) or "product_id" not in item:
+            return "Missing required field: product_id"
+        if "quantity" not in item:
+            return "Missing required field: quantity"
+        try:
+            int(item["product_id"])
+            quantity: float = float(item["quantity"])
+        except (TypeError, ValueError, OverflowError):
+            return "Invalid product_id or quantity"
+        if not math.isfinite(quantity):
+            return "Invalid product_id or quantity"
+        if quantity <= 0:
+            return "The quantity of an item must be positive"
+
+    return None
+
+
+@insert_order_bp.route("/orders", methods=["POST"])
+def insert_order() -> Union[Response, Tuple[Response, Literal[400, 409]]]:
+    """
+    POST /orders
+    CREATE a new order
+
+    Input: the request body, a JSON object with the customer_name and
+           the list of items, each with a product_id and a quantity
+    Output: a Flask Response object
+            including HTTP status code, JSON data, and CORS headers
+    """
+    # Parse the JSON data from the request body
+    order_data: Any = request.get_json(silent=True)
+
+    # Validate the incoming data from the request body
+    if error := validate_order(order_data):
+        return make_response(json_response({"error": error}), 400)
+
+    # Get the database connection checked out for this request
+    cnx: MySQLConnection = get_sql_connection()
+
+    # Declare a variable to hold the Flask response object
+    response: Union[Response, Tuple[Response, Literal[400, 409]]]
+
+    try:
+        order: Optional[Dict[str, Union[int, str, float]]] = (
+            service_orders.insert_order(cnx, order_data)
+        )
+    except InsufficientStockError as e:
+        # Create a response with a 409 error if a product is out of stock
+        return make_response(
+            json_response({"error": str(e), "product_ids": e.product_ids}), 409
+        )
+    except ValueError as e:
+        # Create a response with a 400 error if a product does not exist
+        return make_response(json_response({"error": str(e)}), 400)
+
+    if order:
+        # Create a success response with the newly created order
+        response = make_response(
+            json_response({"message": "Order created", **order}), 201
+        )
+    else:
+        # Create a response with a 400 error if the insertion failed
+        response = make_response(json_response({"error": "Failed to place order"}), 400)
+
+    # The `Access-Control-Allow-Origin` header is part of the CORS mechanism.
+    # It tells the browser which origins are allowed to access
+    # the resources on the server.
+    # `*` means that all the origins can access the endpoint.
+    response.headers.add("Access-Control-Allow-Origin", "*")
+
+    return response
+
+
+@export_orders_bp.route("/orders/export", methods=["GET"])
+def export_orders() -> Union[Response, Tuple[Response, Literal[400, 500]]]:
+    """
+    GET /orders/export?from={YYYY-MM-DD}&to={YYYY-MM-DD}&format={csv|parquet}
+    EXPORT the line items of the orders, one row per line item
+    with the details of its order and product
+
+    The lines are read from the database in batches and each batch is
+    encoded and sent before the next one is read: CSV lines, or a row group
+    of the Parquet file. The memory used does not depend on the number of
+    orders exported. Parquet requires pyarrow.
+
+    Query parameters:
+        from        | the first day of the export (YYYY-MM-DD), included
+        to          | the last day of the export (YYYY-MM-DD), included
+        format      | csv (default) or parquet
+
+    Output: a Flask Response object
+            streaming the CSV or Parquet file, with CORS headers
+    """
+    export_format: str = request.args.get("format", "csv")
+    if export_format not in exports.EXPORT_FORMATS:
+        return make_response(
+            json_response(
+                {"error": "format must be one of: " + ", ".join(exports.EXPORT_FORMATS)}
+            ),
+            400,
+        )
+
+    try:
+        date_from: Optional[date] = (
+            date.fromisoformat(request.args["from"]) if "from" in request.args else None
+        )
+        date_to: Optional[date] = (
+            date.fromisoformat(request.args["to"]) if "to" in request.args else None
+        )
+    except ValueError:
+        return make_response(
+            json_response(
+                {"error": "from and to must be dates formatted as YYYY-MM-DD"}
+            ),
+            400,
+        )
+
+    # Get the database connection checked out for this request
+    cnx: MySQLConnection = get_sql_connection()
+
+    batches: Generator[List[Tuple[Any, ...]], None, None] = (
+        service_orders.stream_order_lines(
+            cnx,
+            date_from,
+            date_to,
+            current_app.config.get("ORDER_EXPORT_BATCH_SIZE", 10000),
+        )
+    )
+
+    try:
+        # Run the query before the response starts,
+        # so that a database error can still be reported
+        first_batch: List[Tuple[Any, ...]] = next(batches, [])
+    except Error as e:
+        print(f"Error exporting orders: {e}")
+        return make_response(json_response({"error": "Failed to export orders"}), 500)
+
+    lines: Any = itertools.chain([first_batch], batches)
+    body: Any = (
+        exports.parquet_stream(exports.order_lines_schema(), lines)
+        if export_format == "parquet"
+        else exports.csv_stream(service_orders.ORDER_EXPORT_COLUMNS, lines)
+    )
+
+    # Keep the request context (and its database connection)
+    # alive until the whole stream is sent
+    response: Response = Response(
+        stream_with_context(body), 200, mimetype=exports.MIMETYPES[export_format]
+    )
+    response.headers["Content-Disposition"] = (
+        f"attachment; filename=orders.{export_format}"
+    )
+
+    # The `Access-Control-Allow-Origin` header is part of the CORS mechanism.
+    # It tells the browser which origins are allowed to access
+    # the resources on the server.
+    # `*` means that all the origins can access the endpoint.
+    response.headers.add("Access-Control-Allow-Origin", "*")
+
+    return response
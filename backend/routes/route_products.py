@@ -2,11 +2,44 @@
 Product routes/endpoints for the Grocery Management System API.
 """
 
-from typing import Dict, List, Literal, Optional, Tuple, Union
+import base64
+import csv
+import itertools
+import json
+import math
+import time
+import zlib
+from datetime import datetime, timezone
+from typing import (
+    Any,
+    Container,
+    Dict,
+    Generator,
+    Iterator,
+    List,
+    Literal,
+    Optional,
+    Tuple,
+    Union,
+)
 
-from flask import Blueprint, Response, current_app, jsonify, make_response, request
-from mysql.connector import MySQLConnection
-from services import service_products
+from database.sql_connection import (
+    ConnectionPool,
+    get_pool,
+    get_sql_connection,
+    served_by_replica,
+)
+from flask import (
+    Blueprint,
+    Response,
+    current_app,
+    make_response,
+    request,
+    stream_with_context,
+)
+from mysql.connector import Error, IntegrityError, MySQLConnection
+from services import compression, service_products, service_uom
+from services.serialization import dumps, json_response
 
 # Create a Blueprint for all the products
 all_products_bp: Blueprint = Blueprint("all_products_bp", __name__)
@@ -17,12 +50,261 @@ single_product_bp: Blueprint = Blueprint("single_product_bp", __name__)
 # Create a Blueprint for a product insertion
 insert_product_bp: Blueprint = Blueprint("insert_product_bp", __name__)
 
+# Create a Blueprint for a bulk product import
+bulk_insert_products_bp: Blueprint = Blueprint("bulk_insert_products_bp", __name__)
+
 # Create a Blueprint for a product update
 update_product_bp: Blueprint = Blueprint("update_product_bp", __name__)
 
 # Create a Blueprint for a product deletion
 delete_product_bp: Blueprint = Blueprint("delete_product_bp", __name__)
 
+# Create a Blueprint for a set-based update of the products
+bulk_update_products_bp: Blueprint = Blueprint("bulk_update_products_bp", __name__)
+
+# Create a Blueprint for a deletion of a list of products
+bulk_delete_products_bp: Blueprint = Blueprint("bulk_delete_products_bp", __name__)
+
+# Create a Blueprint for the product cache statistics
+product_cache_bp: Blueprint = Blueprint("product_cache_bp", __name__)
+
+# Create a Blueprint for the product search
+search_products_bp: Blueprint = Blueprint("search_products_bp", __name__)
+
+# Create a Blueprint for the streaming export of the products
+export_products_bp: Blueprint = Blueprint("export_products_bp", __name__)
+
+# Query string parameters that select a page of products
+# instead of the full (cached) list
+PAGE_ARGS: Tuple[str, ...] = (
+    "limit",
+    "after",
+    "uom_id",
+    "min_price",
+    "max_price",
+    "fields",
+)
+
+# Maximum number of products returned in a single page
+MAX_PAGE_SIZE: int = 1000
+
+# Maximum number of products returned by a search
+MAX_SEARCH_LIMIT: int = 100
+
+# Maximum number of products inserted per transaction by a bulk import
+MAX_BULK_BATCH_SIZE: int = 10000
+
+# Maximum number of IDs in a batch read, update or deletion
+MAX_IDS: int = 1000
+
+
+def encode_cursor(product_id: int) -> str:
+    """
+    Encode the ID of the last product of a page as an opaque cursor token.
+
+    Input:  product_id (int)    | the ID of the last product of the page
+    Output: the cursor token
+    """
+    return base64.urlsafe_b64encode(str(product_id).encode()).decode()
+
+
+def decode_cursor(token: str) -> int:
+    """
+    Decode a cursor token produced by `encode_cursor()`.
+
+    Input:  token (str)     | the cursor token
+    Output: the ID of the product to resume after
+    Raises: ValueError if the token is invalid
+    """
+    try:
+        return int(base64.urlsafe_b64decode(token.encode()).decode())
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def sync_catalog() -> None:
+    """
+    Pick up the product writes of the other processes serving the app,
+    at most once per `CATALOG_SYNC_INTERVAL` seconds, before the product
+    cache, the search index or the catalog version are read.
+    """
+    if not service_products.shared_catalog_version.due(
+        current_app.config["CATALOG_SYNC_INTERVAL"]
+    ):
+        return
+
+    # Read the shared version from the primary, with a connection of its own
+    # so that the reads of the request may still be served by a replica
+    try:
+        pool: ConnectionPool = get_pool()
+        cnx: MySQLConnection = pool.acquire()
+        try:
+            service_products.sync_catalog(cnx)
+        finally:
+            pool.release(cnx)
+    except Error as e:
+        print(f"Error syncing catalog: {e}")
+
+
+def catalog_etag(*parts: Union[int, str]) -> Tuple[str, float]:
+    """
+    Build the entity tag of a product read from the current catalog version.
+
+    Input:  parts (int | str)   | extra parts identifying the resource
+    Output: a tuple (entity tag, time of the last catalog write)
+    """
+    sync_catalog()
+    version, modified_at = service_products.catalog_version.snapshot()
+
+    return "-".join([version, *map(str, parts)]), modified_at
+
+
+def last_modified(modified_at: float) -> Optional[int]:
+    """
+    Return the `Last-Modified` date of the catalog, in whole seconds,
+    once the second of its last write is over. Until then a later write
+    could get the same date, and a client revalidating with
+    `If-Modified-Since` would keep its stale copy: only the `ETag` is used.
+
+    Input:  modified_at (float)     | the time of the last catalog write
+    Output: the date in seconds since the epoch, or None
+    """
+    second: int = int(modified_at)
+
+    return second if time.time() >= second + 1 else None
+
+
+def set_validators(response: Response, etag: str, modified_at: float) -> None:
+    """
+    Add the `ETag` and `Last-Modified` headers to a response, and ask the
+    clients to revalidate their copy on every use.
+    A response read from a replica is not tagged: the replica may lag behind
+    the catalog version, and a stale copy would then be revalidated.
+
+    Input:  response (Response)     | the Flask response object
+    Input:  etag (str)              | the entity tag of the resource
+    Input:  modified_at (float)     | the time of the last catalog write
+    """
+    response.headers["Cache-Control"] = "no-cache"
+    if served_by_replica():
+        return
+
+    response.set_etag(etag)
+    date: Optional[int] = last_modified(modified_at)
+    if date is not None:
+        response.last_modified = datetime.fromtimestamp(date, timezone.utc)
+
+
+def not_modified(etag: str, modified_at: float) -> Optional[Response]:
+    """
+    Check the conditional headers of the current request against
+    the entity tag and the modification time of a resource.
+
+    Input:  etag (str)              | the entity tag of the resource
+    Input:  modified_at (float)     | the time of the last catalog write
+    Output: a `304 Not Modified` Flask Response object
+            if the client copy is still current, otherwise None
+    """
+    if request.if_none_match:
+        matched: bool = request.if_none_match.contains_weak(etag)
+    elif request.if_modified_since:
+        since: datetime = request.if_modified_since
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        date: Optional[int] = last_modified(modified_at)
+        matched = date is not None and date <= since.timestamp()
+    else:
+        return None
+
+    if not matched:
+        return None
+
+    response: Response = Response(status=304)
+    set_validators(response, etag, modified_at)
+
+    # The `Access-Control-Allow-Origin` header is part of the CORS mechanism.
+    # It tells the browser which origins are allowed to access
+    # the resources on the server.
+    # `*` means that all the origins can access the endpoint.
+    response.headers.add("Access-Control-Allow-Origin", "*")
+
+    return response
+
+
+def parse_page_args() -> Dict[str, Any]:
+    """
+    Parse the pagination, filter and projection parameters
+    from the query string of the current request.
+
+    Output: a dictionary of keyword arguments for `get_products_page()`
+    Raises: ValueError if a parameter is invalid
+    """
+    args: Dict[str, Any] = {}
+
+    if "limit" in request.args:
+        limit: int = request.args.get("limit", type=int, default=0)
+        if not 1 <= limit <= MAX_PAGE_SIZE:
+            raise ValueError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+        args["limit"] = limit
+    if "after" in request.args:
+        args["after"] = decode_cursor(request.args["after"])
+    if "uom_id" in request.args:
+        args["uom_id"] = int(request.args["uom_id"])
+    if "min_price" in request.args:
+        args["min_price"] = float(request.args["min_price"])
+    if "max_price" in request.args:
+        args["max_price"] = float(request.args["max_price"])
+    if "fields" in request.args:
+        fields: List[str] = [f for f in request.args["fields"].split(",") if f]
+        unknown: List[str] = [
+            f for f in fields if f not in service_products.PRODUCT_FIELDS
+        ]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+        args["fields"] = fields
+
+    return args
+
+
+def parse_ids(value: Any) -> List[int]:
+    """
+    Parse a list of product IDs, from a comma-separated string or a JSON list.
+
+    Input:  value (Any)     | the IDs to parse
+    Output: the list of IDs
+    Raises: ValueError if the list is empty, too long or holds an invalid ID
+    """
+    ids: List[Any] = (
+        [i for i in value.split(",") if i] if isinstance(value, str) else value
+    )
+    if not isinstance(ids, list) or not ids:
+        raise ValueError("ids must be a non-empty list of product IDs")
+    if len(ids) > MAX_IDS:
+        raise ValueError(f"At most {MAX_IDS} ids are allowed")
+    if any(isinstance(i, (bool, float)) for i in ids):
+        raise ValueError("ids must be integers")
+
+    return [int(i) for i in ids]
+
+
+def parse_price(value: Any, field: str) -> float:
+    """
+    Parse a price, or a factor applied to prices, from a request body.
+
+    Input:  value (Any)     | the value to parse
+    Input:  field (str)     | the name of the value, reported in errors
+    Output: the value as a float
+    Raises: ValueError if the value is not a finite, non-negative number
+    """
+    try:
+        price: float = float(value)
+    except (TypeError, ValueError, OverflowError):
+        raise ValueError(f"{field} must be a number") from None
+    if not math.isfinite(price) or price < 0:
+        raise ValueError(f"{field} must be a finite, non-negative number")
+
+    return price
+
 
 @all_products_bp.route("/products", methods=["GET"])
 def get_all_products() -> Union[Response, Tuple[Response, Literal[404]]]:
@@ -30,26 +312,104 @@ def get_all_products() -> Union[Response, Tuple[Response, Literal[404]]]:
     GET /products
     READ all the products from the API.
 
+    Optional query string parameters:
+        limit       | the maximum number of products to return
+        after       | the cursor token returned with the previous page
+        uom_id      | only return products with this unit of measure
+        min_price   | only return products at or above this price
+        max_price   | only return products at or below this price
+        fields      | a comma-separated list of the fields to return
+        ids         | a comma-separated list of the IDs of the products
+                      to return, read with a single query
+
+    When there are more products, the cursor of the next page is sent
+    in the `X-Next-Cursor` header.
+
+    With `format=ndjson`, the products are streamed as newline-delimited
+    JSON, see GET /products/export.
+
+    The response carries an `ETag` derived from the catalog version:
+    a request with a matching `If-None-Match` gets a `304 Not Modified`
+    without touching the database.
+
+    The full list is compressed once per catalog version for each
+    encoding, other responses are compressed after the request.
+
     Output: a Flask Response object
             including HTTP status code, JSON data, and CORS headers
     """
-    # Get the database connection from the app config
-    cnx: MySQLConnection = current_app.config["cnx"]
+    if request.args.get("format") == "ndjson":
+        return export_products()
 
-    # Get the list of all the products from the database
-    products: Optional[List[Dict[str, Union[int, str, float]]]] = (
-        service_products.get_all_products(cnx)
+    # Tag the response with the catalog version read before the products,
+    # the query string is part of the tag since it selects the products
+    etag, modified_at = (
+        catalog_etag("list", zlib.crc32(request.query_string))
+        if request.query_string
+        else catalog_etag("list")
     )
+    if (cached_response := not_modified(etag, modified_at)) is not None:
+        return cached_response
+
+    # Get the database connection checked out for this request
+    cnx: MySQLConnection = get_sql_connection()
+
+    # Declare variables to hold the products as encoded JSON,
+    # possibly compressed, and the cursor of the next page
+    body: Optional[bytes]
+    compressed: Optional[bytes] = None
+    encoding: Optional[str] = None
+    next_after: Optional[int] = None
+
+    if "ids" in request.args:
+        try:
+            product_ids: List[int] = parse_ids(request.args["ids"])
+        except ValueError as e:
+            return make_response(json_response({"error": str(e)}), 400)
+
+        # Get the requested products from the database
+        products: Optional[List[Dict[str, Union[int, str, float]]]] = (
+            service_products.get_products_by_ids(cnx, product_ids)
+        )
+        body = dumps(products) if products else None
+    elif any(arg in request.args for arg in PAGE_ARGS):
+        try:
+            page_args: Dict[str, Any] = parse_page_args()
+        except ValueError as e:
+            return make_response(json_response({"error": str(e)}), 400)
+
+        # Get the requested page of products from the database
+        page: Optional[
+            Tuple[List[Dict[str, Union[int, str, float]]], Optional[int]]
+        ] = service_products.get_products_page(cnx, **page_args)
+        products, next_after = page if page is not None else (None, None)
+        body = dumps(products) if products else None
+    else:
+        # Get the list of all the products, encoded once per catalog version
+        body = service_products.get_all_products_json(cnx)
+
+        # Compress it once per catalog version for each encoding
+        if body is not None and len(body) >= compression.min_size():
+            encoding = compression.negotiate()
+        if encoding is not None:
+            compressed = service_products.get_all_products_compressed(cnx, encoding)
 
     # Declare a variable to hold the Flask response object
     response: Union[Response, Tuple[Response, Literal[404]]]
 
-    if products:
+    if body is not None and body != service_products.EMPTY_LIST_JSON:
         # Create a Flask response object
-        response = make_response(jsonify(products), 200)
+        response = make_response(json_response(compressed or body, encoded=True), 200)
+        set_validators(response, etag, modified_at)
+        if compressed is not None and encoding is not None:
+            compression.set_content_encoding(response, encoding)
+
+        if next_after is not None:
+            response.headers["X-Next-Cursor"] = encode_cursor(next_after)
+            response.headers.add("Access-Control-Expose-Headers", "X-Next-Cursor")
     else:
         # Create a response with a 404 error if the products are not found
-        response = make_response(jsonify({"error": "Products not found"}), 404)
+        response = make_response(json_response({"error": "Products not found"}), 404)
 
     # The `Access-Control-Allow-Origin header` is part of the CORS mechanism.
     # It tells the browser which origins are allowed to access
@@ -60,6 +420,117 @@ def get_all_products() -> Union[Response, Tuple[Response, Literal[404]]]:
     return response
 
 
+@export_products_bp.route("/products/export", methods=["GET"])
+def export_products() -> Union[Response, Tuple[Response, Literal[500]]]:
+    """
+    GET /products/export
+    READ all the products as a stream of newline-delimited JSON (NDJSON).
+
+    The products are read from the database in batches and each batch
+    is sent as soon as it is encoded, so memory stays flat and the first
+    bytes go out whatever the size of the catalog.
+
+    Output: a streamed Flask Response object
+            including HTTP status code, NDJSON data, and CORS headers
+    """
+    # Get the database connection checked out for this request
+    cnx: MySQLConnection = get_sql_connection()
+
+    batches: Generator[List[Dict[str, Union[int, str, float]]], None, None] = (
+        service_products.stream_all_products(
+            cnx, current_app.config.get("EXPORT_BATCH_SIZE", 500)
+        )
+    )
+
+    try:
+        # Run the query before the response starts,
+        # so that a database error can still be reported
+        first_batch: List[Dict[str, Union[int, str, float]]] = next(batches, [])
+    except Error as e:
+        print(f"Error exporting products: {e}")
+        return make_response(json_response({"error": "Failed to export products"}), 500)
+
+    def generate() -> Generator[bytes, None, None]:
+        """
+        Encode each batch of products as NDJSON lines.
+        """
+        for batch in itertools.chain([first_batch], batches):
+            yield b"".join(dumps(product) + b"\n" for product in batch)
+
+    # Keep the request context (and its database connection)
+    # alive until the whole stream is sent
+    response: Response = Response(
+        stream_with_context(generate()), 200, mimetype="application/x-ndjson"
+    )
+
+    # The `Access-Control-Allow-Origin` header is part of the CORS mechanism.
+    # It tells the browser which origins are allowed to access
+    # the resources on the server.
+    # `*` means that all the origins can access the endpoint.
+    response.headers.add("Access-Control-Allow-Origin", "*")
+
+    return response
+
+
+@search_products_bp.route("/products/search", methods=["GET"])
+def search_products() -> Union[Response, Tuple[Response, Literal[400, 500]]]:
+    """
+    GET /products/search?q={query}&limit={limit}
+    SEARCH the products by name
+
+    The products are looked up in an in-memory prefix and trigram index,
+    best match first: exact names, names starting with the query, names
+    with a word starting with it, names containing it, then close names.
+
+    Output: a Flask Response object
+            including HTTP status code, JSON data, and CORS headers
+    """
+    query: str = request.args.get("q", "")
+    if not query.strip():
+        return make_response(
+            json_response({"error": "Missing required parameter: q"}), 400
+        )
+
+    limit: Optional[int] = request.args.get("limit", type=int, default=10)
+    if limit is None or not 1 <= limit <= MAX_SEARCH_LIMIT:
+        return make_response(
+            json_response({"error": f"limit must be between 1 and {MAX_SEARCH_LIMIT}"}),
+            400,
+        )
+
+    # Drop the index if another process wrote products
+    sync_catalog()
+
+    # Get the database connection checked out for this request,
+    # it is only queried when the search index needs to be built
+    cnx: MySQLConnection = get_sql_connection()
+
+    # Search the products matching the query
+    products: Optional[List[Dict[str, Union[int, str, float]]]] = (
+        service_products.search_products(cnx, query, limit)
+    )
+
+    # Declare a variable to hold the Flask response object
+    response: Union[Response, Tuple[Response, Literal[500]]]
+
+    if products is not None:
+        # Create a Flask response object, an empty list if nothing matched
+        response = make_response(json_response(products), 200)
+    else:
+        # Create a response with a 500 error if the search failed
+        response = make_response(
+            json_response({"error": "Failed to search products"}), 500
+        )
+
+    # The `Access-Control-Allow-Origin` header is part of the CORS mechanism.
+    # It tells the browser which origins are allowed to access
+    # the resources on the server.
+    # `*` means that all the origins can access the endpoint.
+    response.headers.add("Access-Control-Allow-Origin", "*")
+
+    return response
+
+
 @single_product_bp.route("/products/<int:product_id>", methods=["GET"])
 def get_single_product(
     product_id: int,
@@ -68,27 +539,34 @@ def get_single_product(
     GET /products/{product_id}
     READ a single product by its ID
 
+    The response carries an `ETag` derived from the catalog version,
+    see GET /products.
+
     Input: product_id (int) | the ID of the product to fetch
     Output: a Flask Response object
             including HTTP status code, JSON data, and CORS headers
     """
-    # Get the database connection from the app config
-    cnx: MySQLConnection = current_app.config["cnx"]
+    # Tag the response with the catalog version read before the product
+    etag, modified_at = catalog_etag("product", product_id)
+    if (cached_response := not_modified(etag, modified_at)) is not None:
+        return cached_response
 
-    # Fetch the product details from the database
-    product: Optional[Dict[str, Union[int, str, float]]] = (
-        service_products.get_single_product(cnx, product_id)
-    )
+    # Get the database connection checked out for this request
+    cnx: MySQLConnection = get_sql_connection()
+
+    # Fetch the product details from the database, encoded as JSON
+    product: Optional[bytes] = service_products.get_single_product_json(cnx, product_id)
 
     # Declare a variable to hold the Flask response object
     response: Union[Response, Tuple[Response, Literal[404]]]
 
     if product:
         # Create a Flask response object
-        response = make_response(jsonify(product), 200)
+        response = make_response(json_response(product, encoded=True), 200)
+        set_validators(response, etag, modified_at)
     else:
         # Create a response with a 404 error if the product is not found
-        response = make_response(jsonify({"error": "Product not found"}), 404)
+        response = make_response(json_response({"error": "Product not found"}), 404)
 
     # The `Access-Control-Allow-Origin` header is part of the CORS mechanism.
     # It tells the browser which origins are allowed to access
@@ -109,8 +587,8 @@ def insert_product() -> Union[Response, Tuple[Response, Literal[400]]]:
     Output: a Flask Response object
             including HTTP status code, JSON data, and CORS headers
     """
-    # Get the database connection from the app config
-    cnx: MySQLConnection = current_app.config["cnx"]
+    # Get the database connection checked out for this request
+    cnx: MySQLConnection = get_sql_connection()
 
     # Parse the JSON data from the request body
     product_data: Dict[str, Union[int, str, float]] = request.get_json()
@@ -123,16 +601,227 @@ def insert_product() -> Union[Response, Tuple[Response, Literal[400]]]:
     for field in required_fields:
         if field not in product_data:
             return make_response(
-                jsonify({"error": f"Missing required field: {field}"}), 400
+                json_response({"error": f"Missing required field: {field}"}), 400
             )
     if product_id := service_products.insert_new_product(cnx, product_data):
         # Create a success response with the newly created product ID
         response = make_response(
-            jsonify({"message": "Product created", "product_id": product_id}), 201
+            json_response({"message": "Product created", "product_id": product_id}), 201
         )
     else:
         # Create a response with a 400 error if the insertion failed
-        response = make_response(jsonify({"error": "Failed to insert product"}), 400)
+        response = make_response(
+            json_response({"error": "Failed to insert product"}), 400
+        )
+
+    # The `Access-Control-Allow-Origin` header is part of the CORS mechanism.
+    # It tells the browser which origins are allowed to access
+    # the resources on the server.
+    # `*` means that all the origins can access the endpoint.
+    response.headers.add("Access-Control-Allow-Origin", "*")
+
+    return response
+
+
+def validate_product(row: Any) -> Dict[str, Union[int, str, float]]:
+    """
+    Validate and normalize a product read from a bulk import.
+    Values read from CSV are strings, so they are converted here.
+
+    Input:  row (Any)   | the decoded row
+    Output: a dictionary representing the product to insert
+    Raises: ValueError if the row is not a valid product
+    """
+    if not isinstance(row, dict):
+        raise ValueError("Expected a JSON object")
+
+    for field in ("name", "uom_id", "price_per_unit"):
+        if row.get(field) in (None, ""):
+            raise ValueError(f"Missing required field: {field}")
+
+    name: str = str(row["name"]).strip()
+    if not name:
+        raise ValueError("Missing required field: name")
+
+    try:
+        uom_id: int = int(row["uom_id"])
+    except (TypeError, ValueError):
+        raise ValueError("Invalid uom_id") from None
+
+    try:
+        price_per_unit: float = float(row["price_per_unit"])
+    except (TypeError, ValueError, OverflowError):
+        raise ValueError("Invalid price_per_unit") from None
+    if not math.isfinite(price_per_unit) or price_per_unit < 0:
+        raise ValueError("Invalid price_per_unit")
+
+    return {"name": name, "uom_id": uom_id, "price_per_unit": price_per_unit}
+
+
+def read_bulk_rows() -> Iterator[Any]:
+    """
+    Decode the rows of a bulk import from the body of the current request.
+
+    A JSON array is decoded as a whole, while NDJSON and CSV bodies are
+    read line by line from the request stream. A line that cannot be
+    decoded is yielded as a ValueError so that it is reported with its row.
+
+    Output: an iterator over the decoded rows
+    Raises: ValueError if the content type or the JSON body is not supported
+    """
+    if request.mimetype == "application/json":
+        rows: Any = request.get_json(silent=True)
+        if not isinstance(rows, list):
+            raise ValueError("Expected a JSON array of products")
+        yield from rows
+    elif request.mimetype in ("application/x-ndjson", "application/jsonlines"):
+        for line in request.stream:
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError as e:
+                yield ValueError(f"Invalid JSON: {e}")
+    elif request.mimetype == "text/csv":
+        yield from csv.DictReader(line.decode("utf-8") for line in request.stream)
+    else:
+        raise ValueError(f"Unsupported content type: {request.mimetype}")
+
+
+@bulk_insert_products_bp.route("/products/bulk", methods=["POST"])
+def insert_products_bulk() -> Union[Response, Tuple[Response, Literal[400, 500]]]:
+    """
+    POST /products/bulk
+    CREATE products in bulk
+
+    The request body is a JSON array (`application/json`), newline-delimited
+    JSON (`application/x-ndjson`) or CSV with a header line (`text/csv`).
+    Rows are validated as they are read, and valid rows are inserted in
+    batches of `batch_size` (query string), each committed on its own.
+    A batch that fails is inserted again one row at a time, so that only
+    the rows failing on their own are rejected.
+
+    Input: the request body, the products to insert
+    Output: a Flask Response object
+            including HTTP status code, JSON data, and CORS headers
+            The JSON data holds the IDs of the inserted products and
+            the errors of the rejected rows (numbered from 1)
+    """
+    # Get the database connection checked out for this request
+    cnx: MySQLConnection = get_sql_connection()
+
+    batch_size: int = request.args.get(
+        "batch_size", type=int, default=current_app.config.get("BULK_BATCH_SIZE", 1000)
+    )
+    if not 1 <= batch_size <= MAX_BULK_BATCH_SIZE:
+        return make_response(
+            json_response(
+                {"error": f"batch_size must be between 1 and {MAX_BULK_BATCH_SIZE}"}
+            ),
+            400,
+        )
+
+    product_ids: List[int] = []
+    errors: List[Dict[str, Union[int, str]]] = []
+
+    # Products waiting to be inserted, each with its row number
+    batch: List[Tuple[int, Dict[str, Union[int, str, float]]]] = []
+
+    def insert(products: List[Tuple[int, Dict[str, Union[int, str, float]]]]) -> bool:
+        """
+        Insert products in one transaction, reporting their rows if it fails.
+        """
+        try:
+            product_ids.extend(
+                service_products.insert_products_batch(cnx, [p for _, p in products])
+            )
+        except Error as e:
+            print(f"Error inserting products: {e}")
+            if len(products) == 1:
+                errors.append(
+                    {"row": products[0][0], "error": "Failed to insert product"}
+                )
+            return False
+        return True
+
+    def flush() -> None:
+        """
+        Insert the pending batch of products in one transaction,
+        or one product at a time if the batch fails.
+        """
+        if not insert(batch) and len(batch) > 1:
+            for product in batch:
+                insert([product])
+        batch.clear()
+
+    # The units of measure are reloaded once if a row refers to an unknown one,
+    # in case it was inserted by another process since the last load
+    try:
+        uom_ids: Container[int] = service_uom.uom_dictionary.get_names(cnx)
+    except Error as e:
+        print(f"Error fetching units of measure: {e}")
+        return make_response(
+            json_response({"error": "Failed to fetch units of measure"}), 500
+        )
+    uoms_reloaded: bool = False
+
+    try:
+        for row_number, row in enumerate(read_bulk_rows(), start=1):
+            try:
+                if isinstance(row, ValueError):
+                    raise row
+                product: Dict[str, Union[int, str, float]] = validate_product(row)
+                if product["uom_id"] not in uom_ids and not uoms_reloaded:
+                    uom_ids = service_uom.uom_dictionary.refresh(cnx)
+                    uoms_reloaded = True
+                if product["uom_id"] not in uom_ids:
+                    raise ValueError("Unknown uom_id")
+                batch.append((row_number, product))
+            except ValueError as e:
+                errors.append({"row": row_number, "error": str(e)})
+                continue
+
+            if len(batch) >= batch_size:
+                flush()
+    except (ValueError, csv.Error) as e:
+        # The body could not be read any further,
+        # report the products already inserted along with the error
+        return make_response(
+            json_response(
+                {"error": str(e), "product_ids": product_ids, "errors": errors}
+            ),
+            400,
+        )
+    except Error as e:
+        # The units of measure could not be reloaded,
+        # report the products already inserted along with the error
+        print(f"Error fetching units of measure: {e}")
+        return make_response(
+            json_response(
+                {
+                    "error": "Failed to fetch units of measure",
+                    "product_ids": product_ids,
+                    "errors": errors,
+                }
+            ),
+            500,
+        )
+
+    if batch:
+        flush()
+
+    # Declare a variable to hold the Flask response object
+    response: Union[Response, Tuple[Response, Literal[400]]] = make_response(
+        json_response(
+            {
+                "message": "Products imported",
+                "inserted": len(product_ids),
+                "product_ids": product_ids,
+                "errors": errors,
+            }
+        ),
+        201 if product_ids or not errors else 400,
+    )
 
     # The `Access-Control-Allow-Origin` header is part of the CORS mechanism.
     # It tells the browser which origins are allowed to access
@@ -153,8 +842,8 @@ def update_product(product_id: int) -> Union[Response, Tuple[Response, Literal[4
     Output: a Flask Response object
             including HTTP status code, JSON data, and CORS headers
     """
-    # Get the database connection from the app config
-    cnx: MySQLConnection = current_app.config["cnx"]
+    # Get the database connection checked out for this request
+    cnx: MySQLConnection = get_sql_connection()
 
     # Parse the JSON data from the request body
     updated_product: Dict[str, Union[int, str, float]] = request.get_json()
@@ -167,7 +856,7 @@ def update_product(product_id: int) -> Union[Response, Tuple[Response, Literal[4
     for field in required_fields:
         if field not in updated_product:
             return make_response(
-                jsonify({"error": f"Missing required field: {field}"}), 400
+                json_response({"error": f"Missing required field: {field}"}), 400
             )
 
     # Update the product in the database
@@ -177,12 +866,12 @@ def update_product(product_id: int) -> Union[Response, Tuple[Response, Literal[4
 
     if rows_affected > 0:
         # Create a success response with the number of rows affected
-        response = jsonify(
+        response = json_response(
             {"message": "Product updated successfully", "product": updated_product}
         )
     else:
         return make_response(
-            jsonify({"error": "Failed to update product or product not found"}),
+            json_response({"error": "Failed to update product or product not found"}),
             400,
         )
     # The `Access-Control-Allow-Origin` header is part of the CORS mechanism.
@@ -204,18 +893,183 @@ def delete_product(product_id: int) -> Union[Response, Tuple[Response, Literal[4
     Output: a Flask Response object
             including HTTP status code, JSON data, and CORS headers
     """
-    # Get the database connection from the app config
-    cnx: MySQLConnection = current_app.config["cnx"]
+    # Get the database connection checked out for this request
+    cnx: MySQLConnection = get_sql_connection()
 
     # Delete the product from the database
     rows_affected: int = service_products.delete_product(cnx, product_id)
 
     if rows_affected > 0:
         # Create a success response indicating the product was deleted
-        response = make_response(jsonify({"message": "Product deleted successfully"}))
+        response = make_response(
+            json_response({"message": "Product deleted successfully"})
+        )
     else:
         # Create a response with a 404 error if the product was not found
-        response = make_response(jsonify({"error": "Product not found"}), 404)
+        response = make_response(json_response({"error": "Product not found"}), 404)
+
+    # The `Access-Control-Allow-Origin` header is part of the CORS mechanism.
+    # It tells the browser which origins are allowed to access
+    # the resources on the server.
+    # `*` means that all the origins can access the endpoint.
+    response.headers.add("Access-Control-Allow-Origin", "*")
+
+    return response
+
+
+@bulk_update_products_bp.route("/products", methods=["PATCH"])
+def update_products_bulk() -> Union[Response, Tuple[Response, Literal[400]]]:
+    """
+    PATCH /products
+    UPDATE products in bulk, with one statement per batch in one transaction
+
+    The request body is either a map of the new prices by product ID:
+        {"prices": {"1": 2.5, "2": 3.75}}
+    or a set-based update of the products matching the filters
+    (`ids`, `uom_id`, `min_price`, `max_price`; every product without any):
+        {"where": {"uom_id": 1}, "multiply": {"price_per_unit": 1.05}}
+        {"where": {"ids": [1, 2]}, "set": {"uom_id": 2}}
+
+    Input: the request body, the update to apply
+    Output: a Flask Response object
+            including HTTP status code, JSON data, and CORS headers
+            The JSON data holds the number of products updated
+    """
+    # Get the database connection checked out for this request
+    cnx: MySQLConnection = get_sql_connection()
+
+    # Parse the JSON data from the request body
+    data: Any = request.get_json(silent=True)
+    batch_size: int = current_app.config.get("BULK_BATCH_SIZE", 1000)
+
+    try:
+        if not isinstance(data, dict):
+            raise ValueError("The body must be a JSON object")
+
+        if "prices" in data:
+            prices: Any = data["prices"]
+            if not isinstance(prices, dict) or not prices:
+                raise ValueError("prices must be a non-empty map of IDs to prices")
+            product_ids: List[int] = parse_ids(list(prices))
+            new_prices: List[float] = [
+                parse_price(p, "price_per_unit") for p in prices.values()
+            ]
+
+            rows_affected: int = service_products.update_product_prices(
+                cnx, dict(zip(product_ids, new_prices)), batch_size
+            )
+        else:
+            where: Any = data.get("where", {})
+            assignments: Any = data.get("set", {})
+            multipliers: Any = data.get("multiply", {})
+            if not all(isinstance(d, dict) for d in (where, assignments, multipliers)):
+                raise ValueError("where, set and multiply must be JSON objects")
+            unknown: List[str] = [
+                f for f in where if f not in ("ids", "uom_id", "min_price", "max_price")
+            ]
+            if unknown:
+                raise ValueError(f"Unknown filters: {', '.join(unknown)}")
+
+            rows_affected = service_products.update_products_where(
+                cnx,
+                {
+                    f: int(v) if f == "uom_id" else parse_price(v, f)
+                    for f, v in assignments.items()
+                },
+                {f: parse_price(v, f) for f, v in multipliers.items()},
+                product_ids=parse_ids(where["ids"]) if "ids" in where else None,
+                uom_id=int(where["uom_id"]) if "uom_id" in where else None,
+                min_price=(float(where["min_price"]) if "min_price" in where else None),
+                max_price=(float(where["max_price"]) if "max_price" in where else None),
+                batch_size=batch_size,
+            )
+    except (ValueError, TypeError, OverflowError) as e:
+        return make_response(json_response({"error": str(e)}), 400)
+    except Error as e:
+        print(f"Error updating products: {e}")
+        return make_response(json_response({"error": "Failed to update products"}), 400)
+
+    # Create a success response with the number of rows affected
+    response: Response = json_response(
+        {"message": "Products updated successfully", "updated": rows_affected}
+    )
+
+    # The `Access-Control-Allow-Origin` header is part of the CORS mechanism.
+    # It tells the browser which origins are allowed to access
+    # the resources on the server.
+    # `*` means that all the origins can access the endpoint.
+    response.headers.add("Access-Control-Allow-Origin", "*")
+
+    return response
+
+
+@bulk_delete_products_bp.route("/products", methods=["DELETE"])
+def delete_products_bulk() -> Union[Response, Tuple[Response, Literal[400, 409]]]:
+    """
+    DELETE /products
+    DELETE a list of products, with one statement per batch in one transaction
+
+    The request body holds the IDs of the products: {"ids": [1, 2, 3]}
+    Either every product is deleted, or none is (e.g. when one of them
+    is part of an order).
+
+    Input: the request body, the IDs of the products to delete
+    Output: a Flask Response object
+            including HTTP status code, JSON data, and CORS headers
+            The JSON data holds the number of products deleted
+    """
+    # Get the database connection checked out for this request
+    cnx: MySQLConnection = get_sql_connection()
+
+    # Parse the JSON data from the request body
+    data: Any = request.get_json(silent=True)
+
+    try:
+        if not isinstance(data, dict) or "ids" not in data:
+            raise ValueError("Missing required field: ids")
+        product_ids: List[int] = parse_ids(data["ids"])
+    except (ValueError, TypeError) as e:
+        return make_response(json_response({"error": str(e)}), 400)
+
+    try:
+        rows_affected: int = service_products.delete_products(
+            cnx, product_ids, current_app.config.get("BULK_BATCH_SIZE", 1000)
+        )
+    except IntegrityError as e:
+        print(f"Error deleting products: {e}")
+        return make_response(
+            json_response({"error": "Products are referenced by orders"}), 409
+        )
+    except Error as e:
+        print(f"Error deleting products: {e}")
+        return make_response(json_response({"error": "Failed to delete products"}), 400)
+
+    # Create a success response with the number of rows affected
+    response: Response = json_response(
+        {"message": "Products deleted successfully", "deleted": rows_affected}
+    )
+
+    # The `Access-Control-Allow-Origin` header is part of the CORS mechanism.
+    # It tells the browser which origins are allowed to access
+    # the resources on the server.
+    # `*` means that all the origins can access the endpoint.
+    response.headers.add("Access-Control-Allow-Origin", "*")
+
+    return response
+
+
+@product_cache_bp.route("/products/cache", methods=["GET"])
+def get_product_cache_stats() -> Response:
+    """
+    GET /products/cache
+    READ the statistics of the product cache
+
+    Output: a Flask Response object
+            including the hit, miss and eviction counters of the cache
+    """
+    response: Response = make_response(
+        json_response(service_products.product_cache.stats()), 200
+    )
 
     # The `Access-Control-Allow-Origin` header is part of the CORS mechanism.
     # It tells the browser which origins are allowed to access
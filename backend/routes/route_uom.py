@@ -0,0 +1,100 @@
+"""
+Unit of Measure (UOM) routes/endpoints for the Grocery Management System API.
+"""
+
+from typing import Any, Dict, List, Literal, Optional, Tuple, Union
+
+from database.sql_connection import get_sql_connection
+from flask import Blueprint, Response, make_response, request
+from mysql.connector import MySQLConnection
+from services import service_uom
+from services.serialization import json_response
+
+# Create a Blueprint for all the units of measure
+all_uom_bp: Blueprint = Blueprint("all_uom_bp", __name__)
+
+# Create a Blueprint for a unit of measure insertion
+insert_uom_bp: Blueprint = Blueprint("insert_uom_bp", __name__)
+
+
+@all_uom_bp.route("/uom", methods=["GET"])
+def get_all_uoms() -> Union[Response, Tuple[Response, Literal[404]]]:
+    """
+    GET /uom
+    READ all the units of measure from the API.
+    They are served from memory, the database is only read
+    when the in-memory map is missing or too old.
+
+    Output: a Flask Response object
+            including HTTP status code, JSON data, and CORS headers
+    """
+    # Get the database connection checked out for this request
+    cnx: MySQLConnection = get_sql_connection()
+
+    # Get the list of all the units of measure
+    uoms: Optional[List[Dict[str, Union[int, str]]]] = service_uom.get_all_uoms(cnx)
+
+    # Declare a variable to hold the Flask response object
+    response: Union[Response, Tuple[Response, Literal[404]]]
+
+    if uoms:
+        # Create a Flask response object
+        response = make_response(json_response(uoms), 200)
+    else:
+        # Create a response with a 404 error if the units of measure are not found
+        response = make_response(
+            json_response({"error": "Units of measure not found"}), 404
+        )
+
+    # The `Access-Control-Allow-Origin` header is part of the CORS mechanism.
+    # It tells the browser which origins are allowed to access
+    # the resources on the server.
+    # `*` means that all the origins can access the endpoint.
+    response.headers.add("Access-Control-Allow-Origin", "*")
+
+    return response
+
+
+@insert_uom_bp.route("/uom", methods=["POST"])
+def insert_uom() -> Union[Response, Tuple[Response, Literal[400]]]:
+    """
+    POST /uom
+    CREATE a new unit of measure
+
+    Input: the request body, a JSON object with the uom_name to insert
+    Output: a Flask Response object
+            including HTTP status code, JSON data, and CORS headers
+    """
+    # Parse the JSON data from the request body
+    uom_data: Any = request.get_json(silent=True)
+
+    # Validate the incoming data from the request body
+    if not isinstance(uom_data, dict) or not uom_data.get("uom_name"):
+        return make_response(
+            json_response({"error": "Missing required field: uom_name"}), 400
+        )
+
+    # Get the database connection checked out for this request
+    cnx: MySQLConnection = get_sql_connection()
+
+    # Declare a variable to hold the Flask response object
+    response: Union[Response, Tuple[Response, Literal[400]]]
+
+    if uom_id := service_uom.insert_new_uom(cnx, uom_data):
+        # Create a success response with the newly created UOM ID
+        response = make_response(
+            json_response({"message": "Unit of measure created", "uom_id": uom_id}), 201
+        )
+    else:
+        # Create a response with a 400 error if the insertion failed
+        response = make_response(
+            json_response({"error": "Failed to insert unit of measure"}), 400
+        )
+
+    # The `Access-Control-Allow-Origin` header is part of the CORS mechanism.
+    # It tells the browser which origins are allowed to access
+    # the resources on the server.
+    # `*` means that all the origins can access the endpoint.
+    response.headers.add("Access-Control-Allow-Origin", "*")
+
+    return response
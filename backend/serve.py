@@ -0,0 +1,162 @@
+"""
+Production entry point of the Grocery Management System API.
+
+The parent process binds the listening socket, creates the app and forks
+the workers. Each worker accepts connections on the shared socket with a
+pool of threads, and opens its own database connection pool on its first
+request: no connection is ever shared between processes. A worker that
+exits is replaced. SIGTERM or SIGINT stops the workers and the parent.
+
+Each worker also holds its own product cache, search index and catalog
+version, reset when it is forked. A product write only invalidates them in
+the worker that made it: the other workers pick it up from the catalog
+version shared in the database, read at most once per
+`CATALOG_SYNC_INTERVAL` seconds. Until then they may serve the previous
+copy of the products, and a client reading its own writes through another
+worker may too.
+
+Usage: python serve.py --workers 4 --port 5000
+
+The app can also be served by any pre-forking WSGI server, e.g.
+gunicorn --workers 4 "server:create_app()"
+"""
+
+import argparse
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+import traceback
+from typing import Any, Dict, List, Optional
+
+from flask import Flask
+from werkzeug.serving import make_server
+
+from server import create_app
+
+# Minimum time between two starts of a worker, so that
+# a worker failing on startup is not respawned in a tight loop
+RESPAWN_DELAY: float = 1.0
+
+
+def bind(host: str, port: int, backlog: int = 128) -> socket.socket:
+    """
+    Open the listening socket shared by the workers.
+
+    Input:  host (str)      | the address to listen on
+    Input:  port (int)      | the port to listen on
+    Input:  backlog (int)   | the number of pending connections queued by the kernel
+    Output: the listening socket
+    """
+    family: int = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock: socket.socket = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+
+    return sock
+
+
+def run_worker(app: Flask, sock: socket.socket) -> None:
+    """
+    Serve the app on the shared socket until SIGTERM or SIGINT.
+
+    Input:  app (Flask)             | the app to serve
+    Input:  sock (socket.socket)    | the listening socket
+    """
+    host, port = sock.getsockname()[:2]
+    server: Any = make_server(host, port, app, threaded=True, fd=sock.fileno())
+
+    def stop(signum: int, frame: Any) -> None:
+        # `shutdown()` waits for the serving loop, which runs in this thread
+        threading.Thread(target=server.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    server.serve_forever()
+
+
+def serve(app: Flask, host: str, port: int, workers: int) -> None:
+    """
+    Fork the workers and supervise them until SIGTERM or SIGINT.
+
+    Input:  app (Flask)     | the app to serve, without an open connection pool
+    Input:  host (str)      | the address to listen on
+    Input:  port (int)      | the port to listen on
+    Input:  workers (int)   | the number of worker processes
+    """
+    sock: socket.socket = bind(host, port)
+    children: Dict[int, float] = {}
+    stopping: bool = False
+
+    def spawn() -> None:
+        pid: int = os.fork()
+        if pid == 0:
+            code: int = 0
+            try:
+                run_worker(app, sock)
+            except BaseException:
+                traceback.print_exc()
+                code = 1
+            finally:
+                os._exit(code)
+        children[pid] = time.monotonic()
+
+    def stop(signum: int, frame: Any) -> None:
+        nonlocal stopping
+
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    print(f"Serving on http://{host}:{port} with {workers} worker(s)")
+    for _ in range(workers):
+        spawn()
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+
+        started_at: Optional[float] = children.pop(pid, None)
+        if stopping or started_at is None:
+            continue
+
+        print(f"Worker {pid} exited with status {status}, starting a new one")
+        time.sleep(max(0.0, started_at + RESPAWN_DELAY - time.monotonic()))
+        if not stopping:
+            spawn()
+
+    sock.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(
+        description="Serve the Grocery Management System API with pre-forked workers"
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args: argparse.Namespace = parser.parse_args(argv)
+
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+
+    serve(create_app(), args.host, args.port, args.workers)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
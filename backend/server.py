@@ -1,44 +1,233 @@
 """
 Main application performing the Flask Server.
 Definition of all the endpoints of the API.
+
+The app is built by `create_app()`. No database connection is opened
+until the app serves its first request, so the module can be imported,
+and the app created before the workers are forked, without a database.
 """
 
-from flask import Flask
-from mysql.connector import MySQLConnection
+import os
+from typing import Any, Dict, Literal, Optional, Tuple
+
+from flask import Flask, Response, make_response
+from mysql.connector.errors import PoolError
 
-from database.sql_connection import get_sql_connection
-from routes import route_products
+from database.sql_connection import (
+    DEFAULT_CONNECT_ARGS,
+    close_sql_connection,
+    get_sql_connection,
+    parse_endpoints,
+    stick_to_primary,
+)
+from routes import (
+    route_analytics,
+    route_debug,
+    route_health,
+    route_inventory,
+    route_metrics,
+    route_orders,
+    route_products,
+    route_uom,
+)
+from services import admission, compression, serialization, service_analytics
+from services.serialization import json_response
+from services.slow_queries import SlowQueryLog
 
-app = Flask(__name__)
 
-# Define a MySQL connection object as a global variable
-# to hold the connection with the MySQL database
-cnx: MySQLConnection = get_sql_connection()
+def pool_exhausted(error: PoolError) -> Tuple[Response, Literal[503]]:
+    """
+    Respond with a 503 error when no database connection
+    could be checked out from the pool in time.
+    """
+    return make_response(json_response({"error": "Database unavailable"}), 503)
 
-# Store the MySQL connection object in the app's config
-app.config["cnx"] = cnx
 
+def rebuild_rollups() -> None:
+    """
+    Rebuild the sales rollups from the whole order history.
 
-@app.route("/")
-def root():
+    Usage: FLASK_APP=server flask rebuild-rollups
     """
-    Root endpoint for the Grocery Management System API.
+    days: int = service_analytics.rebuild_rollups(get_sql_connection())
+    print(f"Sales rollups rebuilt: {days} day(s) with sales")
+
 
-    This endpoint returns a simple JSON message indicating that the
-    Grocery Management System API is running. It serves as a basic
-    health check or welcome message.
+def create_app(config: Optional[Dict[str, Any]] = None) -> Flask:
+    """
+    Create the Flask app of the API.
 
-    Output: a JSON object with a welcome message.
+    Input:  config (dict)   | settings overriding the defaults below
+    Output: the Flask app, whose connection pool is opened by its first request
     """
-    return {"message": "Welcome to the Grocery Store Management System API!"}
+    app: Flask = Flask(__name__)
+    app.config.update(config or {})
+
+    # Storage engine: "mysql", or "sqlite" for an in-process database,
+    # in memory unless a file path is given
+    app.config.setdefault("DB_ENGINE", os.environ.get("GS_DB_ENGINE", "mysql"))
+    app.config.setdefault(
+        "DB_SQLITE_PATH", os.environ.get("GS_DB_SQLITE_PATH", ":memory:")
+    )
+    app.config.setdefault("DB_SQLITE_SEED", os.environ.get("GS_DB_SQLITE_SEED") == "1")
+
+    # Size and timeouts of the MySQL connection pool
+    app.config.setdefault("DB_POOL_MIN_SIZE", 1)
+    app.config.setdefault("DB_POOL_MAX_SIZE", 10)
+    app.config.setdefault("DB_POOL_TIMEOUT", 5.0)
+    app.config.setdefault("DB_POOL_PING_INTERVAL", 30.0)
+
+    # Endpoints of the primary database and of its read replicas,
+    # as comma-separated host:port lists. GET requests read from the replicas,
+    # except for the clients that wrote within the sticky window (seconds).
+    # A replica that cannot be connected to is skipped for the retry interval.
+    if os.environ.get("GS_DB_PRIMARY"):
+        app.config.setdefault(
+            "DB_CONNECT_ARGS",
+            {**DEFAULT_CONNECT_ARGS, **parse_endpoints(os.environ["GS_DB_PRIMARY"])[0]},
+        )
+    app.config.setdefault(
+        "DB_REPLICAS", parse_endpoints(os.environ.get("GS_DB_REPLICAS", ""))
+    )
+    app.config.setdefault("DB_STICKY_WINDOW", 5.0)
+    app.config.setdefault("DB_REPLICA_RETRY_INTERVAL", 30.0)
+
+    # Maximum time (seconds) before a process picks up the product writes
+    # of the other processes, from the catalog version they share
+    app.config.setdefault("CATALOG_SYNC_INTERVAL", 1.0)
+
+    # Group commit of the product and order writes: the writes arriving
+    # within the delay (seconds) are committed in one transaction, up to
+    # the batch size. Requests get their result once the transaction is
+    # committed ("commit" durability) or once their write ran ("statement").
+    app.config.setdefault("GROUP_COMMIT", os.environ.get("GS_GROUP_COMMIT") == "1")
+    app.config.setdefault("GROUP_COMMIT_MAX_BATCH", 64)
+    app.config.setdefault("GROUP_COMMIT_MAX_DELAY", 0.002)
+    app.config.setdefault(
+        "GROUP_COMMIT_DURABILITY",
+        os.environ.get("GS_GROUP_COMMIT_DURABILITY", "commit"),
+    )
+
+    # Admission control: caps on the reads (GET, HEAD) and the writes in
+    # flight in each process, beyond which requests wait in a bounded queue
+    # for at most the timeout (seconds), then get a 503 with `Retry-After`.
+    # By default the caps share the connection pool, less the connection
+    # of the catalog sync, so that a burst of reads leaves the writes
+    # their connections (with a pool of at least 3 connections)
+    app.config.setdefault(
+        "ADMISSION_CONTROL", os.environ.get("GS_ADMISSION_CONTROL") == "1"
+    )
+    app.config.setdefault(
+        "ADMISSION_MAX_WRITES", max(app.config["DB_POOL_MAX_SIZE"] // 4, 1)
+    )
+    app.config.setdefault(
+        "ADMISSION_MAX_READS",
+        max(app.config["DB_POOL_MAX_SIZE"] - app.config["ADMISSION_MAX_WRITES"] - 1, 1),
+    )
+    app.config.setdefault("ADMISSION_MAX_QUEUE", 32)
+    app.config.setdefault("ADMISSION_TIMEOUT", 1.0)
+    app.config.setdefault("ADMISSION_RETRY_AFTER", 1)
+
+    # Maximum time the readiness probe waits for a database connection
+    app.config.setdefault("READINESS_TIMEOUT", 1.0)
+
+    # Number of rows fetched per round trip by the streaming exports
+    app.config.setdefault("EXPORT_BATCH_SIZE", 500)
+
+    # Number of order lines per batch, and per Parquet row group,
+    # of the order history export
+    app.config.setdefault("ORDER_EXPORT_BATCH_SIZE", 10000)
+
+    # Number of rows inserted per transaction by the bulk imports
+    app.config.setdefault("BULK_BATCH_SIZE", 1000)
+
+    # Encoder of the JSON responses, "orjson" (default when installed) or "json"
+    app.config.setdefault(
+        "JSON_ENCODER",
+        os.environ.get("GS_JSON_ENCODER", serialization.DEFAULT_ENCODER),
+    )
+    app.config["json_encoder"] = serialization.get_encoder(app.config["JSON_ENCODER"])
+
+    # Queries slower than this many seconds are logged, with their plan,
+    # to an optional rotating log file and to /debug/slow-queries
+    app.config.setdefault("SLOW_QUERY_THRESHOLD", 0.1)
+    app.config.setdefault("SLOW_QUERY_LOG", os.environ.get("GS_SLOW_QUERY_LOG"))
+    app.config["slow_query_log"] = SlowQueryLog(
+        app.config["SLOW_QUERY_THRESHOLD"], path=app.config["SLOW_QUERY_LOG"]
+    )
+
+    # JSON, NDJSON and CSV responses of at least this many bytes are compressed
+    # with the encoding accepted by the client (brotli, gzip or deflate)
+    app.config.setdefault("COMPRESSION_MIN_SIZE", 500)
+    app.config.setdefault("COMPRESSION_LEVEL", 6)
+    app.config.setdefault("COMPRESSION_BROTLI_QUALITY", 4)
+    compression.check_settings(
+        app.config["COMPRESSION_LEVEL"], app.config["COMPRESSION_BROTLI_QUALITY"]
+    )
+    app.after_request(compression.compress_response)
+
+    # Each request checks out its own connection from the app's pool,
+    # or from a replica pool for reads, stored in the app's config
+    # on first use, and returns it when the app context is torn down.
+    app.teardown_appcontext(close_sql_connection)
+    app.after_request(stick_to_primary)
+    app.register_error_handler(PoolError, pool_exhausted)
+
+    # Register the health routes
+    app.register_blueprint(route_health.root_bp)
+    app.register_blueprint(route_health.pool_stats_bp)
+    app.register_blueprint(route_health.readiness_bp)
+
+    # Register the product routes
+    app.register_blueprint(route_products.all_products_bp)
+    app.register_blueprint(route_products.single_product_bp)
+    app.register_blueprint(route_products.insert_product_bp)
+    app.register_blueprint(route_products.bulk_insert_products_bp)
+    app.register_blueprint(route_products.update_product_bp)
+    app.register_blueprint(route_products.delete_product_bp)
+    app.register_blueprint(route_products.bulk_update_products_bp)
+    app.register_blueprint(route_products.bulk_delete_products_bp)
+    app.register_blueprint(route_products.product_cache_bp)
+    app.register_blueprint(route_products.export_products_bp)
+    app.register_blueprint(route_products.search_products_bp)
+
+    # Register the unit of measure routes
+    app.register_blueprint(route_uom.all_uom_bp)
+    app.register_blueprint(route_uom.insert_uom_bp)
+
+    # Register the order routes
+    app.register_blueprint(route_orders.insert_order_bp)
+    app.register_blueprint(route_orders.export_orders_bp)
+
+    # Register the inventory routes
+    app.register_blueprint(route_inventory.inventory_bp)
+    app.register_blueprint(route_inventory.set_stock_bp)
+    app.register_blueprint(route_inventory.adjust_stock_bp)
+
+    # Register the analytics routes
+    app.register_blueprint(route_analytics.sales_analytics_bp)
+
+    # Register the metrics route, which also times every request
+    app.register_blueprint(route_metrics.metrics_bp)
+
+    # Register the debugging routes
+    app.register_blueprint(route_debug.slow_queries_bp)
+
+    # Admit the requests last, so that the shed requests are still
+    # timed and counted by the metrics
+    if app.config["ADMISSION_CONTROL"]:
+        app.config["admission"] = admission.create_limiters(app.config)
+        app.before_request(admission.admit_request)
+        app.teardown_request(admission.release_request)
+
+    # Register the command line interface
+    app.cli.command("rebuild-rollups")(rebuild_rollups)
+
+    return app
 
 
-# Register the product routes
-app.register_blueprint(route_products.all_products_bp)
-app.register_blueprint(route_products.single_product_bp)
-app.register_blueprint(route_products.insert_product_bp)
-app.register_blueprint(route_products.update_product_bp)
-app.register_blueprint(route_products.delete_product_bp)
+# App used by the development server, `flask run` and the tests
+app: Flask = create_app()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,200 @@
+"""
+Admission control of the database-bound requests
+
+When the database slows down, requests hold their connections longer and
+the new ones pile up behind them: every request waits, and latency grows
+for all of them. With `ADMISSION_CONTROL` enabled, the number of requests
+in flight is capped per class, reads (GET and HEAD) and writes, so that a
+burst of one class cannot take all the connections. A request over the
+cap waits in a bounded FIFO queue for at most `ADMISSION_TIMEOUT` seconds.
+When the queue is full or the wait times out, it is shed right away with
+a 503 and a `Retry-After` header, instead of waiting for a connection it
+would get too late.
+
+The health and metrics routes are never limited.
+"""
+
+import collections
+import threading
+from typing import Any, Deque, Dict, Optional, Tuple
+
+from flask import Response, current_app, g, make_response, request
+
+from database.sql_connection import READ_METHODS
+from services.metrics import ADMISSION_IN_FLIGHT, ADMISSION_QUEUED, ADMISSION_SHED
+from services.serialization import json_response
+
+# Blueprints of the routes that do not use the database, never limited
+EXEMPT_BLUEPRINTS: Tuple[str, ...] = (
+    "root_bp",
+    "pool_stats_bp",
+    "readiness_bp",
+    "metrics_bp",
+)
+
+
+class AdmissionLimiter:
+    """
+    A cap on the number of requests in flight of a class,
+    with a bounded queue of waiting requests served in arrival order.
+    """
+
+    def __init__(self, name: str, limit: int, max_queue: int) -> None:
+        """
+        Input:  name (str)          | the class of the requests, for the metrics
+        Input:  limit (int)         | the maximum number of requests in flight
+        Input:  max_queue (int)     | the maximum number of waiting requests
+        """
+        if limit < 1:
+            raise ValueError("limit must be at least 1")
+
+        self.name: str = name
+        self.limit: int = limit
+        self.max_queue: int = max_queue
+        self.in_flight: int = 0
+        self.admitted: int = 0
+        self.queued: int = 0
+        self.shed: Dict[str, int] = {"queue_full": 0, "timeout": 0}
+
+        self._lock: threading.Lock = threading.Lock()
+        # Waiting requests, each woken up by its event when handed a slot
+        self._waiters: Deque[threading.Event] = collections.deque()
+
+    def acquire(self, timeout: float) -> bool:
+        """
+        Take a slot, waiting for at most `timeout` seconds.
+
+        Input:  timeout (float) | the maximum wait in the queue, in seconds
+        Output: True if the request was admitted, False if it is shed
+        """
+        with self._lock:
+            if self.in_flight < self.limit and not self._waiters:
+                self._admit()
+                return True
+
+            if len(self._waiters) >= self.max_queue:
+                self._shed("queue_full")
+                return False
+
+            waiter: threading.Event = threading.Event()
+            self._waiters.append(waiter)
+            self.queued += 1
+            ADMISSION_QUEUED.inc(self.name)
+
+        admitted: bool = waiter.wait(timeout)
+
+        with self._lock:
+            if not admitted:
+                if waiter.is_set():
+                    # Handed a slot right after the wait timed out
+                    admitted = True
+                else:
+                    self._waiters.remove(waiter)
+                    ADMISSION_QUEUED.dec(self.name)
+                    self._shed("timeout")
+
+        return admitted
+
+    def release(self) -> None:
+        """
+        Give back the slot of a request, to the first waiting one if any.
+        """
+        with self._lock:
+            if self._waiters:
+                # The slot goes straight to the next request in the queue
+                self._waiters.popleft().set()
+                ADMISSION_QUEUED.dec(self.name)
+                self.admitted += 1
+            else:
+                self.in_flight -= 1
+                ADMISSION_IN_FLIGHT.dec(self.name)
+
+    def _admit(self) -> None:
+        self.in_flight += 1
+        self.admitted += 1
+        ADMISSION_IN_FLIGHT.inc(self.name)
+
+    def _shed(self, reason: str) -> None:
+        self.shed[reason] += 1
+        ADMISSION_SHED.inc(self.name, reason)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return the state and counters of the limiter.
+        """
+        with self._lock:
+            return {
+                "limit": self.limit,
+                "in_flight": self.in_flight,
+                "queue_depth": len(self._waiters),
+                "max_queue": self.max_queue,
+                "admitted": self.admitted,
+                "queued": self.queued,
+                "shed": dict(self.shed),
+            }
+
+
+def create_limiters(config: Dict[str, Any]) -> Dict[str, AdmissionLimiter]:
+    """
+    Create the limiters of the read and write requests from the Flask app config.
+
+    Input:  config (dict)   | the Flask app config
+    Output: a dictionary with the "read" and "write" limiters
+    """
+    return {
+        "read": AdmissionLimiter(
+            "read", config["ADMISSION_MAX_READS"], config["ADMISSION_MAX_QUEUE"]
+        ),
+        "write": AdmissionLimiter(
+            "write", config["ADMISSION_MAX_WRITES"], config["ADMISSION_MAX_QUEUE"]
+        ),
+    }
+
+
+def admit_request() -> Optional[Response]:
+    """
+    Admit the current request, or shed it with a 503 response.
+    Registered with `before_request`.
+    """
+    limiters: Optional[Dict[str, AdmissionLimiter]] = current_app.config.get(
+        "admission"
+    )
+    if (
+        limiters is None
+        or request.url_rule is None
+        or request.blueprint in EXEMPT_BLUEPRINTS
+        or request.method == "OPTIONS"
+    ):
+        return None
+
+    limiter: AdmissionLimiter = limiters[
+        "read" if request.method in READ_METHODS else "write"
+    ]
+    if limiter.acquire(current_app.config.get("ADMISSION_TIMEOUT", 1.0)):
+        g.admission = limiter
+        return None
+
+    response: Response = make_response(
+        json_response({"error": "Server overloaded, retry later"}), 503
+    )
+    response.headers["Retry-After"] = str(
+        current_app.config.get("ADMISSION_RETRY_AFTER", 1)
+    )
+
+    # The `Access-Control-Allow-Origin` header is part of the CORS mechanism.
+    # It tells the browser which origins are allowed to access
+    # the resources on the server.
+    # `*` means that all the origins can access the endpoint.
+    response.headers.add("Access-Control-Allow-Origin", "*")
+
+    return response
+
+
+def release_request(exception: Optional[BaseException] = None) -> None:
+    """
+    Give back the slot of the current request once it is done,
+    streamed responses included. Registered with `teardown_request`.
+    """
+    limiter: Optional[AdmissionLimiter] = g.pop("admission", None)
+    if limiter is not None:
+        limiter.release()
@@ -0,0 +1,275 @@
+"""
+In-memory cache used in front of the DAO (Data Access Object) functions
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple, Union
+
+
+def estimate_size(value: Any) -> int:
+    """
+    Estimate the memory footprint of a cached value in bytes.
+    Containers are traversed so that a list of product dictionaries
+    is accounted for as a whole.
+
+    Input:  value (Any)     | the value to measure
+    Output: the estimated size in bytes
+    """
+    size: int = sys.getsizeof(value)
+
+    if isinstance(value, dict):
+        size += sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set)):
+        size += sum(estimate_size(item) for item in value)
+
+    return size
+
+
+class LRUCache:
+    """
+    A thread-safe LRU cache with a time-to-live and a memory budget.
+
+    Entries expire `ttl` seconds after they were stored. When the cache
+    holds more than `max_entries` entries or more than `max_bytes` bytes,
+    the least recently used entries are evicted first.
+    """
+
+    def __init__(
+        self, ttl: float = 60.0, max_entries: int = 1024, max_bytes: int = 16 << 20
+    ) -> None:
+        """
+        Input:  ttl (float)         | the lifetime of an entry in seconds
+        Input:  max_entries (int)   | the maximum number of entries
+        Input:  max_bytes (int)     | the maximum estimated size of all the entries
+        """
+        self.ttl: float = ttl
+        self.max_entries: int = max_entries
+        self.max_bytes: int = max_bytes
+
+        # Entries are stored as (value, size, expiry time), oldest first
+        self._entries: "OrderedDict[Hashable, Tuple[Any, int, float]]" = OrderedDict()
+        self._bytes: int = 0
+        # Bumped on every invalidation, see `set()`
+        self.generation: int = 0
+        self._lock: threading.Lock = threading.Lock()
+
+        # Counters exposed through `stats()`
+        self._hits: int = 0
+        self._misses: int = 0
+        self._evictions: int = 0
+        self._expirations: int = 0
+        self._invalidations: int = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Return the value cached under `key`, or None on a miss.
+
+        Input:  key (Hashable)  | the cache key
+        Output: the cached value or None
+        """
+        with self._lock:
+            entry: Optional[Tuple[Any, int, float]] = self._entries.get(key)
+
+            if entry is None:
+                self._misses += 1
+                return None
+
+            value, size, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self._bytes -= size
+                self._expirations += 1
+                self._misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self._hits += 1
+
+            return value
+
+    def set(self, key: Hashable, value: Any, generation: Optional[int] = None) -> None:
+        """
+        Store `value` under `key`, evicting the least recently used
+        entries if the cache is over its budget.
+        A value larger than the whole memory budget is not cached.
+
+        Readers should pass the `generation` they observed before querying
+        the database: if an invalidation happened in the meantime the value
+        may already be stale and it is not stored.
+
+        Input:  key (Hashable)      | the cache key
+        Input:  value (Any)         | the value to cache
+        Input:  generation (int)    | the cache generation observed before the read
+        """
+        size: int = estimate_size(value)
+
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+
+            previous: Optional[Tuple[Any, int, float]] = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+
+            if size > self.max_bytes:
+                return
+
+            self._entries[key] = (value, size, time.monotonic() + self.ttl)
+            self._bytes += size
+
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self._evictions += 1
+
+    def invalidate(self, *keys: Hashable) -> None:
+        """
+        Remove the given keys from the cache.
+
+        Input:  keys (Hashable)     | the cache keys to remove
+        """
+        with self._lock:
+            self.generation += 1
+            for key in keys:
+                entry: Optional[Tuple[Any, int, float]] = self._entries.pop(key, None)
+                if entry is not None:
+                    self._bytes -= entry[1]
+                    self._invalidations += 1
+
+    def clear(self) -> None:
+        """
+        Remove every entry from the cache.
+        """
+        with self._lock:
+            self.generation += 1
+            self._invalidations += len(self._entries)
+            self._entries.clear()
+            self._bytes = 0
+
+    def reset(self) -> None:
+        """
+        Remove every entry from the cache without taking its lock,
+        in a forked process where the lock may have been held by
+        a thread of the parent that does not exist anymore.
+        """
+        self._lock = threading.Lock()
+        self.clear()
+
+    def stats(self) -> Dict[str, Union[int, float]]:
+        """
+        Return a snapshot of the cache counters.
+
+        Output: a dictionary with the hit, miss and eviction counters
+        """
+        with self._lock:
+            lookups: int = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl": self.ttl,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": round(self._hits / lookups, 4) if lookups else 0.0,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+                "invalidations": self._invalidations,
+            }
+
+
+class VersionCounter:
+    """
+    A thread-safe, monotonically increasing version number.
+
+    The version is bumped on every write to the data it describes, so that
+    clients can be told whether what they hold is still current without
+    reading the data again. The `epoch` identifies the process lifetime, so
+    that versions handed out before a restart are never mistaken for new ones.
+    """
+
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Start a new lifetime of the version, with a new epoch.
+        A forked process calls it so that its versions are never
+        mistaken for those of its parent or of its siblings.
+        """
+        self.epoch: str = f"{os.getpid():x}.{time.time_ns():x}"
+        self.value: int = 0
+        # Wall-clock time of the last bump, in seconds since the epoch
+        self.modified_at: float = time.time()
+        self._lock: threading.Lock = threading.Lock()
+
+    def bump(self) -> int:
+        """
+        Increment the version.
+
+        Output: the new version number
+        """
+        with self._lock:
+            self.value += 1
+            self.modified_at = time.time()
+            return self.value
+
+    def snapshot(self) -> Tuple[str, float]:
+        """
+        Return the current version as an opaque tag and its modification time.
+
+        Output: a tuple (version tag, time of the last bump)
+        """
+        with self._lock:
+            return f"{self.epoch}-{self.value}", self.modified_at
+
+
+class SharedVersion:
+    """
+    The last seen value of a version shared by several processes,
+    such as a counter kept in the database, read at most once per interval.
+    """
+
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Forget the last seen value, so that the next read reports a change.
+        """
+        self.value: Optional[int] = None
+        # Monotonic time of the last read of the version
+        self.checked_at: Optional[float] = None
+        self._lock: threading.Lock = threading.Lock()
+
+    def due(self, interval: float) -> bool:
+        """
+        Tell whether the version should be read again, in which case
+        the read is claimed so that concurrent callers do not repeat it.
+
+        Input:  interval (float)    | the minimum time between two reads, in seconds
+        Output: True if the caller should read the version
+        """
+        with self._lock:
+            now: float = time.monotonic()
+            if self.checked_at is not None and now - self.checked_at < interval:
+                return False
+
+            self.checked_at = now
+            return True
+
+    def observe(self, value: int) -> bool:
+        """
+        Record the value read.
+
+        Input:  value (int)     | the current value of the version
+        Output: True if it changed since the last read
+        """
+        with self._lock:
+            changed: bool = value != self.value
+            self.value = value
+            return changed
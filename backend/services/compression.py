@@ -0,0 +1,213 @@
+"""
+Compression of the API responses
+
+The encoding is negotiated from the `Accept-Encoding` header of the request:
+brotli when it is installed and accepted, then gzip, then deflate. Bodies
+smaller than the minimum size are sent as is, since compressing them costs
+more than it saves. Streamed responses are compressed chunk by chunk, each
+chunk flushed so that the client still gets the rows as they are read.
+"""
+
+import zlib
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+from flask import Response, current_app, has_app_context, request
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+# Media types of the responses that are compressed
+COMPRESSIBLE_MIMETYPES: Tuple[str, ...] = (
+    "application/json",
+    "application/x-ndjson",
+    "text/csv",
+)
+
+# Window bits of the zlib formats: gzip (RFC 1952) and deflate (RFC 1950)
+ZLIB_WBITS: Dict[str, int] = {"gzip": 16 + zlib.MAX_WBITS, "deflate": zlib.MAX_WBITS}
+
+# Available encodings, most preferred first
+ENCODINGS: Tuple[str, ...] = (("br",) if brotli is not None else ()) + (
+    "gzip",
+    "deflate",
+)
+
+# Default settings, used outside of an app context
+DEFAULT_MIN_SIZE: int = 500
+DEFAULT_LEVEL: int = 6
+DEFAULT_BROTLI_QUALITY: int = 4
+
+
+def check_settings(zlib_level: int, brotli_quality: int) -> None:
+    """
+    Check the levels of the compressed responses of an app.
+
+    Input:  zlib_level (int)        | the gzip and deflate level, from 1 to 9
+    Input:  brotli_quality (int)    | the brotli quality, from 0 to 11
+    Raises: ValueError if a level is out of its range
+    """
+    if not 1 <= zlib_level <= 9:
+        raise ValueError(f"Invalid compression level: {zlib_level} (1 to 9)")
+    if not 0 <= brotli_quality <= 11:
+        raise ValueError(f"Invalid brotli quality: {brotli_quality} (0 to 11)")
+
+
+def settings() -> Tuple[int, int, int]:
+    """
+    Return the compression settings of the current app,
+    or the default ones outside of an app context.
+
+    Output: a tuple (minimum size in bytes, zlib level, brotli quality)
+    """
+    if not has_app_context():
+        return DEFAULT_MIN_SIZE, DEFAULT_LEVEL, DEFAULT_BROTLI_QUALITY
+
+    config: Dict[str, Any] = current_app.config
+
+    return (
+        config.get("COMPRESSION_MIN_SIZE", DEFAULT_MIN_SIZE),
+        config.get("COMPRESSION_LEVEL", DEFAULT_LEVEL),
+        config.get("COMPRESSION_BROTLI_QUALITY", DEFAULT_BROTLI_QUALITY),
+    )
+
+
+def min_size() -> int:
+    """
+    Return the size in bytes below which the bodies of the current app
+    are not compressed.
+    """
+    return settings()[0]
+
+
+def negotiate() -> Optional[str]:
+    """
+    Select the encoding of the response to the current request.
+
+    Output: the preferred encoding accepted by the client, or None
+    """
+    return request.accept_encodings.best_match(ENCODINGS)
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """
+    Compress a body with the level of the current app.
+
+    Input:  body (bytes)        | the body to compress
+    Input:  encoding (str)      | one of ENCODINGS
+    Output: the compressed body
+    """
+    _, level, brotli_quality = settings()
+
+    if encoding == "br":
+        return brotli.compress(body, quality=brotli_quality)
+
+    compressor = zlib.compressobj(level, zlib.DEFLATED, ZLIB_WBITS[encoding])
+
+    return compressor.compress(body) + compressor.flush()
+
+
+def compress_stream(chunks: Iterable[bytes], encoding: str) -> Iterator[bytes]:
+    """
+    Compress a stream, flushing the compressor after each chunk.
+    The compressor is created right away, with the level of the current app,
+    since the stream is consumed once the request is done.
+
+    Input:  chunks (Iterable)   | the chunks of the body
+    Input:  encoding (str)      | one of ENCODINGS
+    Output: an iterator over the compressed chunks
+    """
+    _, level, brotli_quality = settings()
+
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=brotli_quality)
+
+        def process(chunk: bytes) -> bytes:
+            return compressor.process(chunk) + compressor.flush()
+
+        finish: Callable[[], bytes] = compressor.finish
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, ZLIB_WBITS[encoding])
+
+        def process(chunk: bytes) -> bytes:
+            return compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+
+        finish = compressor.flush
+
+    return compressed_chunks(chunks, process, finish)
+
+
+def compressed_chunks(
+    chunks: Iterable[bytes],
+    process: Callable[[bytes], bytes],
+    finish: Callable[[], bytes],
+) -> Iterator[bytes]:
+    """
+    Compress the chunks of a stream as they are read, then finish the stream.
+    """
+    try:
+        for chunk in chunks:
+            if chunk:
+                yield process(chunk.encode() if isinstance(chunk, str) else chunk)
+        yield finish()
+    finally:
+        # Release the request context kept by `stream_with_context()`
+        close: Optional[Callable[[], None]] = getattr(chunks, "close", None)
+        if close is not None:
+            close()
+
+
+def set_content_encoding(response: Response, encoding: str) -> None:
+    """
+    Mark a response body as compressed. The entity tag becomes weak,
+    since the bytes differ from the ones of the uncompressed body.
+
+    Input:  response (Response)     | the Flask response object
+    Input:  encoding (str)          | the encoding of the body
+    """
+    response.headers["Content-Encoding"] = encoding
+    etag, weak = response.get_etag()
+    if etag is not None and not weak:
+        response.set_etag(etag, weak=True)
+
+
+def compress_response(response: Response) -> Response:
+    """
+    Compress the body of a response with the encoding accepted
+    by the client, run after every request.
+    Responses already encoded, such as the cached compressed
+    list of products, are left untouched.
+
+    Input:  response (Response)     | the Flask response object
+    Output: the Flask response object, compressed if worthwhile
+    """
+    if response.mimetype not in COMPRESSIBLE_MIMETYPES:
+        return response
+
+    response.vary.add("Accept-Encoding")
+
+    if (
+        "Content-Encoding" in response.headers
+        or response.status_code < 200
+        or response.status_code in (204, 206, 304)
+        or request.method == "HEAD"
+    ):
+        return response
+
+    encoding: Optional[str] = negotiate()
+    if encoding is None:
+        return response
+
+    if response.is_streamed:
+        response.response = compress_stream(response.response, encoding)
+        response.headers.pop("Content-Length", None)
+    else:
+        body: bytes = response.get_data()
+        if len(body) < min_size():
+            return response
+        response.set_data(compress(body, encoding))
+
+    set_content_encoding(response, encoding)
+
+    return response
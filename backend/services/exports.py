@@ -0,0 +1,144 @@
+"""
+Encoding of the streamed exports
+
+Exports are produced from a generator of batches of rows and encoded batch
+by batch, so that memory is bounded by the size of a batch whatever the
+number of rows exported: CSV lines are written per batch, and each batch
+becomes a row group of the Parquet file, built column by column.
+"""
+
+import csv
+import io
+from typing import Any, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from services.service_orders import ORDER_EXPORT_COLUMNS
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # pragma: no cover
+    pyarrow = None
+
+# Available export formats, with the media type of each
+EXPORT_FORMATS: Tuple[str, ...] = (
+    ("csv", "parquet") if pyarrow is not None else ("csv",)
+)
+MIMETYPES: dict = {"csv": "text/csv", "parquet": "application/vnd.apache.parquet"}
+
+
+def order_lines_schema() -> Any:
+    """
+    Return the Parquet schema of the order history export.
+
+    Output: a pyarrow.Schema object with the ORDER_EXPORT_COLUMNS
+    """
+    types: Tuple[Any, ...] = (
+        pyarrow.int64(),  # order_id
+        pyarrow.string(),  # customer_name
+        pyarrow.timestamp("s"),  # date
+        pyarrow.float64(),  # order_total
+        pyarrow.int64(),  # product_id
+        pyarrow.string(),  # product_name
+        pyarrow.int64(),  # uom_id
+        pyarrow.string(),  # uom_name
+        pyarrow.float64(),  # quantity
+        pyarrow.float64(),  # total_price
+    )
+
+    return pyarrow.schema(list(zip(ORDER_EXPORT_COLUMNS, types)))
+
+
+def csv_stream(
+    columns: Sequence[str], batches: Iterable[List[Tuple[Any, ...]]]
+) -> Iterator[bytes]:
+    """
+    Encode batches of rows as CSV, with a header line.
+
+    Input:  columns (Sequence)  | the names of the columns
+    Input:  batches (Iterable)  | the batches of rows
+    Output: an iterator over the CSV bytes, one chunk per batch
+    """
+    buffer: io.StringIO = io.StringIO()
+    writer: Any = csv.writer(buffer)
+
+    writer.writerow(columns)
+    for batch in batches:
+        writer.writerows(batch)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+class ChunkSink(io.RawIOBase):
+    """
+    A write-only file collecting the bytes written since the last `drain()`.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._chunks: List[bytes] = []
+        self._position: int = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: Any) -> int:
+        chunk: bytes = bytes(data)
+        self._chunks.append(chunk)
+        self._position += len(chunk)
+        return len(chunk)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        """
+        Return and forget the bytes written since the last call.
+        """
+        data: bytes = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def parquet_stream(
+    schema: Any, batches: Iterable[List[Tuple[Any, ...]]]
+) -> Iterator[bytes]:
+    """
+    Encode batches of rows as a Parquet file, one row group per batch.
+    Each batch is turned into columns before being written, and the bytes
+    of its row group are sent as soon as it is written.
+
+    Input:  schema (pyarrow.Schema)     | the names and types of the columns
+    Input:  batches (Iterable)          | the batches of rows
+    Output: an iterator over the bytes of the Parquet file
+    """
+    sink: ChunkSink = ChunkSink()
+    writer: Optional[Any] = pyarrow.parquet.ParquetWriter(sink, schema)
+
+    try:
+        for batch in batches:
+            columns: List[Tuple[Any, ...]] = (
+                list(zip(*batch)) if batch else [()] * len(schema)
+            )
+            writer.write_batch(
+                pyarrow.RecordBatch.from_arrays(
+                    [
+                        pyarrow.array(column, type=field.type)
+                        for column, field in zip(columns, schema)
+                    ],
+                    schema=schema,
+                )
+            )
+            if data := sink.drain():
+                yield data
+
+        # Write the footer of the file
+        writer.close()
+        writer = None
+        yield sink.drain()
+    finally:
+        if writer is not None:
+            writer.close()
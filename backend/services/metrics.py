@@ -0,0 +1,356 @@
+"""
+In-process metrics exposed in the Prometheus text format
+
+Counters, gauges and histograms are kept in memory, per label values,
+and rendered on demand by the /metrics endpoint. Recording a value takes
+a dictionary lookup and a short lock, so that it can be done on every
+request and every query.
+"""
+
+import bisect
+import math
+import threading
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Upper bounds of the latency histograms, in seconds
+LATENCY_BUCKETS: Tuple[float, ...] = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+def format_value(value: float) -> str:
+    """
+    Format a sample value the way Prometheus does.
+    """
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+
+    return repr(value)
+
+
+def format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    """
+    Format label names and values as `{name="value",...}`.
+    """
+    if not names:
+        return ""
+
+    pairs: str = ",".join(
+        f'{name}="{escape(value)}"' for name, value in zip(names, values)
+    )
+    return f"{{{pairs}}}"
+
+
+def escape(value: str) -> str:
+    """
+    Escape a label value.
+    """
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Metric:
+    """
+    Base class of the metrics: a name, a help text, label names,
+    and one child per combination of label values.
+    """
+
+    kind: str = "untyped"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()) -> None:
+        self.name: str = name
+        self.help: str = help
+        self.label_names: Tuple[str, ...] = tuple(labels)
+        self._lock: threading.Lock = threading.Lock()
+
+    def check_labels(self, values: Tuple[str, ...]) -> None:
+        if len(values) != len(self.label_names):
+            raise ValueError(
+                f"{self.name} expects the labels {', '.join(self.label_names)}"
+            )
+
+    def samples(self) -> Iterator[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        """
+        Render the metric in the Prometheus text format.
+        """
+        lines: List[str] = [
+            f"# HELP {self.name} {self.help}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        lines.extend(self.samples())
+
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    """
+    A value that only goes up, such as a number of requests.
+    """
+
+    kind: str = "counter"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()) -> None:
+        super().__init__(name, help, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        """
+        Increase the counter of the given label values.
+        """
+        with self._lock:
+            value: Optional[float] = self._values.get(labels)
+            if value is None:
+                self.check_labels(labels)
+                value = 0.0
+            self._values[labels] = value + amount
+
+    def set(self, *labels: str, value: float) -> None:
+        """
+        Set the value of the given label values,
+        for a value counted by another component.
+        """
+        with self._lock:
+            if labels not in self._values:
+                self.check_labels(labels)
+            self._values[labels] = value
+
+    def get(self, *labels: str) -> float:
+        return self._values.get(labels, 0.0)
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            values: List[Tuple[Tuple[str, ...], float]] = sorted(self._values.items())
+        for labels, value in values:
+            yield f"{self.name}{format_labels(self.label_names, labels)} {format_value(value)}"
+
+
+class Gauge(Counter):
+    """
+    A value that goes up and down, such as a number of requests in flight.
+    """
+
+    kind: str = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1.0) -> None:
+        """
+        Decrease the gauge of the given label values.
+        """
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(Metric):
+    """
+    The distribution of observed values, such as latencies, counted in buckets.
+    """
+
+    kind: str = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> None:
+        super().__init__(name, help, labels)
+        self.buckets: Tuple[float, ...] = tuple(sorted(buckets))
+        # Per label values: the count of each bucket (the last one for +Inf),
+        # and the sum of the observed values
+        self._values: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        """
+        Record an observed value for the given label values.
+        """
+        index: int = bisect.bisect_left(self.buckets, value)
+
+        with self._lock:
+            child: Optional[Tuple[List[int], List[float]]] = self._values.get(labels)
+            if child is None:
+                self.check_labels(labels)
+                child = ([0] * (len(self.buckets) + 1), [0.0])
+                self._values[labels] = child
+            child[0][index] += 1
+            child[1][0] += value
+
+    def count(self, *labels: str) -> int:
+        child: Optional[Tuple[List[int], List[float]]] = self._values.get(labels)
+        return sum(child[0]) if child else 0
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            values: List[Tuple[Tuple[str, ...], List[int], float]] = [
+                (labels, list(counts), total[0])
+                for labels, (counts, total) in sorted(self._values.items())
+            ]
+
+        label_names: Tuple[str, ...] = self.label_names + ("le",)
+        for labels, counts, total in values:
+            cumulative: int = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                yield f"{self.name}_bucket{format_labels(label_names, labels + (format_value(bound),))} {cumulative}"
+            suffix: str = format_labels(self.label_names, labels)
+            yield f"{self.name}_sum{suffix} {format_value(total)}"
+            yield f"{self.name}_count{suffix} {cumulative}"
+
+
+class Registry:
+    """
+    The set of the metrics rendered by the /metrics endpoint.
+    """
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric already registered: {metric.name}")
+        self._metrics[metric.name] = metric
+
+        return metric
+
+    def render(self) -> str:
+        """
+        Render every metric in the Prometheus text format.
+        """
+        return "\n".join(m.render() for m in self._metrics.values()) + "\n"
+
+
+registry: Registry = Registry()
+
+# HTTP requests, labelled by blueprint and route rule
+REQUEST_DURATION: Histogram = registry.register(
+    Histogram(
+        "gs_http_request_duration_seconds",
+        "Time spent handling HTTP requests.",
+        ("blueprint", "route", "method"),
+    )
+)
+RESPONSES: Counter = registry.register(
+    Counter(
+        "gs_http_responses_total",
+        "HTTP responses sent, by status code.",
+        ("blueprint", "route", "method", "status"),
+    )
+)
+REQUESTS_IN_FLIGHT: Gauge = registry.register(
+    Gauge(
+        "gs_http_requests_in_flight",
+        "HTTP requests being handled.",
+        ("blueprint", "route"),
+    )
+)
+
+# Database queries, labelled by the DAO function running them
+QUERY_DURATION: Histogram = registry.register(
+    Histogram(
+        "gs_db_query_duration_seconds",
+        "Time spent executing database queries.",
+        ("function", "operation"),
+    )
+)
+FETCH_DURATION: Histogram = registry.register(
+    Histogram(
+        "gs_db_fetch_duration_seconds",
+        "Time spent fetching the rows of database queries.",
+        ("function",),
+    )
+)
+ROWS: Counter = registry.register(
+    Counter(
+        "gs_db_rows_total",
+        "Rows returned by database queries.",
+        ("function",),
+    )
+)
+QUERY_ERRORS: Counter = registry.register(
+    Counter(
+        "gs_db_query_errors_total",
+        "Database queries that raised an error.",
+        ("function", "operation"),
+    )
+)
+
+# Connection pool
+POOL_WAIT: Histogram = registry.register(
+    Histogram(
+        "gs_db_pool_wait_seconds",
+        "Time spent checking out a connection from the pool.",
+    )
+)
+POOL_CONNECTIONS: Gauge = registry.register(
+    Gauge(
+        "gs_db_pool_connections",
+        "Connections of the pool, by state.",
+        ("state",),
+    )
+)
+POOL_EVENTS: Counter = registry.register(
+    Counter(
+        "gs_db_pool_events_total",
+        "Connection pool events since startup (checkouts, waits, timeouts, reconnects).",
+        ("event",),
+    )
+)
+DB_ROUTING: Counter = registry.register(
+    Counter(
+        "gs_db_routing_total",
+        "Connections checked out per target (primary, replica), failovers "
+        "to the primary and replicas marked down.",
+        ("target",),
+    )
+)
+GROUP_COMMIT_SIZE: Histogram = registry.register(
+    Histogram(
+        "gs_db_group_commit_writes",
+        "Writes committed per group-commit transaction.",
+        buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256),
+    )
+)
+INVENTORY_EVENTS: Counter = registry.register(
+    Counter(
+        "gs_inventory_events_total",
+        "Stock reservations, rejections for insufficient stock "
+        "and optimistic update conflicts.",
+        ("event",),
+    )
+)
+ADMISSION_IN_FLIGHT: Gauge = registry.register(
+    Gauge(
+        "gs_admission_in_flight",
+        "Requests admitted and in flight, per class (read, write).",
+        ("class",),
+    )
+)
+ADMISSION_QUEUED: Gauge = registry.register(
+    Gauge(
+        "gs_admission_queue_depth",
+        "Requests waiting to be admitted, per class (read, write).",
+        ("class",),
+    )
+)
+ADMISSION_SHED: Counter = registry.register(
+    Counter(
+        "gs_admission_shed_total",
+        "Requests rejected with a 503, per class and reason (queue_full, timeout).",
+        ("class", "reason"),
+    )
+)
@@ -0,0 +1,210 @@
+"""
+In-memory full-text index used to search the products by name
+"""
+
+import bisect
+import re
+import threading
+import time
+import unicodedata
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+# Minimum share of the trigrams of the query that a name must contain
+# to be returned as a fuzzy match
+FUZZY_THRESHOLD: float = 0.5
+
+
+def normalize(text: str) -> str:
+    """
+    Normalize a text for indexing and searching:
+    lowercase, without accents and with single spaces between words.
+
+    Input:  text (str)  | the text to normalize
+    Output: the normalized text
+    """
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+
+    return " ".join(re.findall(r"\w+", text))
+
+
+def trigrams(text: str) -> Set[str]:
+    """
+    Split a normalized text into its trigrams.
+    The text is padded so that the start of each word has its own trigrams.
+
+    Input:  text (str)  | the normalized text
+    Output: the set of trigrams of the text
+    """
+    padded: str = f"  {text} "
+
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+class SearchIndex:
+    """
+    A thread-safe prefix and trigram index over the names of documents.
+
+    Word prefixes are looked up by bisection in a sorted list of the words
+    of all the names, and substrings and misspellings through the postings
+    of their trigrams. Results are ranked: exact names first, then names
+    starting with the query, names with a word starting with it, names
+    containing it, and finally fuzzy matches by trigram similarity.
+    """
+
+    def __init__(self) -> None:
+        # Documents by ID, with their normalized name
+        self._documents: Dict[int, Tuple[Dict[str, Any], str]] = {}
+        # Sorted (word, document ID) pairs used for the prefix lookups
+        self._words: List[Tuple[str, int]] = []
+        # Postings of each trigram: the IDs of the documents containing it
+        self._postings: Dict[str, Set[int]] = {}
+        self._lock: threading.RLock = threading.RLock()
+
+        # Time of the last full build, None while the index is not built
+        self.built_at: Optional[float] = None
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def build(self, documents: Iterable[Tuple[int, str, Dict[str, Any]]]) -> None:
+        """
+        Replace the content of the index.
+
+        Input:  documents (Iterable)    | tuples (document ID, name, document)
+        """
+        with self._lock:
+            self._documents.clear()
+            self._words.clear()
+            self._postings.clear()
+
+            for document_id, name, document in documents:
+                self._add(document_id, name, document, sort=False)
+
+            self._words.sort()
+            self.built_at = time.monotonic()
+
+    def _add(
+        self, document_id: int, name: str, document: Dict[str, Any], sort: bool
+    ) -> None:
+        """
+        Index a document, the lock must be held.
+        """
+        normalized: str = normalize(name)
+        self._documents[document_id] = (document, normalized)
+
+        for word in set(normalized.split()):
+            if sort:
+                bisect.insort(self._words, (word, document_id))
+            else:
+                self._words.append((word, document_id))
+
+        for trigram in trigrams(normalized):
+            self._postings.setdefault(trigram, set()).add(document_id)
+
+    def _remove(self, document_id: int) -> None:
+        """
+        Remove a document from the index, the lock must be held.
+        """
+        entry: Optional[Tuple[Dict[str, Any], str]] = self._documents.pop(
+            document_id, None
+        )
+        if entry is None:
+            return
+
+        normalized: str = entry[1]
+        for word in set(normalized.split()):
+            position: int = bisect.bisect_left(self._words, (word, document_id))
+            if position < len(self._words) and self._words[position] == (
+                word,
+                document_id,
+            ):
+                del self._words[position]
+
+        for trigram in trigrams(normalized):
+            postings: Optional[Set[int]] = self._postings.get(trigram)
+            if postings is not None:
+                postings.discard(document_id)
+                if not postings:
+                    del self._postings[trigram]
+
+    def upsert(self, document_id: int, name: str, document: Dict[str, Any]) -> None:
+        """
+        Add a document to the index, or replace it if it is already there.
+
+        Input:  document_id (int)   | the ID of the document
+        Input:  name (str)          | the name to index
+        Input:  document (dict)     | the document returned by the searches
+        """
+        with self._lock:
+            self._remove(document_id)
+            self._add(document_id, name, document, sort=True)
+
+    def remove(self, document_id: int) -> None:
+        """
+        Remove a document from the index.
+
+        Input:  document_id (int)   | the ID of the document
+        """
+        with self._lock:
+            self._remove(document_id)
+
+    def search(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        Search the documents whose name matches the query.
+
+        Input:  query (str)     | the text typed by the user
+        Input:  limit (int)     | the maximum number of results
+        Output: the list of the matching documents, best match first
+        """
+        normalized: str = normalize(query)
+        if not normalized:
+            return []
+
+        # Rank of each candidate, lower is better:
+        # (tier, -similarity, length of the name, name)
+        ranks: Dict[int, Tuple[int, float, int, str]] = {}
+
+        with self._lock:
+            # Names with a word starting with the query
+            # (or with the last word of the query)
+            last_word: str = normalized.split()[-1]
+            position: int = bisect.bisect_left(self._words, (last_word, -1))
+            while position < len(self._words) and self._words[position][0].startswith(
+                last_word
+            ):
+                document_id: int = self._words[position][1]
+                name: str = self._documents[document_id][1]
+                if normalized == name:
+                    tier: int = 0
+                elif name.startswith(normalized):
+                    tier = 1
+                elif f" {normalized}" in f" {name}":
+                    tier = 2
+                else:
+                    tier = 3 if normalized in name else 5
+                if tier < 5:
+                    ranks[document_id] = (tier, 0.0, len(name), name)
+                position += 1
+
+            # Names containing the query, or close to it
+            query_trigrams: Set[str] = trigrams(normalized)
+            if len(normalized) >= 3:
+                hits: Dict[int, int] = {}
+                for trigram in query_trigrams:
+                    for document_id in self._postings.get(trigram, ()):
+                        hits[document_id] = hits.get(document_id, 0) + 1
+
+                for document_id, count in hits.items():
+                    if document_id in ranks:
+                        continue
+                    name = self._documents[document_id][1]
+                    similarity: float = count / len(query_trigrams)
+                    if normalized in name:
+                        ranks[document_id] = (3, -similarity, len(name), name)
+                    elif similarity >= FUZZY_THRESHOLD:
+                        ranks[document_id] = (4, -similarity, len(name), name)
+
+            best: List[int] = sorted(ranks, key=ranks.__getitem__)[:limit]
+
+            return [self._documents[document_id][0] for document_id in best]
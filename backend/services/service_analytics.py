@@ -0,0 +1,182 @@
+"""
+Sales analytics DAO (Data Access Object)
+
+Sales are aggregated per day into rollup tables, per day and product,
+and per day and unit of measure. The rollups are updated incrementally
+in the transaction that records each order, so that reports read a few
+precomputed rows instead of scanning the whole order history.
+"""
+
+from datetime import date
+from typing import Dict, List, Optional, Tuple, Union
+
+from mysql.connector import Error, MySQLConnection
+from mysql.connector.cursor import MySQLCursor
+
+from services.service_uom import uom_dictionary
+
+# Supported groupings of the sales report
+GROUP_BY: Tuple[str, ...] = ("day", "product", "uom")
+
+
+def record_order_sales(
+    cursor: MySQLCursor,
+    day: date,
+    lines: List[Tuple[int, int, float, float]],
+) -> None:
+    """
+    Add the lines of a new order to the sales rollups.
+    The caller owns the transaction: the rollups are only committed
+    along with the order itself. Rows are written in key order so that
+    concurrent orders lock them in the same order.
+
+    Input:  cursor (MySQLCursor)    | the cursor of the order transaction
+    Input:  day (date)              | the day of the order
+    Input:  lines (list)            | the lines of the order as tuples
+                                      (product_id, uom_id, quantity, total_price)
+    """
+    # Aggregate the lines per unit of measure
+    per_uom: Dict[int, List[float]] = {}
+    for _, uom_id, quantity, total_price in lines:
+        totals: List[float] = per_uom.setdefault(uom_id, [0.0, 0.0])
+        totals[0] += quantity
+        totals[1] += total_price
+
+    cursor.execute(
+        "INSERT INTO sales_daily (day, orders, units, revenue) VALUES (%s, 1, %s, %s) ON DUPLICATE KEY UPDATE orders = orders + 1, units = units + VALUES(units), revenue = revenue + VALUES(revenue)",
+        (
+            day,
+            sum(line[2] for line in lines),
+            round(sum(line[3] for line in lines), 2),
+        ),
+    )
+
+    cursor.executemany(
+        "INSERT INTO sales_daily_product (day, product_id, units, revenue) VALUES (%s, %s, %s, %s) ON DUPLICATE KEY UPDATE units = units + VALUES(units), revenue = revenue + VALUES(revenue)",
+        [
+            (day, product_id, quantity, total_price)
+            for product_id, _, quantity, total_price in sorted(lines)
+        ],
+    )
+
+    cursor.executemany(
+        "INSERT INTO sales_daily_uom (day, uom_id, units, revenue) VALUES (%s, %s, %s, %s) ON DUPLICATE KEY UPDATE units = units + VALUES(units), revenue = revenue + VALUES(revenue)",
+        [
+            (day, uom_id, units, round(revenue, 2))
+            for uom_id, (units, revenue) in sorted(per_uom.items())
+        ],
+    )
+
+
+def get_sales(
+    cnx: MySQLConnection,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    group_by: str = "day",
+) -> Optional[List[Dict[str, Union[int, str, float]]]]:
+    """
+    Fetch the sales between two days from the rollup tables.
+
+    Input:  cnx (MySQLConnection)   | a MySQL connection object
+    Input:  date_from (date)        | the first day of the report, included
+    Input:  date_to (date)          | the last day of the report, included
+    Input:  group_by (str)          | one of "day", "product" or "uom"
+    Output: a list of dictionaries of sales figures or None
+    """
+    conditions: List[str] = []
+    params: List[date] = []
+    if date_from is not None:
+        conditions.append("day >= %s")
+        params.append(date_from)
+    if date_to is not None:
+        conditions.append("day <= %s")
+        params.append(date_to)
+    where: str = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    # Define the query string summing the rollup rows of the period
+    query: str
+    if group_by == "day":
+        query = (
+            f"SELECT day, orders, units, revenue FROM sales_daily{where} ORDER BY day"
+        )
+    elif group_by == "product":
+        query = f"SELECT product_id, SUM(units), SUM(revenue) FROM sales_daily_product{where} GROUP BY product_id ORDER BY product_id"
+    elif group_by == "uom":
+        query = f"SELECT uom_id, SUM(units), SUM(revenue) FROM sales_daily_uom{where} GROUP BY uom_id ORDER BY uom_id"
+    else:
+        raise ValueError(f"group_by must be one of: {', '.join(GROUP_BY)}")
+
+    try:
+        # Define an instance of the MySQL cursor
+        cursor: MySQLCursor = cnx.cursor()
+
+        # Execute the defined query
+        cursor.execute(query, tuple(params))
+        rows: List[Tuple[Union[int, date, float], ...]] = cursor.fetchall()
+
+        if group_by == "day":
+            return [
+                {
+                    "day": str(day),
+                    "orders": orders,
+                    "units": units,
+                    "revenue": round(revenue, 2),
+                }
+                for day, orders, units, revenue in rows
+            ]
+
+        if group_by == "product":
+            return [
+                {"product_id": product_id, "units": units, "revenue": round(revenue, 2)}
+                for product_id, units, revenue in rows
+            ]
+
+        uom_names: Dict[int, str] = uom_dictionary.resolve(cnx, [r[0] for r in rows])
+        return [
+            {
+                "uom_id": uom_id,
+                "uom_name": uom_names.get(uom_id),
+                "units": units,
+                "revenue": round(revenue, 2),
+            }
+            for uom_id, units, revenue in rows
+        ]
+    except Error as e:
+        print(f"Error fetching sales: {e}")
+        return None
+
+
+def rebuild_rollups(cnx: MySQLConnection) -> int:
+    """
+    Rebuild the sales rollups from the whole order history,
+    in a single transaction. As in `record_order_sales()`, the sales
+    of a product count in the unit of measure it had when ordered,
+    kept on each order line.
+
+    Input:  cnx (MySQLConnection)   | a MySQL connection object
+    Output: the number of days with sales
+    Raises: mysql.connector.Error if the rollups could not be rebuilt
+    """
+    # Define an instance of the MySQL cursor
+    cursor: MySQLCursor = cnx.cursor()
+
+    queries: List[str] = [
+        "DELETE FROM sales_daily",
+        "DELETE FROM sales_daily_product",
+        "DELETE FROM sales_daily_uom",
+        "INSERT INTO sales_daily (day, orders, units, revenue) SELECT DATE(orders.date), COUNT(DISTINCT orders.order_id), SUM(order_details.quantity), SUM(order_details.total_price) FROM orders INNER JOIN order_details ON orders.order_id=order_details.order_id GROUP BY DATE(orders.date)",
+        "INSERT INTO sales_daily_product (day, product_id, units, revenue) SELECT DATE(orders.date), order_details.product_id, SUM(order_details.quantity), SUM(order_details.total_price) FROM orders INNER JOIN order_details ON orders.order_id=order_details.order_id GROUP BY DATE(orders.date), order_details.product_id",
+        "INSERT INTO sales_daily_uom (day, uom_id, units, revenue) SELECT DATE(orders.date), order_details.uom_id, SUM(order_details.quantity), SUM(order_details.total_price) FROM orders INNER JOIN order_details ON orders.order_id=order_details.order_id GROUP BY DATE(orders.date), order_details.uom_id",
+    ]
+
+    try:
+        for query in queries:
+            cursor.execute(query)
+        cursor.execute("SELECT COUNT(*) FROM sales_daily")
+        days: int = cursor.fetchone()[0]
+        cnx.commit()
+    except Error:
+        cnx.rollback()
+        raise
+
+    return days
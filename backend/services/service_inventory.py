@@ -0,0 +1,305 @@
+"""
+Inventory DAO (Data Access Object)
+
+The stock of a product is kept in the `inventory` table, with a version
+bumped by every change of the row. Products without a row are not tracked
+and never run out of stock.
+
+Orders never lock the stock rows to check them: the stock read along with
+the prices is only used to reject an order early, and the lines are then
+reserved by a single conditional UPDATE, which decrements each product
+only where enough stock is left. A stock row is thus locked from that
+UPDATE to the commit of the order, and concurrent orders of a popular
+product do not queue behind `SELECT ... FOR UPDATE` locks held across
+round trips. The rows are updated in product ID order, so that orders
+sharing several products always lock them in the same order and cannot
+deadlock.
+
+Stock changes made outside of orders are compare-and-set on the version:
+a change computed from a stale read is rejected, or retried.
+"""
+
+from typing import Dict, List, Optional, Tuple, Union
+
+from mysql.connector import Error, IntegrityError, MySQLConnection
+from mysql.connector.cursor import MySQLCursor
+
+from database.group_commit import run_write
+from services.metrics import INVENTORY_EVENTS
+
+
+class InsufficientStockError(ValueError):
+    """
+    Raised when an order or an adjustment needs more than the stock left.
+    """
+
+    def __init__(self, product_ids: List[int]) -> None:
+        super().__init__(
+            f"Insufficient stock for product: {', '.join(str(p) for p in product_ids)}"
+        )
+        self.product_ids: List[int] = product_ids
+
+
+class StockConflictError(Exception):
+    """
+    Raised when the stock of a product changed since it was read.
+    """
+
+    def __init__(self, current: Dict[str, Union[int, float]]) -> None:
+        super().__init__(f"Stock of product {current['product_id']} changed")
+        self.current: Dict[str, Union[int, float]] = current
+
+
+def case_expression(quantities: Dict[int, float]) -> Tuple[str, List[float]]:
+    """
+    Build a `CASE product_id WHEN ... END` expression
+    mapping each product to its quantity, with its parameters.
+    """
+    expression: str = (
+        "CASE product_id " + " ".join(["WHEN %s THEN %s"] * len(quantities)) + " END"
+    )
+    params: List[float] = [
+        value for item in sorted(quantities.items()) for value in item
+    ]
+
+    return expression, params
+
+
+def check_stock(
+    quantities: Dict[int, float], levels: Dict[int, Tuple[float, int]]
+) -> None:
+    """
+    Check the quantities of the lines of an order against the stock read
+    by the order, to reject it before it writes or locks anything.
+
+    Input:  quantities (dict)       | the quantity ordered of each product
+    Input:  levels (dict)           | the stock and version of the tracked products
+    Raises: InsufficientStockError if a product does not have enough stock
+    """
+    short: List[int] = [
+        product_id
+        for product_id, quantity in sorted(quantities.items())
+        if product_id in levels and levels[product_id][0] < quantity
+    ]
+    if short:
+        INVENTORY_EVENTS.inc("insufficient")
+        raise InsufficientStockError(short)
+
+
+def reserve_stock(
+    cursor: MySQLCursor,
+    quantities: Dict[int, float],
+    levels: Dict[int, Tuple[float, int]],
+) -> None:
+    """
+    Take the quantities of the lines of an order from the stock.
+    The caller owns the transaction: the stock is only taken
+    if the order is committed.
+
+    Input:  cursor (MySQLCursor)    | the cursor of the order transaction
+    Input:  quantities (dict)       | the quantity ordered of each product
+    Input:  levels (dict)           | the stock and version of the tracked products,
+                                      as read by the order
+    Raises: InsufficientStockError if a product does not have enough stock left
+    """
+    tracked: Dict[int, float] = {
+        product_id: quantity
+        for product_id, quantity in quantities.items()
+        if product_id in levels
+    }
+    if not tracked:
+        return
+
+    # Decrement all the products at once, where enough stock is left.
+    # The rows are matched in primary key order, hence locked in that order.
+    case, case_params = case_expression(tracked)
+    placeholders: str = ", ".join(["%s"] * len(tracked))
+    cursor.execute(
+        f"UPDATE inventory SET stock = stock - {case}, version = version + 1 WHERE product_id IN ({placeholders}) AND stock >= {case}",
+        (*case_params, *sorted(tracked), *case_params),
+    )
+
+    if cursor.rowcount < len(tracked):
+        # A concurrent order took the stock since it was read: the rows
+        # updated by this order are the ones whose version changed
+        cursor.execute(
+            f"SELECT product_id, version FROM inventory WHERE product_id IN ({placeholders})",
+            tuple(sorted(tracked)),
+        )
+        updated: List[int] = [
+            product_id
+            for product_id, version in cursor.fetchall()
+            if version != levels[product_id][1]
+        ]
+        INVENTORY_EVENTS.inc("insufficient")
+        raise InsufficientStockError([p for p in sorted(tracked) if p not in updated])
+
+    INVENTORY_EVENTS.inc("reserved")
+
+
+def get_inventory(
+    cnx: MySQLConnection, max_stock: Optional[float] = None, limit: int = 100
+) -> Optional[List[Dict[str, Union[int, str, float]]]]:
+    """
+    Fetch the stock of the tracked products, or only of the products
+    whose stock is at most `max_stock`, lowest stock first.
+    The low-stock query is a range scan of the index on the stock.
+
+    Input:  cnx (MySQLConnection)   | a MySQL connection object
+    Input:  max_stock (float)       | the highest stock to return
+    Input:  limit (int)             | the maximum number of products to return
+    Output: a list of dictionaries of stock levels or None
+    """
+    query: str = (
+        "SELECT inventory.product_id, products.name, inventory.stock, inventory.version FROM inventory "
+        "JOIN products ON products.product_id = inventory.product_id"
+    )
+    params: Tuple[Union[int, float], ...]
+    if max_stock is None:
+        query += " ORDER BY inventory.product_id LIMIT %s"
+        params = (limit,)
+    else:
+        query += " WHERE inventory.stock <= %s ORDER BY inventory.stock, inventory.product_id LIMIT %s"
+        params = (max_stock, limit)
+
+    try:
+        # Define an instance of the MySQL cursor
+        cursor: MySQLCursor = cnx.cursor()
+
+        # Execute the defined query
+        cursor.execute(query, params)
+
+        return [
+            {"product_id": product_id, "name": name, "stock": stock, "version": version}
+            for product_id, name, stock, version in cursor.fetchall()
+        ]
+    except Error as e:
+        print(f"Error fetching inventory: {e}")
+        return None
+
+
+def read_stock(
+    cnx: MySQLConnection, product_id: int
+) -> Optional[Dict[str, Union[int, float]]]:
+    """
+    Read the stock and version of a product, None if it is not tracked.
+    """
+    cursor: MySQLCursor = cnx.cursor()
+    cursor.execute(
+        "SELECT stock, version FROM inventory WHERE product_id = %s", (product_id,)
+    )
+    row: Optional[Tuple[float, int]] = cursor.fetchone()
+
+    if row is None:
+        return None
+
+    return {"product_id": product_id, "stock": row[0], "version": row[1]}
+
+
+def set_stock(
+    cnx: MySQLConnection,
+    product_id: int,
+    stock: float,
+    version: Optional[int] = None,
+) -> Optional[Dict[str, Union[int, float]]]:
+    """
+    Set the stock of a product, starting to track it if needed.
+    With a version, the stock is only set if the row still has that
+    version, as read by the caller.
+
+    Input:  cnx (MySQLConnection)   | a MySQL connection object
+    Input:  product_id (int)        | the ID of the product
+    Input:  stock (float)           | the new stock of the product
+    Input:  version (int)           | the version the stock was read at
+    Output: the new stock and version of the product,
+            or None if the product does not exist or is not tracked
+            while a version is given
+    Raises: StockConflictError if the row changed since the given version
+    """
+
+    def update(cnx: MySQLConnection) -> Optional[Dict[str, Union[int, float]]]:
+        cursor: MySQLCursor = cnx.cursor()
+
+        if version is None:
+            cursor.execute(
+                "INSERT INTO inventory (product_id, stock, version) VALUES (%s, %s, 0) ON DUPLICATE KEY UPDATE stock = VALUES(stock), version = version + 1",
+                (product_id, stock),
+            )
+        else:
+            cursor.execute(
+                "UPDATE inventory SET stock = %s, version = version + 1 WHERE product_id = %s AND version = %s",
+                (stock, product_id, version),
+            )
+            if cursor.rowcount == 0:
+                current: Optional[Dict[str, Union[int, float]]] = read_stock(
+                    cnx, product_id
+                )
+                if current is None:
+                    return None
+                INVENTORY_EVENTS.inc("conflict")
+                raise StockConflictError(current)
+
+        return read_stock(cnx, product_id)
+
+    try:
+        # Commit the stock, possibly along with other writes
+        return run_write(cnx, update)
+    except IntegrityError as e:
+        # The product does not exist
+        print(f"Error setting stock: {e}")
+        return None
+
+
+def adjust_stock(
+    cnx: MySQLConnection, product_id: int, delta: float, max_retries: int = 5
+) -> Optional[Dict[str, Union[int, float]]]:
+    """
+    Add a quantity to the stock of a product, or remove it if negative.
+
+    The stock is read without a lock and written back only if its version
+    did not change in the meantime, each attempt in its own transaction.
+    The change is retried on a conflict, up to `max_retries` times.
+
+    Input:  cnx (MySQLConnection)   | a MySQL connection object
+    Input:  product_id (int)        | the ID of the product
+    Input:  delta (float)           | the quantity to add to the stock
+    Input:  max_retries (int)       | the maximum number of retries
+    Output: the new stock and version of the product,
+            or None if the product is not tracked
+    Raises: InsufficientStockError if the stock would become negative,
+            StockConflictError if every attempt conflicted
+    """
+
+    def adjust(
+        cnx: MySQLConnection,
+    ) -> Tuple[bool, Optional[Dict[str, Union[int, float]]]]:
+        current: Optional[Dict[str, Union[int, float]]] = read_stock(cnx, product_id)
+        if current is None:
+            return True, None
+
+        stock: float = current["stock"] + delta
+        if stock < 0:
+            raise InsufficientStockError([product_id])
+
+        cursor: MySQLCursor = cnx.cursor()
+        cursor.execute(
+            "UPDATE inventory SET stock = %s, version = version + 1 WHERE product_id = %s AND version = %s",
+            (stock, product_id, current["version"]),
+        )
+        if cursor.rowcount == 0:
+            return False, current
+
+        return True, {
+            "product_id": product_id,
+            "stock": stock,
+            "version": current["version"] + 1,
+        }
+
+    for _ in range(max_retries + 1):
+        # Commit the stock, possibly along with other writes
+        done, result = run_write(cnx, adjust)
+        if done:
+            return result
+        INVENTORY_EVENTS.inc("conflict")
+
+    raise StockConflictError(result)
@@ -0,0 +1,244 @@
+"""
+Orders DAO (Data Access Object)
+"""
+
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Generator, List, Optional, Tuple, Union
+
+from mysql.connector import Error, MySQLConnection
+from mysql.connector.cursor import MySQLCursor
+
+from database.group_commit import run_write
+from services.service_analytics import record_order_sales
+from services.service_inventory import check_stock, reserve_stock
+from services.service_uom import uom_dictionary
+
+# Columns of the order history export, one row per line item
+ORDER_EXPORT_COLUMNS: Tuple[str, ...] = (
+    "order_id",
+    "customer_name",
+    "date",
+    "order_total",
+    "product_id",
+    "product_name",
+    "uom_id",
+    "uom_name",
+    "quantity",
+    "total_price",
+)
+
+
+def merge_order_items(
+    items: List[Dict[str, Union[int, float]]],
+) -> Dict[int, float]:
+    """
+    Merge the line items of an order by product.
+    An order holds a single line per product, so the quantities
+    of a product listed several times are added up.
+
+    Input:  items (list)    | a list of dictionaries with a product_id and a quantity
+    Output: a dictionary mapping each product ID to its total quantity
+    """
+    quantities: Dict[int, float] = {}
+
+    for item in items:
+        product_id: int = int(item["product_id"])
+        quantities[product_id] = quantities.get(product_id, 0) + float(item["quantity"])
+
+    return quantities
+
+
+def insert_order(
+    cnx: MySQLConnection,
+    order: Dict[str, Union[str, List[Dict[str, Union[int, float]]]]],
+) -> Optional[Dict[str, Union[int, str, float]]]:
+    """
+    Place a new order in the database.
+
+    The prices of all the line items are resolved with a single `IN (...)`
+    query, the totals are computed here, and the order header and all its
+    `order_details` rows are inserted in one transaction, the rows with a
+    single batched INSERT. The number of round trips does not depend on
+    the size of the basket. The stock of the tracked products is reserved
+    and the sales rollups are updated in the same transaction.
+
+    Input:  cnx (MySQLConnection)   | a MySQL connection object
+    Input:  order (dict)            | a dictionary with the customer_name and the
+                                      list of items (product_id and quantity)
+    Output: a dictionary with the order_id, the total and the date of the order
+            or None if the order could not be recorded
+    Raises: ValueError if an item references a product that does not exist,
+            InsufficientStockError if a tracked product is short of stock
+    """
+    quantities: Dict[int, float] = merge_order_items(order["items"])
+    product_ids: List[int] = list(quantities)
+
+    # Define the query string to retrieve the prices of all the items at once,
+    # along with the stock of the tracked products
+    placeholders: str = ", ".join(["%s"] * len(product_ids))
+    query: str = (
+        f"SELECT products.product_id, products.price_per_unit, products.uom_id, inventory.stock, inventory.version FROM products LEFT JOIN inventory ON inventory.product_id = products.product_id WHERE products.product_id IN ({placeholders})"
+    )
+
+    def place_order(cnx: MySQLConnection) -> Dict[str, Union[int, str, float]]:
+        # Define an instance of the MySQL cursor
+        cursor: MySQLCursor = cnx.cursor()
+
+        # Execute the defined query
+        cursor.execute(query, tuple(product_ids))
+        prices: Dict[int, float] = {}
+        uom_ids: Dict[int, int] = {}
+        levels: Dict[int, Tuple[float, int]] = {}
+        for product_id, price_per_unit, uom_id, stock, version in cursor.fetchall():
+            prices[product_id] = price_per_unit
+            uom_ids[product_id] = uom_id
+            if stock is not None:
+                levels[product_id] = (stock, version)
+
+        missing: List[int] = [p for p in product_ids if p not in prices]
+        if missing:
+            raise ValueError(f"Product not found: {', '.join(str(p) for p in missing)}")
+
+        # Reject the order early if the stock read is already short
+        check_stock(quantities, levels)
+
+        # Compute the price of each line and the total of the order,
+        # each line keeping the current unit of measure of its product
+        details: List[Tuple[int, int, float, float]] = [
+            (
+                product_id,
+                uom_ids[product_id],
+                quantity,
+                round(prices[product_id] * quantity, 2),
+            )
+            for product_id, quantity in sorted(quantities.items())
+        ]
+        total: float = round(sum(line[3] for line in details), 2)
+        date: datetime = datetime.now().replace(microsecond=0)
+
+        # Insert the order header
+        cursor.execute(
+            "INSERT INTO orders (customer_name, total, date) VALUES (%s, %s, %s)",
+            (order["customer_name"], total, date),
+        )
+        order_id: int = cursor.lastrowid
+
+        # Insert all the line items with one batched INSERT
+        cursor.executemany(
+            "INSERT INTO order_details (order_id, product_id, uom_id, quantity, total_price) VALUES (%s, %s, %s, %s, %s)",
+            [(order_id, *line) for line in details],
+        )
+
+        # Take the ordered quantities from the stock, late so that
+        # the stock rows stay locked for as short a time as possible
+        reserve_stock(cursor, quantities, levels)
+
+        # Add the order to the sales rollups, last so that the shared
+        # rollup rows stay locked for as short a time as possible
+        record_order_sales(cursor, date.date(), details)
+
+        return {
+            "order_id": order_id,
+            "customer_name": order["customer_name"],
+            "total": total,
+            "date": date.isoformat(),
+        }
+
+    try:
+        # Commit the order, possibly along with other writes
+        return run_write(cnx, place_order)
+    except Error as e:
+        print(f"Error inserting order: {e}")
+        return None
+
+
+def stream_order_lines(
+    cnx: MySQLConnection,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    batch_size: int = 10000,
+) -> Generator[List[Tuple[Any, ...]], None, None]:
+    """
+    Stream the line items of the orders placed between two days, in batches.
+
+    Rows are read from an unbuffered cursor with `fetchmany()`, so only
+    one batch of lines is held in memory at a time whatever the size
+    of the order history.
+
+    Input:  cnx (MySQLConnection)   | a MySQL connection object
+    Input:  date_from (date)        | the first day of the export, included
+    Input:  date_to (date)          | the last day of the export, included
+    Input:  batch_size (int)        | the number of lines per batch
+    Output: a generator of lists of tuples, with the ORDER_EXPORT_COLUMNS
+    """
+    conditions: List[str] = []
+    params: List[datetime] = []
+    if date_from is not None:
+        conditions.append("orders.date >= %s")
+        params.append(datetime.combine(date_from, datetime.min.time()))
+    if date_to is not None:
+        conditions.append("orders.date < %s")
+        params.append(
+            datetime.combine(date_to + timedelta(days=1), datetime.min.time())
+        )
+
+    # Define the query string to retrieve the line items with their order
+    query: str = (
+        "SELECT orders.order_id, orders.customer_name, orders.date, orders.total, order_details.product_id, products.name, order_details.uom_id, order_details.quantity, order_details.total_price "
+        "FROM orders "
+        "JOIN order_details ON order_details.order_id = orders.order_id "
+        "JOIN products ON products.product_id = order_details.product_id"
+        + (" WHERE " + " AND ".join(conditions) if conditions else "")
+        + " ORDER BY orders.order_id, order_details.product_id"
+    )
+
+    # Load the UOM dictionary up front: no other query can run
+    # on the connection while the unbuffered rows are pending
+    uom_names: Dict[int, str] = uom_dictionary.get_names(cnx)
+
+    # Define an instance of an unbuffered MySQL cursor,
+    # rows are pulled from the server as they are fetched
+    cursor: MySQLCursor = cnx.cursor(buffered=False)
+
+    try:
+        # Execute the defined query
+        cursor.execute(query, tuple(params))
+
+        while rows := cursor.fetchmany(batch_size):
+            yield [
+                (
+                    order_id,
+                    customer_name,
+                    # SQLite returns the dates as strings
+                    (
+                        datetime.fromisoformat(order_date)
+                        if isinstance(order_date, str)
+                        else order_date
+                    ),
+                    total,
+                    product_id,
+                    name,
+                    uom_id,
+                    uom_names.get(uom_id),
+                    quantity,
+                    total_price,
+                )
+                for (
+                    order_id,
+                    customer_name,
+                    order_date,
+                    total,
+                    product_id,
+                    name,
+                    uom_id,
+                    quantity,
+                    total_price,
+                ) in rows
+            ]
+    finally:
+        try:
+            cursor.close()
+        except Error:
+            # The stream was abandoned with rows still pending,
+            # the pool drops the connection when it is released
+            pass
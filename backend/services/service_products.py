@@ -2,11 +2,264 @@
 Products DAO (Data Access Object)
 """
 
-from typing import Dict, List, Optional, Tuple, Union
+import os
+import threading
+import time
+from typing import Dict, Generator, List, Optional, Tuple, Union
 
 from mysql.connector import Error, MySQLConnection
 from mysql.connector.cursor import MySQLCursor
 
+from database.group_commit import run_write
+from database.sql_connection import is_replica_connection
+from database.statement_cache import prepared_cursor
+from services import compression
+from services.cache import LRUCache, SharedVersion, VersionCounter
+from services.search_index import SearchIndex
+from services.serialization import dumps
+from services.service_uom import uom_dictionary
+
+# Read-through cache in front of the product reads.
+# The full list is stored under `ALL_PRODUCTS_KEY`
+# and each product under `("product", product_id)`.
+# It is only filled by the reads of the primary, see `cache_read()`.
+product_cache: LRUCache = LRUCache(ttl=60.0, max_entries=1024, max_bytes=16 << 20)
+
+# Cache key of the full list of products
+ALL_PRODUCTS_KEY: Tuple[str] = ("all",)
+
+# Cache key of the full list of products encoded as JSON.
+# Each product is also cached encoded under `("product_json", product_id)`.
+ALL_PRODUCTS_JSON_KEY: Tuple[str] = ("all_json",)
+
+# Cache keys of the encoded list of products compressed with each encoding
+ALL_PRODUCTS_COMPRESSED_KEYS: Dict[str, Tuple[str, str]] = {
+    encoding: ("all_json", encoding) for encoding in compression.ENCODINGS
+}
+
+# JSON encoding of an empty list of products
+EMPTY_LIST_JSON: bytes = b"[]"
+
+# Version of the catalog, bumped on every product write.
+# It drives the `ETag` and `Last-Modified` headers of the product reads.
+catalog_version: VersionCounter = VersionCounter()
+
+# Version of the catalog shared by the processes serving the app, kept in
+# the `catalog_version` table and bumped after every product write, see
+# `bump_shared_version()`. Each process reads it at most once per
+# `CATALOG_SYNC_INTERVAL` seconds, and drops its cached products when
+# it moved, see `sync_catalog()`.
+shared_catalog_version: SharedVersion = SharedVersion()
+
+# In-memory index of the product names, built from the products table
+# on the first search and kept up to date by the product writes.
+# It is rebuilt when it is older than `SEARCH_REFRESH_INTERVAL` seconds
+# to pick up the writes made by other processes.
+product_index: SearchIndex = SearchIndex()
+SEARCH_REFRESH_INTERVAL: float = 300.0
+_index_build_lock: threading.Lock = threading.Lock()
+
+
+def cache_read(
+    cnx: MySQLConnection, key: Tuple[str, ...], value: object, generation: int
+) -> None:
+    """
+    Cache a value read from the database, unless it was read from a replica.
+    A replica may lag behind the primary: its rows would be served from the
+    cache to every client, including those reading their own writes.
+
+    Input:  cnx (MySQLConnection)   | the connection the value was read from
+    Input:  key (tuple)             | the cache key
+    Input:  value (object)          | the value to cache
+    Input:  generation (int)        | the cache generation read before the value
+    """
+    if not is_replica_connection(cnx):
+        product_cache.set(key, value, generation)
+
+
+def bump_shared_version(cnx: MySQLConnection) -> None:
+    """
+    Bump the catalog version shared by the processes once a product write
+    is committed, so that the other processes drop their cached products.
+
+    The version is bumped in a transaction of its own: its row is only locked
+    for this one statement, and not for the whole product write, which would
+    serialize the product writes of every process. A process reading the
+    products between the write and the bump drops them on its next sync.
+
+    Input:  cnx (MySQLConnection)   | a connection to the primary, with no open write
+    """
+    try:
+        # Define an instance of the MySQL cursor
+        cursor: MySQLCursor = cnx.cursor()
+
+        # Bump the shared version and release its row right away
+        cursor.execute("UPDATE catalog_version SET version = version + 1 WHERE id = 1")
+        cnx.commit()
+    except Error as e:
+        print(f"Error bumping catalog version: {e}")
+        cnx.rollback()
+
+
+def sync_catalog(cnx: MySQLConnection) -> None:
+    """
+    Read the catalog version shared by the processes and, when it moved
+    since the last read, drop every cached product, since another process
+    may have written them. The writes of this process move it as well,
+    and clear the cache once more.
+
+    Input:  cnx (MySQLConnection)   | a connection to the primary
+    """
+    try:
+        # Define an instance of the MySQL cursor
+        cursor: MySQLCursor = cnx.cursor()
+
+        # Read the shared version
+        cursor.execute("SELECT version FROM catalog_version WHERE id = 1")
+        row: Optional[Tuple[int]] = cursor.fetchone()
+    except Error as e:
+        print(f"Error reading catalog version: {e}")
+        return
+
+    if row is not None and shared_catalog_version.observe(row[0]):
+        invalidate_catalog()
+
+
+def reset_after_fork() -> None:
+    """
+    Start a forked process with an empty cache, a search index to build and
+    a catalog version of its own: the process writes the catalog independently
+    of its parent and siblings, and only learns about their writes from
+    the shared version.
+    """
+    product_cache.reset()
+    product_index.built_at = None
+    catalog_version.reset()
+    shared_catalog_version.reset()
+
+
+# The cache, the search index and the catalog version are per process
+os.register_at_fork(after_in_child=reset_after_fork)
+
+
+def invalidate_products(*product_ids: int) -> None:
+    """
+    Drop the given products and the full list of products from the cache,
+    along with their JSON encoding and its compressed versions,
+    and bump the catalog version.
+
+    Input:  product_ids (int)   | the IDs of the products that were written
+    """
+    product_cache.invalidate(
+        ALL_PRODUCTS_KEY,
+        ALL_PRODUCTS_JSON_KEY,
+        *ALL_PRODUCTS_COMPRESSED_KEYS.values(),
+        *(("product", product_id) for product_id in product_ids),
+        *(("product_json", product_id) for product_id in product_ids),
+    )
+    catalog_version.bump()
+
+
+def index_products(
+    products: Dict[int, Optional[Dict[str, Union[int, str, float]]]],
+) -> None:
+    """
+    Apply product writes to the search index, if it is already built.
+    Otherwise the writes are picked up when the index gets built.
+
+    Input:  products (dict)     | the written products by ID,
+                                  None for the deleted ones
+    """
+    if product_index.built_at is None:
+        return
+
+    for product_id, product in products.items():
+        if product is None:
+            product_index.remove(product_id)
+        else:
+            product_index.upsert(
+                product_id,
+                str(product["name"]),
+                {
+                    "product_id": product_id,
+                    "name": product["name"],
+                    "uom_id": product["uom_id"],
+                    "price_per_unit": product["price_per_unit"],
+                },
+            )
+
+
+def build_product_index(cnx: MySQLConnection, batch_size: int = 1000) -> None:
+    """
+    Build the search index from the products table.
+
+    Input:  cnx (MySQLConnection)   | a MySQL connection object
+    Input:  batch_size (int)        | the number of rows fetched per round trip
+    Raises: mysql.connector.Error if the products could not be read
+    """
+    # Define an instance of the MySQL cursor
+    cursor: MySQLCursor = cnx.cursor()
+
+    # Execute the query fetching the indexed fields of all the products
+    cursor.execute("SELECT product_id, name, uom_id, price_per_unit FROM products")
+
+    documents: List[Tuple[int, str, Dict[str, Union[int, str, float]]]] = []
+    while rows := cursor.fetchmany(batch_size):
+        documents.extend(
+            (
+                product_id,
+                name,
+                {
+                    "product_id": product_id,
+                    "name": name,
+                    "uom_id": uom_id,
+                    "price_per_unit": price_per_unit,
+                },
+            )
+            for product_id, name, uom_id, price_per_unit in rows
+        )
+
+    product_index.build(documents)
+
+
+def search_products(
+    cnx: MySQLConnection, query: str, limit: int = 10
+) -> Optional[List[Dict[str, Union[int, str, float]]]]:
+    """
+    Search the products by name in the in-memory search index.
+    The index is built on the first search and rebuilt when it gets too old,
+    so the database is only read on those occasions.
+
+    Input:  cnx (MySQLConnection)   | a MySQL connection object
+    Input:  query (str)             | the text to search for
+    Input:  limit (int)             | the maximum number of products to return
+    Output: a list of dictionaries of products, best match first, or None
+    """
+    try:
+        built_at: Optional[float] = product_index.built_at
+        if built_at is None or time.monotonic() - built_at >= SEARCH_REFRESH_INTERVAL:
+            with _index_build_lock:
+                # Another request may have built the index in the meantime
+                if product_index.built_at == built_at:
+                    build_product_index(cnx)
+
+        products: List[Dict[str, Union[int, str, float]]] = product_index.search(
+            query, limit
+        )
+
+        # Get the names of the units of measure used by the products
+        uom_names: Dict[int, str] = uom_dictionary.resolve(
+            cnx, {product["uom_id"] for product in products}
+        )
+    except Error as e:
+        print(f"Error searching products: {e}")
+        return None
+
+    return [
+        {**product, "uom_name": uom_names.get(product["uom_id"])}
+        for product in products
+    ]
+
 
 def get_all_products(
     cnx: MySQLConnection,
@@ -17,18 +270,33 @@ def get_all_products(
     Input:  cnx (MySQLConnection)     | a MySQL connection object
     Output: a list of dictionaries of products or None
     """
-    # Define a string as a query to fetch all the products from the database
-    # and join with each product with its corresponding Unit of Measure (uom)
+    # Serve the list from the cache when it is there
+    cached: Optional[List[Dict[str, Union[int, str, float]]]] = product_cache.get(
+        ALL_PRODUCTS_KEY
+    )
+    if cached is not None:
+        return cached
+
+    # Remember the cache generation before reading from the database
+    generation: int = product_cache.generation
+
+    # Define a string as a query to fetch all the products from the database.
+    # The name of the Unit of Measure (uom) of each product is resolved
+    # from the in-memory UOM dictionary instead of joining the uom table.
     query: str = (
-        "SELECT products.product_id, products.name, products.uom_id, products.price_per_unit, uom.uom_name FROM products INNER JOIN uom ON products.uom_id=uom.uom_id"
+        "SELECT products.product_id, products.name, products.uom_id, products.price_per_unit FROM products"
     )
 
     try:
-        # Define an instance of the MySQL cursor
-        cursor: MySQLCursor = cnx.cursor()
+        # Get the cursor with the query prepared on this connection
+        cursor: MySQLCursor = prepared_cursor(cnx, query)
 
         # Execute the defined query
         cursor.execute(query)
+        rows: List[Tuple[int, str, int, float]] = cursor.fetchall()
+
+        # Get the names of the units of measure used by the products
+        uom_names: Dict[int, str] = uom_dictionary.resolve(cnx, {r[2] for r in rows})
 
         # Define a list of dictionaries to hold all the products
         # Dictonary keys should be strings
@@ -37,23 +305,245 @@ def get_all_products(
 
         # Traverse records (tuples) and append elements as dictionaries
         # into the predefined products list
-        for product_id, name, uom_id, price_per_unit, uom_name in cursor:
+        for product_id, name, uom_id, price_per_unit in rows:
             products.append(
                 {
                     "product_id": product_id,
                     "name": name,
                     "uom_id": uom_id,
                     "price_per_unit": price_per_unit,
-                    "uom_name": uom_name,
+                    "uom_name": uom_names.get(uom_id),
                 }
             )
 
+        cache_read(cnx, ALL_PRODUCTS_KEY, products, generation)
+
         return products
     except Error as e:
         print(f"Error fetching products: {e}")
         return None
 
 
+def get_all_products_json(cnx: MySQLConnection) -> Optional[bytes]:
+    """
+    Fetch all the products encoded as a JSON array.
+    The encoded bytes are cached, so that the catalog is only encoded
+    again after a product write.
+
+    Input:  cnx (MySQLConnection)   | a MySQL connection object
+    Output: the JSON bytes of the list of products or None
+    """
+    cached: Optional[bytes] = product_cache.get(ALL_PRODUCTS_JSON_KEY)
+    if cached is not None:
+        return cached
+
+    # Remember the cache generation before reading the products
+    generation: int = product_cache.generation
+
+    products: Optional[List[Dict[str, Union[int, str, float]]]] = get_all_products(cnx)
+    if products is None:
+        return None
+
+    encoded: bytes = dumps(products)
+    cache_read(cnx, ALL_PRODUCTS_JSON_KEY, encoded, generation)
+
+    return encoded
+
+
+def get_all_products_compressed(cnx: MySQLConnection, encoding: str) -> Optional[bytes]:
+    """
+    Fetch all the products encoded as a JSON array and compressed.
+    The compressed bytes are cached next to the encoded ones, so that
+    the catalog is only compressed again after a product write.
+
+    Input:  cnx (MySQLConnection)   | a MySQL connection object
+    Input:  encoding (str)          | the encoding, one of compression.ENCODINGS
+    Output: the compressed JSON bytes of the list of products or None
+    """
+    key: Tuple[str, str] = ALL_PRODUCTS_COMPRESSED_KEYS[encoding]
+    cached: Optional[bytes] = product_cache.get(key)
+    if cached is not None:
+        return cached
+
+    # Remember the cache generation before reading the products
+    generation: int = product_cache.generation
+
+    encoded: Optional[bytes] = get_all_products_json(cnx)
+    if encoded is None:
+        return None
+
+    compressed: bytes = compression.compress(encoded, encoding)
+    cache_read(cnx, key, compressed, generation)
+
+    return compressed
+
+
+def stream_all_products(
+    cnx: MySQLConnection, batch_size: int = 500
+) -> Generator[List[Dict[str, Union[int, str, float]]], None, None]:
+    """
+    Stream all the products from the MySQL database in batches.
+
+    Rows are read from an unbuffered cursor with `fetchmany()`, so only
+    one batch of products is held in memory at a time whatever the size
+    of the catalog.
+
+    Input:  cnx (MySQLConnection)   | a MySQL connection object
+    Input:  batch_size (int)        | the number of products per batch
+    Output: a generator of lists of dictionaries of products
+    """
+    # Define a string as a query to fetch all the products from the database.
+    # The name of the Unit of Measure (uom) of each product is resolved
+    # from the in-memory UOM dictionary instead of joining the uom table.
+    query: str = (
+        "SELECT products.product_id, products.name, products.uom_id, products.price_per_unit FROM products ORDER BY products.product_id"
+    )
+
+    # Load the UOM dictionary up front: no other query can run
+    # on the connection while the unbuffered rows are pending
+    uom_names: Dict[int, str] = uom_dictionary.get_names(cnx)
+
+    # Define an instance of an unbuffered MySQL cursor,
+    # rows are pulled from the server as they are fetched
+    cursor: MySQLCursor = cnx.cursor(buffered=False)
+
+    try:
+        # Execute the defined query
+        cursor.execute(query)
+
+        while rows := cursor.fetchmany(batch_size):
+            yield [
+                {
+                    "product_id": product_id,
+                    "name": name,
+                    "uom_id": uom_id,
+                    "price_per_unit": price_per_unit,
+                    "uom_name": uom_names.get(uom_id),
+                }
+                for product_id, name, uom_id, price_per_unit in rows
+            ]
+    finally:
+        try:
+            cursor.close()
+        except Error:
+            # The stream was abandoned with rows still pending,
+            # the pool drops the connection when it is released
+            pass
+
+
+# Fields that can be selected through a field projection.
+# All of them are columns of the products table but `uom_name`,
+# which is resolved from the in-memory UOM dictionary.
+PRODUCT_FIELDS: Tuple[str, ...] = (
+    "product_id",
+    "name",
+    "uom_id",
+    "price_per_unit",
+    "uom_name",
+)
+
+
+def get_products_page(
+    cnx: MySQLConnection,
+    limit: Optional[int] = None,
+    after: Optional[int] = None,
+    uom_id: Optional[int] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    fields: Optional[List[str]] = None,
+) -> Optional[Tuple[List[Dict[str, Union[int, str, float]]], Optional[int]]]:
+    """
+    Fetch a page of products from the MySQL database.
+
+    Pagination uses the primary key as a keyset: the page starts right after
+    the `after` product ID, so every page costs the same whatever its position.
+    Filters and the field projection are pushed down into the SQL query,
+    and `uom_name` is resolved from the in-memory UOM dictionary.
+
+    Input:  cnx (MySQLConnection)   | a MySQL connection object
+    Input:  limit (int)             | the maximum number of products in the page
+    Input:  after (int)             | the ID of the last product of the previous page
+    Input:  uom_id (int)            | only return products with this unit of measure
+    Input:  min_price (float)       | only return products at or above this price
+    Input:  max_price (float)       | only return products at or below this price
+    Input:  fields (list)           | the fields to return, defaults to all of them
+    Output: a tuple (list of dictionaries of products, ID to resume after or None)
+            or None
+    """
+    projected: bool = bool(fields)
+    fields = fields or list(PRODUCT_FIELDS)
+
+    # The product ID is always selected since it is the pagination key,
+    # and the UOM ID is needed to resolve the name of the unit of measure
+    columns: List[str] = ["product_id"] + [
+        f for f in fields if f not in ("product_id", "uom_name")
+    ]
+    if "uom_name" in fields and "uom_id" not in columns:
+        columns.append("uom_id")
+
+    # Build the query from the requested fields and filters
+    query: str = "SELECT " + ", ".join(f"products.{c}" for c in columns)
+    query += " FROM products"
+
+    conditions: List[str] = []
+    params: List[Union[int, float]] = []
+    if after is not None:
+        conditions.append("products.product_id > %s")
+        params.append(after)
+    if uom_id is not None:
+        conditions.append("products.uom_id = %s")
+        params.append(uom_id)
+    if min_price is not None:
+        conditions.append("products.price_per_unit >= %s")
+        params.append(min_price)
+    if max_price is not None:
+        conditions.append("products.price_per_unit <= %s")
+        params.append(max_price)
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+
+    query += " ORDER BY products.product_id"
+    if limit is not None:
+        # Fetch one extra row to know whether there is a next page
+        query += " LIMIT %s"
+        params.append(limit + 1)
+
+    try:
+        # Define an instance of the MySQL cursor
+        cursor: MySQLCursor = cnx.cursor()
+
+        # Execute the defined query
+        cursor.execute(query, tuple(params))
+
+        rows: List[Tuple[Union[int, str, float], ...]] = cursor.fetchall()
+
+        next_after: Optional[int] = None
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            next_after = rows[-1][0]
+
+        products: List[Dict[str, Union[int, str, float]]] = [
+            dict(zip(columns, row)) for row in rows
+        ]
+
+        if "uom_name" in fields:
+            # Get the names of the units of measure used by the products
+            uom_names: Dict[int, str] = uom_dictionary.resolve(
+                cnx, {product["uom_id"] for product in products}
+            )
+            for product in products:
+                product["uom_name"] = uom_names.get(product["uom_id"])
+    except Error as e:
+        print(f"Error fetching products: {e}")
+        return None
+
+    # Only keep the requested fields
+    if projected:
+        products = [{f: product[f] for f in fields} for product in products]
+
+    return products, next_after
+
+
 def get_single_product(
     cnx: MySQLConnection, product_id: int
 ) -> Optional[Dict[str, Union[int, str, float]]]:
@@ -64,12 +554,22 @@ def get_single_product(
     Input:  product_id (int)        | the ID of the product to update
     Output: a dictionary containing the product details if found or None
     """
+    # Serve the product from the cache when it is there
+    cached: Optional[Dict[str, Union[int, str, float]]] = product_cache.get(
+        ("product", product_id)
+    )
+    if cached is not None:
+        return cached
+
+    # Remember the cache generation before reading from the database
+    generation: int = product_cache.generation
+
     # Define the query string to retrieve the product needed
     query: str = "SELECT * FROM products WHERE products.product_id = %s"
 
     try:
-        # Define an instance of the MySQL cursor
-        cursor: MySQLCursor = cnx.cursor(dictionary=True)
+        # Get the cursor with the query prepared on this connection
+        cursor: MySQLCursor = prepared_cursor(cnx, query, dictionary=True)
 
         # Execute the defined query
         cursor.execute(query, (product_id,))
@@ -77,12 +577,43 @@ def get_single_product(
         # Fetch the selected product
         product: Dict[str, Union[int, str, float]] = cursor.fetchone()
 
+        if product is not None:
+            cache_read(cnx, ("product", product_id), product, generation)
+
         return product
     except Error as e:
         print(f"Error fetching product: {e}")
         return None
 
 
+def get_single_product_json(cnx: MySQLConnection, product_id: int) -> Optional[bytes]:
+    """
+    Retrieves a single product encoded as a JSON object.
+    The encoded bytes are cached until the product is written.
+
+    Input:  cnx (MySQLConnection)   | a MySQL connection object
+    Input:  product_id (int)        | the ID of the product to fetch
+    Output: the JSON bytes of the product if found or None
+    """
+    cached: Optional[bytes] = product_cache.get(("product_json", product_id))
+    if cached is not None:
+        return cached
+
+    # Remember the cache generation before reading the product
+    generation: int = product_cache.generation
+
+    product: Optional[Dict[str, Union[int, str, float]]] = get_single_product(
+        cnx, product_id
+    )
+    if product is None:
+        return None
+
+    encoded: bytes = dumps(product)
+    cache_read(cnx, ("product_json", product_id), encoded, generation)
+
+    return encoded
+
+
 def insert_new_product(
     cnx: MySQLConnection, product: Dict[str, Union[int, str, float]]
 ) -> Optional[int]:
@@ -93,9 +624,6 @@ def insert_new_product(
     Input:  product (dict)          | a dictionary representing the product to insert
     Output: the number of records into the table or None
     """
-    # Define an instance of the MySQL cursor
-    cursor: MySQLCursor = cnx.cursor()
-
     # Define a string representing a query
     # to insert a new product into the database
     query: str = (
@@ -110,11 +638,75 @@ def insert_new_product(
         product["price_per_unit"],
     )
 
-    # Execute the query with the corresponding data
-    cursor.execute(query, data)
-    cnx.commit()
+    def insert(cnx: MySQLConnection) -> int:
+        # Get the cursor with the query prepared on this connection
+        cursor: MySQLCursor = prepared_cursor(cnx, query)
+
+        # Execute the query with the corresponding data
+        cursor.execute(query, data)
+
+        return cursor.lastrowid
+
+    def on_commit(product_id: int) -> None:
+        invalidate_products(product_id)
+        index_products({product_id: product})
+
+    # Commit the insertion, possibly along with other writes
+    product_id: int = run_write(cnx, insert, on_commit)
+    bump_shared_version(cnx)
 
-    return cursor.lastrowid
+    return product_id
+
+
+def insert_products_batch(
+    cnx: MySQLConnection, products: List[Dict[str, Union[int, str, float]]]
+) -> List[int]:
+    """
+    Insert a batch of products into the database in a single transaction.
+
+    The rows are sent with `executemany()`, which the connector rewrites
+    into one multi-row INSERT statement, and committed together.
+    InnoDB hands out consecutive auto-increment values to such a statement,
+    so the IDs of the batch follow the first one reported by `lastrowid`.
+
+    Input:  cnx (MySQLConnection)   | a MySQL connection object
+    Input:  products (list)         | a list of dictionaries representing the products
+    Output: the list of the IDs of the inserted products
+    Raises: mysql.connector.Error if the batch could not be inserted,
+            in which case none of its rows are kept
+    """
+    # Define an instance of the MySQL cursor
+    cursor: MySQLCursor = cnx.cursor()
+
+    # Define a string representing a query
+    # to insert a new product into the database
+    query: str = (
+        "INSERT INTO products (name, uom_id, price_per_unit) VALUES (%s, %s, %s)"
+    )
+
+    data: List[Tuple[Union[int, str, float], ...]] = [
+        (product["name"], product["uom_id"], product["price_per_unit"])
+        for product in products
+    ]
+
+    try:
+        # Execute the query once for the whole batch
+        cursor.executemany(query, data)
+        cnx.commit()
+    except Error:
+        cnx.rollback()
+        raise
+
+    bump_shared_version(cnx)
+
+    product_ids: List[int] = list(
+        range(cursor.lastrowid, cursor.lastrowid + cursor.rowcount)
+    )
+
+    invalidate_products(*product_ids)
+    index_products(dict(zip(product_ids, products)))
+
+    return product_ids
 
 
 def update_product(
@@ -130,9 +722,6 @@ def update_product(
     Input:  updated_data (dict)     | a dictionary representing the updated product data
     Output: the number of records affected
     """
-    # Define an instance of the MySQL cursor
-    cursor: MySQLCursor = cnx.cursor()
-
     # Construct the SQL query for updating the product
     query: str = (
         "UPDATE products SET name = %s, uom_id = %s, price_per_unit = %s WHERE product_id = %s"
@@ -145,11 +734,26 @@ def update_product(
         product_id,
     )
 
-    # Execute the query with the corresponding data
-    cursor.execute(query, data)
-    cnx.commit()
+    def update(cnx: MySQLConnection) -> int:
+        # Get the cursor with the query prepared on this connection
+        cursor: MySQLCursor = prepared_cursor(cnx, query)
+
+        # Execute the query with the corresponding data
+        cursor.execute(query, data)
+
+        return cursor.rowcount
+
+    def on_commit(rows_affected: int) -> None:
+        invalidate_products(product_id)
+        if rows_affected > 0:
+            index_products({product_id: updated_data})
+
+    # Commit the update, possibly along with other writes
+    rows_affected: int = run_write(cnx, update, on_commit)
+    if rows_affected > 0:
+        bump_shared_version(cnx)
 
-    return cursor.rowcount
+    return rows_affected
 
 
 def delete_product(cnx: MySQLConnection, product_id: int) -> int:
@@ -160,14 +764,281 @@ def delete_product(cnx: MySQLConnection, product_id: int) -> int:
     Input:  product_id (int)        | the ID of the product to delete
     Output: the number of records affected
     """
+    # Construct the SQL query for deleting the product
+    query: str = "DELETE FROM products WHERE product_id = %s"
+
+    def delete(cnx: MySQLConnection) -> int:
+        # Get the cursor with the query prepared on this connection
+        cursor: MySQLCursor = prepared_cursor(cnx, query)
+
+        # Execute the query with the corresponding product_id
+        cursor.execute(query, (product_id,))
+
+        return cursor.rowcount
+
+    def on_commit(rows_affected: int) -> None:
+        invalidate_products(product_id)
+        index_products({product_id: None})
+
+    # Commit the deletion, possibly along with other writes
+    rows_affected: int = run_write(cnx, delete, on_commit)
+    if rows_affected > 0:
+        bump_shared_version(cnx)
+
+    return rows_affected
+
+
+def invalidate_catalog() -> None:
+    """
+    Drop every product from the cache, mark the search index for a rebuild
+    and bump the catalog version, after a write whose rows are not known.
+    """
+    product_cache.clear()
+    product_index.built_at = None
+    catalog_version.bump()
+
+
+def batched_ids(product_ids: List[int], batch_size: int) -> List[List[int]]:
+    """
+    Split a list of product IDs into sorted batches of at most `batch_size` IDs.
+    Sorting makes concurrent writes lock the rows in the same order.
+    """
+    ordered: List[int] = sorted(set(product_ids))
+
+    return [
+        ordered[start : start + batch_size]
+        for start in range(0, len(ordered), batch_size)
+    ]
+
+
+def get_products_by_ids(
+    cnx: MySQLConnection, product_ids: List[int]
+) -> Optional[List[Dict[str, Union[int, str, float]]]]:
+    """
+    Fetch the products with the given IDs with a single IN query.
+
+    Input:  cnx (MySQLConnection)   | a MySQL connection object
+    Input:  product_ids (list)      | the IDs of the products to fetch
+    Output: a list of dictionaries of the products found, in the order
+            of the requested IDs, or None
+    """
+    ordered: List[int] = list(dict.fromkeys(product_ids))
+    if not ordered:
+        return []
+
+    # Define the query string with one placeholder per ID
+    query: str = (
+        "SELECT product_id, name, uom_id, price_per_unit FROM products WHERE product_id IN ("
+        + ", ".join(["%s"] * len(ordered))
+        + ")"
+    )
+
+    try:
+        # Define an instance of the MySQL cursor
+        cursor: MySQLCursor = cnx.cursor()
+
+        # Execute the defined query
+        cursor.execute(query, tuple(ordered))
+        rows: Dict[int, Tuple[int, str, int, float]] = {
+            row[0]: row for row in cursor.fetchall()
+        }
+
+        # Get the names of the units of measure used by the products
+        uom_names: Dict[int, str] = uom_dictionary.resolve(
+            cnx, {row[2] for row in rows.values()}
+        )
+    except Error as e:
+        print(f"Error fetching products: {e}")
+        return None
+
+    return [
+        {
+            "product_id": product_id,
+            "name": name,
+            "uom_id": uom_id,
+            "price_per_unit": price_per_unit,
+            "uom_name": uom_names.get(uom_id),
+        }
+        for product_id, name, uom_id, price_per_unit in (
+            rows[i] for i in ordered if i in rows
+        )
+    ]
+
+
+# Fields that a set-based update can assign, and multiply
+UPDATABLE_FIELDS: Tuple[str, ...] = ("uom_id", "price_per_unit")
+MULTIPLIABLE_FIELDS: Tuple[str, ...] = ("price_per_unit",)
+
+
+def update_product_prices(
+    cnx: MySQLConnection, prices: Dict[int, float], batch_size: int = 1000
+) -> int:
+    """
+    Set the price of each given product, with one UPDATE statement
+    per batch of products, all in a single transaction.
+
+    Input:  cnx (MySQLConnection)   | a MySQL connection object
+    Input:  prices (dict)           | the new price of each product by ID
+    Input:  batch_size (int)        | the number of products per statement
+    Output: the number of records affected
+    Raises: mysql.connector.Error if the prices could not be updated,
+            in which case none of them are
+    """
     # Define an instance of the MySQL cursor
     cursor: MySQLCursor = cnx.cursor()
+    rows_affected: int = 0
 
-    # Construct the SQL query for deleting the product
-    query: str = "DELETE FROM products WHERE product_id = %s"
+    try:
+        for batch in batched_ids(list(prices), batch_size):
+            # Set each price with a CASE expression over the product IDs
+            query: str = (
+                "UPDATE products SET price_per_unit = CASE product_id "
+                + " ".join(["WHEN %s THEN %s"] * len(batch))
+                + " END WHERE product_id IN ("
+                + ", ".join(["%s"] * len(batch))
+                + ")"
+            )
+            data: List[Union[int, float]] = [
+                value for i in batch for value in (i, prices[i])
+            ] + batch
+
+            cursor.execute(query, tuple(data))
+            rows_affected += cursor.rowcount
+        cnx.commit()
+    except Error:
+        cnx.rollback()
+        raise
+
+    bump_shared_version(cnx)
+
+    invalidate_catalog()
+
+    return rows_affected
+
+
+def update_products_where(
+    cnx: MySQLConnection,
+    assignments: Dict[str, Union[int, float]],
+    multipliers: Dict[str, float],
+    product_ids: Optional[List[int]] = None,
+    uom_id: Optional[int] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    batch_size: int = 1000,
+) -> int:
+    """
+    Update the products matching the filters in a single transaction,
+    with one UPDATE statement (per batch of IDs when IDs are given).
+    Without any filter, every product is updated.
+
+    Input:  cnx (MySQLConnection)   | a MySQL connection object
+    Input:  assignments (dict)      | the new value of fields of UPDATABLE_FIELDS
+    Input:  multipliers (dict)      | the factor applied to fields of MULTIPLIABLE_FIELDS
+    Input:  product_ids (list)      | only update the products with these IDs
+    Input:  uom_id (int)            | only update products with this unit of measure
+    Input:  min_price (float)       | only update products at or above this price
+    Input:  max_price (float)       | only update products at or below this price
+    Input:  batch_size (int)        | the number of IDs per statement
+    Output: the number of records affected
+    Raises: ValueError if a field cannot be updated,
+            mysql.connector.Error if the products could not be updated,
+            in which case none of them are
+    """
+    unknown: List[str] = [f for f in assignments if f not in UPDATABLE_FIELDS] + [
+        f for f in multipliers if f not in MULTIPLIABLE_FIELDS
+    ]
+    if unknown:
+        raise ValueError(f"Fields cannot be updated: {', '.join(unknown)}")
+    if not assignments and not multipliers:
+        raise ValueError("Nothing to update")
+
+    # Build the SET clause, multiplied prices are rounded to the cent
+    changes: List[str] = [f"{field} = %s" for field in assignments] + [
+        f"{field} = ROUND({field} * %s, 2)" for field in multipliers
+    ]
+    values: List[Union[int, float]] = list(assignments.values()) + list(
+        multipliers.values()
+    )
+
+    # Build the WHERE clause from the filters
+    conditions: List[str] = []
+    params: List[Union[int, float]] = []
+    if uom_id is not None:
+        conditions.append("uom_id = %s")
+        params.append(uom_id)
+    if min_price is not None:
+        conditions.append("price_per_unit >= %s")
+        params.append(min_price)
+    if max_price is not None:
+        conditions.append("price_per_unit <= %s")
+        params.append(max_price)
+
+    query: str = "UPDATE products SET " + ", ".join(changes)
+
+    # Define an instance of the MySQL cursor
+    cursor: MySQLCursor = cnx.cursor()
+    rows_affected: int = 0
+
+    try:
+        if product_ids is None:
+            where: str = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+            cursor.execute(query + where, tuple(values + params))
+            rows_affected = cursor.rowcount
+        else:
+            for batch in batched_ids(product_ids, batch_size):
+                where = " WHERE " + " AND ".join(
+                    conditions
+                    + ["product_id IN (" + ", ".join(["%s"] * len(batch)) + ")"]
+                )
+                cursor.execute(query + where, tuple(values + params + batch))
+                rows_affected += cursor.rowcount
+        cnx.commit()
+    except Error:
+        cnx.rollback()
+        raise
+
+    bump_shared_version(cnx)
+
+    invalidate_catalog()
+
+    return rows_affected
+
+
+def delete_products(
+    cnx: MySQLConnection, product_ids: List[int], batch_size: int = 1000
+) -> int:
+    """
+    Delete the products with the given IDs, with one DELETE statement
+    per batch of IDs, all in a single transaction.
+
+    Input:  cnx (MySQLConnection)   | a MySQL connection object
+    Input:  product_ids (list)      | the IDs of the products to delete
+    Input:  batch_size (int)        | the number of IDs per statement
+    Output: the number of records affected
+    Raises: mysql.connector.Error if the products could not be deleted,
+            in which case none of them are (e.g. a product is part of an order)
+    """
+    # Define an instance of the MySQL cursor
+    cursor: MySQLCursor = cnx.cursor()
+    rows_affected: int = 0
+
+    try:
+        for batch in batched_ids(product_ids, batch_size):
+            query: str = (
+                "DELETE FROM products WHERE product_id IN ("
+                + ", ".join(["%s"] * len(batch))
+                + ")"
+            )
+            cursor.execute(query, tuple(batch))
+            rows_affected += cursor.rowcount
+        cnx.commit()
+    except Error:
+        cnx.rollback()
+        raise
+
+    bump_shared_version(cnx)
 
-    # Execute the query with the corresponding product_id
-    cursor.execute(query, (product_id,))
-    cnx.commit()
+    invalidate_products(*product_ids)
+    index_products({product_id: None for product_id in product_ids})
 
-    return cursor.rowcount
+    return rows_affected
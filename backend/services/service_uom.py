@@ -0,0 +1,151 @@
+"""
+Units of Measure (UOM) DAO (Data Access Object)
+"""
+
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Union
+
+from mysql.connector import Error, MySQLConnection
+from mysql.connector.cursor import MySQLCursor
+
+
+class UOMDictionary:
+    """
+    An in-memory map of the units of measure, from their ID to their name.
+
+    The `uom` table is tiny and nearly static, so it is loaded once and
+    kept in memory. It is reloaded after every UOM write, and at most
+    `refresh_interval` seconds after the last load to pick up writes
+    made by other processes.
+    """
+
+    def __init__(self, refresh_interval: float = 300.0) -> None:
+        """
+        Input:  refresh_interval (float)    | the maximum age of the map in seconds
+        """
+        self.refresh_interval: float = refresh_interval
+        self._names: Optional[Dict[int, str]] = None
+        self._loaded_at: float = 0.0
+        self._lock: threading.Lock = threading.Lock()
+
+    def refresh(self, cnx: MySQLConnection) -> Dict[int, str]:
+        """
+        Reload the map from the database.
+
+        Input:  cnx (MySQLConnection)   | a MySQL connection object
+        Output: the dictionary mapping each UOM ID to its name
+        Raises: mysql.connector.Error if the table could not be read
+        """
+        # Define an instance of the MySQL cursor
+        cursor: MySQLCursor = cnx.cursor()
+
+        # Execute the query fetching all the units of measure
+        cursor.execute("SELECT uom_id, uom_name FROM uom")
+        names: Dict[int, str] = dict(cursor.fetchall())
+
+        with self._lock:
+            self._names = names
+            self._loaded_at = time.monotonic()
+
+        return names
+
+    def invalidate(self) -> None:
+        """
+        Drop the map, it is reloaded on its next use.
+        """
+        with self._lock:
+            self._names = None
+
+    def get_names(self, cnx: MySQLConnection) -> Dict[int, str]:
+        """
+        Return the map, loading it first if it is missing or too old.
+
+        Input:  cnx (MySQLConnection)   | a MySQL connection object
+        Output: the dictionary mapping each UOM ID to its name
+        Raises: mysql.connector.Error if the table could not be read
+        """
+        with self._lock:
+            names: Optional[Dict[int, str]] = self._names
+            fresh: bool = time.monotonic() - self._loaded_at < self.refresh_interval
+
+        if names is None or not fresh:
+            names = self.refresh(cnx)
+
+        return names
+
+    def resolve(self, cnx: MySQLConnection, uom_ids: Iterable[int]) -> Dict[int, str]:
+        """
+        Return the map, making sure it knows every given UOM ID.
+        The map is reloaded once if an ID is missing, in case the UOM
+        was inserted by another process since the last load.
+
+        Input:  cnx (MySQLConnection)   | a MySQL connection object
+        Input:  uom_ids (Iterable)      | the UOM IDs that must be resolved
+        Output: the dictionary mapping each UOM ID to its name
+        Raises: mysql.connector.Error if the table could not be read
+        """
+        names: Dict[int, str] = self.get_names(cnx)
+
+        if any(uom_id not in names for uom_id in uom_ids):
+            names = self.refresh(cnx)
+
+        return names
+
+
+# Shared map of the units of measure
+uom_dictionary: UOMDictionary = UOMDictionary()
+
+
+def get_all_uoms(cnx: MySQLConnection) -> Optional[List[Dict[str, Union[int, str]]]]:
+    """
+    Fetch all the units of measure, served from memory.
+
+    Input:  cnx (MySQLConnection)     | a MySQL connection object
+    Output: a list of dictionaries of units of measure or None
+    """
+    try:
+        names: Dict[int, str] = uom_dictionary.get_names(cnx)
+    except Error as e:
+        print(f"Error fetching units of measure: {e}")
+        return None
+
+    return [
+        {"uom_id": uom_id, "uom_name": uom_name}
+        for uom_id, uom_name in sorted(names.items())
+    ]
+
+
+def insert_new_uom(cnx: MySQLConnection, uom: Dict[str, str]) -> Optional[int]:
+    """
+    Insert a new unit of measure into the database
+    and reload the in-memory map.
+
+    Input:  cnx (MySQLConnection)   | a MySQL connection object
+    Input:  uom (dict)              | a dictionary representing the UOM to insert
+    Output: the ID of the inserted unit of measure or None
+    """
+    # Define an instance of the MySQL cursor
+    cursor: MySQLCursor = cnx.cursor()
+
+    # Define a string representing a query
+    # to insert a new unit of measure into the database
+    query: str = "INSERT INTO uom (uom_name) VALUES (%s)"
+
+    try:
+        # Execute the query with the corresponding data
+        cursor.execute(query, (uom["uom_name"],))
+        cnx.commit()
+    except Error as e:
+        print(f"Error inserting unit of measure: {e}")
+        cnx.rollback()
+        return None
+
+    try:
+        uom_dictionary.refresh(cnx)
+    except Error as e:
+        # The map is reloaded on its next use instead
+        print(f"Error fetching units of measure: {e}")
+        uom_dictionary.invalidate()
+
+    return cursor.lastrowid
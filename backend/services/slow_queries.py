@@ -0,0 +1,274 @@
+"""
+Log of the database queries slower than a threshold
+
+Each slow query is recorded with its redacted parameters, its duration,
+its row count, and the DAO function and the route that ran it. The first
+time a query is slow, its execution plan is captured with EXPLAIN, which
+shows the full table scans of queries missing an index. The rows of an
+unbuffered query must all be read before EXPLAIN can run on its connection:
+its plan is captured once the cursor has read them, see `complete()`, and
+tried again the next time the query is slow if they never were. Entries
+are kept in memory for the /debug/slow-queries endpoint, and written as
+JSON lines to a rotating log file when one is configured.
+
+Each app keeps its own log, created by `create_app()` with its threshold
+and its file, see `get_slow_query_log()`.
+"""
+
+import json
+import logging
+import logging.handlers
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Sequence, Set
+
+from flask import current_app, has_app_context
+from mysql.connector import Error, MySQLConnection
+
+# Operations whose execution plan can be explained
+EXPLAINED_OPERATIONS: Set[str] = {"SELECT", "UPDATE", "DELETE"}
+
+
+def normalize_query(query: str) -> str:
+    """
+    Collapse the whitespace of a query, so that it can be compared and logged.
+    """
+    return " ".join(query.split())
+
+
+def redact(params: Any) -> Any:
+    """
+    Replace the values of the query parameters with their type,
+    so that customer names and prices do not end up in the logs.
+
+    Input:  params (Any)    | the parameters of a query
+    Output: the redacted parameters
+    """
+    if params is None:
+        return None
+    if isinstance(params, dict):
+        return {key: type(value).__name__ for key, value in params.items()}
+    if isinstance(params, (list, tuple)):
+        return [type(value).__name__ for value in params]
+
+    return type(params).__name__
+
+
+class SlowQueryLog:
+    """
+    A thread-safe log of the slow queries.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.1,
+        max_entries: int = 200,
+        path: Optional[str] = None,
+    ) -> None:
+        """
+        Input:  threshold (float)   | the duration in seconds from which a query is slow
+        Input:  max_entries (int)   | the number of entries kept in memory
+        Input:  path (str)          | the path of the log file, None to keep no file
+        """
+        self.threshold: float = threshold
+        self._entries: Deque[Dict[str, Any]] = deque(maxlen=max_entries)
+        # Queries whose execution plan was already captured
+        self._explained: Set[str] = set()
+        self._lock: threading.Lock = threading.Lock()
+
+        # Logger writing the entries to the file of this log only,
+        # left out of the logging registry shared by the apps
+        self._logger: logging.Logger = logging.Logger("gs.slow_queries")
+        self._logger.propagate = False
+        self.configure(threshold, path)
+
+    def configure(
+        self,
+        threshold: float,
+        path: Optional[str] = None,
+        max_bytes: int = 10 << 20,
+        backup_count: int = 5,
+    ) -> None:
+        """
+        Set the threshold, and the rotating file the entries are written to.
+
+        Input:  threshold (float)   | the duration in seconds from which a query is slow
+        Input:  path (str)          | the path of the log file, None to keep no file
+        Input:  max_bytes (int)     | the size from which the file is rotated
+        Input:  backup_count (int)  | the number of rotated files kept
+        """
+        self.threshold = threshold
+
+        for handler in list(self._logger.handlers):
+            self._logger.removeHandler(handler)
+            handler.close()
+
+        if not path:
+            self._logger.addHandler(logging.NullHandler())
+            return
+
+        handler: logging.Handler = logging.handlers.RotatingFileHandler(
+            path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8"
+        )
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        self._logger.addHandler(handler)
+        self._logger.setLevel(logging.WARNING)
+
+    def record(
+        self,
+        cnx: MySQLConnection,
+        query: str,
+        params: Any,
+        duration: float,
+        operation: str,
+        function: str,
+        route: Optional[str],
+        rows: int,
+        many: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        Record a slow query, and capture its execution plan until it is captured.
+        While the rows of the query are unread, the entry is returned with
+        an `explain` of None, to be passed to `complete()` once they are read.
+
+        Input:  cnx (MySQLConnection)   | the connection that ran the query
+        Input:  query (str)             | the query
+        Input:  params (Any)            | the parameters of the query
+        Input:  duration (float)        | the execution time in seconds
+        Input:  operation (str)         | the SQL operation of the query
+        Input:  function (str)          | the DAO function that ran the query
+        Input:  route (str)             | the route of the request, if any
+        Input:  rows (int)              | the row count reported by the cursor
+        Input:  many (bool)             | whether the query ran with executemany()
+        Output: the entry of the slow query
+        """
+        statement: str = normalize_query(query)
+
+        with self._lock:
+            first: bool = statement not in self._explained
+
+        entry: Dict[str, Any] = {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "query": statement,
+            "params": (
+                {"rows": len(params), "first": redact(params[0]) if params else None}
+                if many
+                else redact(params)
+            ),
+            "duration_ms": round(duration * 1000, 3),
+            "rows": rows,
+            "operation": operation,
+            "function": function,
+            "route": route,
+            "first_occurrence": first,
+        }
+        pending: bool = False
+        if first and not many and operation in EXPLAINED_OPERATIONS:
+            # The plan is captured by `complete()` once the rows are read
+            pending = bool(getattr(cnx, "unread_result", False))
+            entry["explain"] = (
+                None if pending else self._explain(cnx, statement, query, params)
+            )
+
+        with self._lock:
+            self._entries.append(entry)
+        if not pending:
+            self._write(entry)
+
+        return entry
+
+    def complete(
+        self,
+        cnx: Optional[MySQLConnection],
+        entry: Dict[str, Any],
+        query: str,
+        params: Any,
+    ) -> None:
+        """
+        Capture the execution plan of a slow query whose rows were unread
+        when it was recorded, and write its entry to the log file.
+
+        Input:  cnx (MySQLConnection)   | the connection that ran the query,
+                                          None to write the entry without a plan
+        Input:  entry (dict)            | the entry returned by `record()`
+        Input:  query (str)             | the query
+        Input:  params (Any)            | the parameters of the query
+        """
+        if cnx is not None:
+            entry["explain"] = self._explain(cnx, entry["query"], query, params)
+        self._write(entry)
+
+    def _explain(
+        self, cnx: MySQLConnection, statement: str, query: str, params: Any
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        Capture the plan of a query. The statement is only marked as explained
+        once its plan is captured, so that a failed capture is tried again.
+        """
+        plan: Optional[List[Dict[str, Any]]] = explain(cnx, query, params)
+        if plan is not None:
+            with self._lock:
+                self._explained.add(statement)
+
+        return plan
+
+    def _write(self, entry: Dict[str, Any]) -> None:
+        self._logger.warning(json.dumps(entry, default=str))
+
+    def entries(self) -> List[Dict[str, Any]]:
+        """
+        Return the entries kept in memory, the most recent first.
+        """
+        with self._lock:
+            return list(reversed(self._entries))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._explained.clear()
+
+
+def explain(
+    cnx: MySQLConnection, query: str, params: Optional[Sequence[Any]]
+) -> Optional[List[Dict[str, Any]]]:
+    """
+    Capture the execution plan of a query.
+    Connections may provide their own EXPLAIN statement (`explain_statement`).
+
+    Input:  cnx (MySQLConnection)   | the connection that ran the query
+    Input:  query (str)             | the query
+    Input:  params (Sequence)       | the parameters of the query
+    Output: the rows of the plan, or None if it could not be captured
+    """
+    # The rows of an unbuffered query must all be read
+    # before another query can run on the connection
+    if getattr(cnx, "unread_result", False):
+        return None
+
+    prefix: str = getattr(cnx, "explain_statement", "EXPLAIN")
+    try:
+        cursor: Any = cnx.cursor(buffered=True, dictionary=True)
+        cursor.execute(f"{prefix} {query.lstrip()}", params or ())
+        plan: List[Dict[str, Any]] = cursor.fetchall()
+        cursor.close()
+    except Error as e:
+        print(f"Error explaining slow query: {e}")
+        return None
+
+    return plan
+
+
+# Log of the queries run outside of an app context
+slow_query_log: SlowQueryLog = SlowQueryLog()
+
+
+def get_slow_query_log() -> SlowQueryLog:
+    """
+    Return the slow-query log of the current app,
+    or the default one outside of an app context.
+    """
+    if not has_app_context():
+        return slow_query_log
+
+    return current_app.config.get("slow_query_log", slow_query_log)
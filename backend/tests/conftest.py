@@ -0,0 +1,12 @@
+"""
+Configuration shared by the test suites.
+
+The tests run against an in-process SQLite database loaded with the sample
+data, so that they do not need a MySQL server. Set `GS_DB_ENGINE=mysql`
+to run them against the MySQL database instead.
+"""
+
+import os
+
+os.environ.setdefault("GS_DB_ENGINE", "sqlite")
+os.environ.setdefault("GS_DB_SQLITE_SEED", "1")
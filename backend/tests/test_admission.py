@@ -0,0 +1,137 @@
+"""
+Test suite for the admission control of the requests.
+"""
+
+import threading
+import time
+from pathlib import Path
+from typing import Generator, List
+
+import pytest
+from flask import Flask
+from database.sql_connection import get_pool
+from server import create_app
+from services.admission import AdmissionLimiter
+
+
+@pytest.fixture
+def app(tmp_path: Path) -> Generator[Flask, Flask, Flask]:
+    """
+    This fixture provides a Flask application instance admitting
+    one read and one write at a time, without a queue.
+    """
+    yield create_app(
+        {
+            "DB_ENGINE": "sqlite",
+            "DB_SQLITE_PATH": str(tmp_path / "gs.db"),
+            "DB_SQLITE_SEED": True,
+            "ADMISSION_CONTROL": True,
+            "ADMISSION_MAX_READS": 1,
+            "ADMISSION_MAX_WRITES": 1,
+            "ADMISSION_MAX_QUEUE": 0,
+            "ADMISSION_RETRY_AFTER": 2,
+        }
+    )
+
+
+def test_limiter_queues_then_sheds() -> None:
+    """
+    Test that the requests over the limit wait in the queue,
+    and are shed when the queue is full or their wait times out.
+    """
+    limiter = AdmissionLimiter("test", limit=1, max_queue=1)
+    assert limiter.acquire(timeout=0)
+
+    # Ensure a second request waits and gets the slot once it is released
+    results: List[bool] = []
+    waiter = threading.Thread(target=lambda: results.append(limiter.acquire(5.0)))
+    waiter.start()
+    while limiter.stats()["queue_depth"] == 0:
+        time.sleep(0.001)
+
+    # Ensure a third request is shed right away, the queue being full
+    assert not limiter.acquire(timeout=5.0)
+
+    limiter.release()
+    waiter.join()
+    assert results == [True]
+
+    # Ensure a request waiting longer than its timeout is shed
+    assert not limiter.acquire(timeout=0.01)
+
+    limiter.release()
+    stats = limiter.stats()
+    assert stats["in_flight"] == 0 and stats["queue_depth"] == 0
+    assert stats["admitted"] == 2
+    assert stats["shed"] == {"queue_full": 1, "timeout": 1}
+
+
+def test_requests_over_the_limit_are_shed(app: Flask) -> None:
+    """
+    Test that a request over the limit of its class gets a 503 with
+    Retry-After, while the other class and the health routes are served.
+    """
+    client = app.test_client()
+    reads: AdmissionLimiter = app.config["admission"]["read"]
+
+    # Take the only read slot, as a slow read would
+    assert reads.acquire(timeout=0)
+
+    response = client.get("/products/1")
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "2"
+
+    # Ensure the writes and the health routes are still served
+    response = client.post("/uom", json={"uom_name": "litre"})
+    assert response.status_code == 201
+    response = client.get("/pool")
+    assert response.status_code == 200
+    assert response.get_json()["admission"]["read"]["shed"]["queue_full"] == 1
+
+    # Ensure the reads are served again once the slot is released
+    reads.release()
+    assert client.get("/products/1").status_code == 200
+    assert reads.stats()["in_flight"] == 0
+
+
+def test_saturated_reads_leave_connections_to_writes(tmp_path: Path) -> None:
+    """
+    Test that the default caps leave a write its connection
+    when every read slot is taken.
+    """
+    app = create_app(
+        {
+            "DB_ENGINE": "sqlite",
+            "DB_SQLITE_PATH": str(tmp_path / "gs.db"),
+            "DB_SQLITE_SEED": True,
+            "DB_POOL_MAX_SIZE": 4,
+            "DB_POOL_TIMEOUT": 0.5,
+            "ADMISSION_CONTROL": True,
+        }
+    )
+    reads: AdmissionLimiter = app.config["admission"]["read"]
+    writes: AdmissionLimiter = app.config["admission"]["write"]
+
+    # Ensure the caps and the connection of the catalog sync fit in the pool
+    assert reads.limit + writes.limit + 1 <= 4
+
+    with app.app_context():
+        pool = get_pool()
+
+        # Take every read slot along with its connection, as slow reads would,
+        # and the connection of the catalog sync
+        held = []
+        for _ in range(reads.limit):
+            assert reads.acquire(timeout=0)
+            held.append(pool.acquire())
+        held.append(pool.acquire())
+
+        try:
+            # Ensure a write still gets a connection
+            response = app.test_client().post("/uom", json={"uom_name": "litre"})
+            assert response.status_code == 201
+        finally:
+            for cnx in held:
+                pool.release(cnx)
+            for _ in range(reads.limit):
+                reads.release()
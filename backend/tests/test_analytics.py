@@ -0,0 +1,104 @@
+"""
+Test suite for the analytics endpoints.
+"""
+
+from pathlib import Path
+from typing import Generator
+
+import pytest
+from database.sql_connection import get_sql_connection
+from flask import Flask
+from flask.testing import FlaskClient
+from server import app as flask_app
+from server import create_app
+from services import service_analytics
+
+
+@pytest.fixture
+def app() -> Generator[Flask, Flask, Flask]:
+    """
+    This fixture provides a Flask application instance
+    for testing purposes.
+    """
+    yield flask_app
+
+
+@pytest.fixture
+def client(app: Flask) -> FlaskClient:
+    """
+    This fixture provides a test client that can be used
+    to simulate HTTP requests to the Flask application.
+    """
+    return app.test_client()
+
+
+def test_get_sales_per_day(client: FlaskClient) -> None:
+    """
+    Test the GET /analytics/sales endpoint.
+    """
+    # Simulate a GET request to /analytics/sales endpoint
+    response = client.get("/analytics/sales?from=2024-01-01&to=2024-12-31")
+
+    # Ensure the request is successful (status code 200)
+    assert response.status_code == 200
+
+    # Ensure the response is in JSON format
+    assert response.content_type == "application/json"
+
+    # Check that each day of the report holds the sales figures
+    for day in response.get_json():
+        assert "day" in day
+        assert "orders" in day
+        assert "units" in day
+        assert "revenue" in day
+
+
+def test_get_sales_invalid_grouping(client: FlaskClient) -> None:
+    """
+    Test the GET /analytics/sales endpoint with an unsupported grouping.
+    """
+    # Simulate a GET request grouping the sales by customer
+    response = client.get("/analytics/sales?group_by=customer")
+
+    # Ensure the request is rejected (status code 400)
+    assert response.status_code == 400
+
+    # Ensure the error message contains the "error" field
+    assert "error" in response.get_json()
+
+
+def test_rebuilt_rollups_keep_the_uom_of_the_order(tmp_path: Path) -> None:
+    """
+    Test that the rebuilt rollups count the sales of a product in the unit
+    of measure it had when ordered, as the incremental rollups do.
+    """
+    app = create_app(
+        {
+            "DB_ENGINE": "sqlite",
+            "DB_SQLITE_PATH": str(tmp_path / "gs.db"),
+            "DB_SQLITE_SEED": True,
+        }
+    )
+    client = app.test_client()
+
+    # Place an order of a product sold by the kg (uom_id 1)
+    response = client.post(
+        "/orders",
+        json={"customer_name": "Ada", "items": [{"product_id": 2, "quantity": 3}]},
+    )
+    assert response.status_code == 201
+    day = response.get_json()["date"][:10]
+    report = f"/analytics/sales?from={day}&to={day}&group_by=uom"
+    sales = client.get(report).get_json()
+
+    # Sell the product by the piece from now on
+    product = client.get("/products/2").get_json()
+    product["uom_id"] = 2
+    assert client.put("/products/2", json=product).status_code == 200
+
+    # Ensure the rebuilt rollups match the incremental ones
+    with app.app_context():
+        # The days of the seeded order and of the new one
+        assert service_analytics.rebuild_rollups(get_sql_connection()) == 2
+    assert sales == [{"uom_id": 1, "uom_name": "kg", "units": 3.0, "revenue": 1200.0}]
+    assert client.get(report).get_json() == sales
@@ -0,0 +1,69 @@
+"""
+Test suite for the benchmark suite.
+"""
+
+from typing import Generator
+
+import pytest
+from benchmarks.run import (
+    SCENARIOS,
+    InProcessClient,
+    compare,
+    percentile,
+    run_scenario,
+)
+from flask import Flask
+from server import app as flask_app
+
+
+@pytest.fixture
+def app() -> Generator[Flask, Flask, Flask]:
+    """
+    This fixture provides a Flask application instance
+    for testing purposes.
+    """
+    yield flask_app
+
+
+def test_percentile() -> None:
+    """
+    Test the percentiles interpolated between the closest ranks.
+    """
+    values = [float(v) for v in range(1, 101)]
+
+    assert percentile(values, 50) == pytest.approx(50.5)
+    assert percentile(values, 99) == pytest.approx(99.01)
+    assert percentile([], 95) == 0.0
+
+
+def test_compare_with_baseline() -> None:
+    """
+    Test that only slowdowns beyond the tolerance are reported as regressions.
+    """
+    baseline = {
+        "get_product": {"throughput": 1000, "p95": 2.0, "p99": 3.0, "errors": 0}
+    }
+    faster = {"get_product": {"throughput": 900, "p95": 2.2, "p99": 3.3, "errors": 0}}
+    slower = {"get_product": {"throughput": 700, "p95": 2.2, "p99": 3.3, "errors": 0}}
+
+    assert compare(faster, baseline, tolerance=0.2) == []
+    assert len(compare(slower, baseline, tolerance=0.2)) == 1
+    assert compare({"new_case": slower["get_product"]}, baseline, 0.2) == []
+
+
+def test_run_scenario(app: Flask) -> None:
+    """
+    Test a short run of a scenario against the app.
+    """
+    figures = run_scenario(
+        SCENARIOS["get_product"],
+        lambda: InProcessClient(app),
+        concurrency=2,
+        requests=20,
+        product_ids=[1, 2, 3],
+        warmup=2,
+    )
+
+    assert figures["requests"] == 20
+    assert figures["errors"] == 0
+    assert figures["p50"] <= figures["p95"] <= figures["p99"] <= figures["max"]
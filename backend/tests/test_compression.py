@@ -0,0 +1,136 @@
+"""
+Test suite for the compression of the responses.
+"""
+
+import gzip
+import zlib
+from pathlib import Path
+from typing import Generator
+
+import pytest
+from flask import Flask
+from flask.testing import FlaskClient
+from server import app as flask_app
+from server import create_app
+from services.service_products import (
+    ALL_PRODUCTS_COMPRESSED_KEYS,
+    invalidate_products,
+    product_cache,
+)
+
+
+@pytest.fixture
+def app() -> Generator[Flask, Flask, Flask]:
+    """
+    This fixture provides a Flask application instance
+    for testing purposes.
+    """
+    yield flask_app
+
+
+@pytest.fixture
+def client(app: Flask) -> FlaskClient:
+    """
+    This fixture provides a test client that can be used
+    to simulate HTTP requests to the Flask application.
+    """
+    return app.test_client()
+
+
+@pytest.fixture
+def compress_everything(app: Flask) -> Generator[None, None, None]:
+    """
+    This fixture compresses responses of any size for the duration of a test.
+    """
+    min_size = app.config["COMPRESSION_MIN_SIZE"]
+    app.config["COMPRESSION_MIN_SIZE"] = 0
+    yield
+    app.config["COMPRESSION_MIN_SIZE"] = min_size
+
+
+def test_get_products_compressed(
+    client: FlaskClient, compress_everything: None
+) -> None:
+    """
+    Test that the list of products is compressed once per catalog version.
+    """
+    expected = client.get("/products").get_data()
+
+    # Simulate a GET request accepting gzip only
+    response = client.get("/products", headers={"Accept-Encoding": "gzip"})
+
+    # Ensure the body is the gzip compression of the list of products
+    assert response.status_code == 200
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert gzip.decompress(response.get_data()) == expected
+
+    # Ensure the compressed body is cached until the next product write
+    assert product_cache.get(ALL_PRODUCTS_COMPRESSED_KEYS["gzip"]) is not None
+    invalidate_products(1)
+    assert product_cache.get(ALL_PRODUCTS_COMPRESSED_KEYS["gzip"]) is None
+
+    # Ensure the weak entity tag of the compressed body is still matched
+    response = client.get("/products", headers={"Accept-Encoding": "gzip"})
+    etag = response.headers["ETag"]
+    assert etag.startswith("W/")
+    response = client.get(
+        "/products", headers={"Accept-Encoding": "gzip", "If-None-Match": etag}
+    )
+    assert response.status_code == 304
+
+
+def test_export_products_compressed(
+    client: FlaskClient, compress_everything: None
+) -> None:
+    """
+    Test that the streamed export is compressed with deflate.
+    """
+    expected = client.get("/products/export").get_data()
+
+    # Simulate a GET request preferring deflate
+    response = client.get(
+        "/products/export", headers={"Accept-Encoding": "gzip;q=0.5, deflate"}
+    )
+
+    # Ensure the stream is the deflate compression of the NDJSON lines
+    assert response.headers["Content-Encoding"] == "deflate"
+    assert zlib.decompress(response.get_data()) == expected
+
+
+def test_small_response_not_compressed(client: FlaskClient) -> None:
+    """
+    Test that a body below the minimum size is sent as is.
+    """
+    response = client.get("/", headers={"Accept-Encoding": "gzip"})
+
+    assert "Content-Encoding" not in response.headers
+    assert response.get_json()["message"]
+
+
+def test_apps_keep_their_own_settings(client: FlaskClient, tmp_path: Path) -> None:
+    """
+    Test that the compression, encoding and slow-query settings
+    of an app do not change those of the other apps.
+    """
+    other = create_app(
+        {
+            "DB_ENGINE": "sqlite",
+            "DB_SQLITE_PATH": str(tmp_path / "gs.db"),
+            "DB_SQLITE_SEED": True,
+            "JSON_ENCODER": "json",
+            "SLOW_QUERY_THRESHOLD": 0.0,
+            "COMPRESSION_MIN_SIZE": 0,
+        }
+    )
+
+    # Ensure the other app compresses its small responses and logs every query
+    response = other.test_client().get("/", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    other.test_client().get("/products/1")
+    assert other.config["slow_query_log"].entries()
+
+    # Ensure the first app still uses its own settings
+    response = client.get("/", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in response.headers
+    assert client.application.config["slow_query_log"].threshold == 0.1
@@ -0,0 +1,167 @@
+"""
+Test suite for the debugging endpoints.
+"""
+
+from pathlib import Path
+from typing import Any, Generator, List
+
+import pytest
+from database.instrumentation import InstrumentedCursor
+from flask import Flask
+from flask.testing import FlaskClient
+from server import app as flask_app
+from server import create_app
+from services.service_products import product_cache
+from services.slow_queries import redact
+
+
+@pytest.fixture
+def app() -> Generator[Flask, Flask, Flask]:
+    """
+    This fixture provides a Flask application instance
+    for testing purposes.
+    """
+    yield flask_app
+
+
+@pytest.fixture
+def client(app: Flask) -> FlaskClient:
+    """
+    This fixture provides a test client that can be used
+    to simulate HTTP requests to the Flask application.
+    """
+    return app.test_client()
+
+
+@pytest.fixture
+def log_every_query(app: Flask) -> Generator[None, None, None]:
+    """
+    This fixture makes every query slow for the duration of a test.
+    """
+    slow_query_log = app.config["slow_query_log"]
+    slow_query_log.configure(0.0)
+    slow_query_log.clear()
+    yield
+    slow_query_log.configure(
+        app.config["SLOW_QUERY_THRESHOLD"], app.config["SLOW_QUERY_LOG"]
+    )
+    slow_query_log.clear()
+
+
+def test_get_slow_queries(client: FlaskClient, log_every_query: None) -> None:
+    """
+    Test the GET /debug/slow-queries endpoint after reading a product twice.
+    """
+    # Read the product from the database both times
+    product_cache.clear()
+    client.get("/products/1")
+    product_cache.clear()
+    client.get("/products/1")
+
+    # Simulate a GET request to /debug/slow-queries endpoint
+    response = client.get("/debug/slow-queries")
+
+    # Ensure the request is successful (status code 200)
+    assert response.status_code == 200
+
+    queries = [
+        q
+        for q in response.get_json()["queries"]
+        if q["function"] == "get_single_product"
+    ]
+    assert queries
+    assert queries[-1]["route"] == "/products/<int:product_id>"
+    assert queries[-1]["params"] == ["int"]
+
+    # The plan is only captured the first time a query is slow
+    assert queries[-1]["first_occurrence"] and queries[-1]["explain"]
+    assert all("explain" not in q for q in queries[:-1])
+
+
+def test_redact_parameters() -> None:
+    """
+    Test that the values of the parameters are not logged.
+    """
+    assert redact(("Tony", 2, 3.5)) == ["str", "int", "float"]
+    assert redact(None) is None
+
+
+class UnbufferedConnection:
+    """
+    A stub of a MySQL connection whose cursors are unbuffered:
+    no other query can run until the rows of the last one are read.
+    """
+
+    def __init__(self) -> None:
+        self.unread_result: bool = False
+        self.explained: List[str] = []
+
+    def cursor(self, **kwargs: Any) -> "UnbufferedCursor":
+        return UnbufferedCursor(self)
+
+
+class UnbufferedCursor:
+    """
+    A stub of an unbuffered cursor returning two rows.
+    """
+
+    rowcount: int = -1
+
+    def __init__(self, cnx: UnbufferedConnection) -> None:
+        self.cnx: UnbufferedConnection = cnx
+        self.rows: List[Any] = []
+
+    def execute(self, query: str, params: Any = ()) -> None:
+        assert not self.cnx.unread_result, "Unread result found"
+        if query.startswith("EXPLAIN"):
+            self.cnx.explained.append(query)
+            self.rows = [{"type": "ALL"}]
+        else:
+            self.cnx.unread_result = True
+            self.rows = [(1,), (2,)]
+
+    def fetchall(self) -> List[Any]:
+        self.cnx.unread_result = False
+        rows, self.rows = self.rows, []
+        return rows
+
+    def close(self) -> None:
+        self.cnx.unread_result = False
+
+
+def test_explain_unbuffered_query(tmp_path: Path) -> None:
+    """
+    Test that the plan of an unbuffered slow query is captured
+    once its rows are read, and only counted as captured then.
+    """
+    app = create_app(
+        {
+            "DB_ENGINE": "sqlite",
+            "DB_SQLITE_PATH": str(tmp_path / "gs.db"),
+            "SLOW_QUERY_THRESHOLD": 0.0,
+        }
+    )
+    slow_query_log = app.config["slow_query_log"]
+    cnx = UnbufferedConnection()
+
+    with app.app_context():
+        # Ensure a cursor dropped with its rows unread leaves the plan to the next time
+        cursor = InstrumentedCursor(cnx.cursor(), cnx)
+        cursor.execute("SELECT product_id FROM products")
+        del cursor
+        assert slow_query_log.entries()[0]["explain"] is None
+        assert not cnx.explained
+        cnx.unread_result = False
+
+        # Ensure the plan is captured once the rows are read
+        cursor = InstrumentedCursor(cnx.cursor(), cnx)
+        cursor.execute("SELECT product_id FROM products")
+        assert cursor.fetchall() == [(1,), (2,)]
+        entry = slow_query_log.entries()[0]
+        assert entry["first_occurrence"] and entry["explain"] == [{"type": "ALL"}]
+
+        # Ensure the plan is not captured again
+        cursor.execute("SELECT product_id FROM products")
+        cursor.fetchall()
+        assert not slow_query_log.entries()[0]["first_occurrence"]
+        assert len(cnx.explained) == 1
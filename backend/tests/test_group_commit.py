@@ -0,0 +1,220 @@
+"""
+Test suite for the group commit of the writes.
+"""
+
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Generator, List
+
+import pytest
+from database import sqlite_connection
+from database.group_commit import GroupCommitQueue
+from flask import Flask
+from mysql.connector import Error
+from server import create_app
+from services.metrics import GROUP_COMMIT_SIZE
+from services.slow_queries import slow_query_log
+
+
+@pytest.fixture
+def database(tmp_path: Path) -> str:
+    """
+    This fixture provides the path of a SQLite database
+    loaded with the sample data.
+    """
+    path = str(tmp_path / "gs.db")
+    cnx = sqlite_connection.connect(path)
+    sqlite_connection.initialize(cnx, seed=True)
+    cnx.close()
+
+    return path
+
+
+@pytest.fixture
+def app(database: str) -> Generator[Flask, Flask, Flask]:
+    """
+    This fixture provides a Flask application instance
+    committing its writes in groups.
+    """
+    yield create_app(
+        {
+            "DB_ENGINE": "sqlite",
+            "DB_SQLITE_PATH": database,
+            "GROUP_COMMIT": True,
+        }
+    )
+
+
+def insert(name: str, uom_id: int) -> Any:
+    """
+    Return a write inserting a product.
+    """
+
+    def operation(cnx: Any) -> int:
+        cursor = cnx.cursor()
+        cursor.execute(
+            "INSERT INTO products (name, uom_id, price_per_unit) VALUES (%s, %s, %s)",
+            (name, uom_id, 1.5),
+        )
+        return cursor.lastrowid
+
+    return operation
+
+
+def test_writes_are_committed_in_groups(database: str) -> None:
+    """
+    Test that concurrent writes share transactions and each get
+    their own result, or their own error.
+    """
+    write_queue = GroupCommitQueue(
+        lambda: sqlite_connection.connect(database), max_batch=8, max_delay=0.05
+    )
+    groups = GROUP_COMMIT_SIZE.count()
+    results: Dict[int, Any] = {}
+
+    def submit(index: int) -> None:
+        # Every fourth product references a unit of measure that does not exist
+        try:
+            results[index] = write_queue.submit(
+                insert(f"product {index}", 999 if index % 4 == 0 else 1)
+            )
+        except Error as e:
+            results[index] = e
+
+    threads: List[threading.Thread] = [
+        threading.Thread(target=submit, args=(i,)) for i in range(16)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Ensure the failing writes got their error and the others their ID
+    failed = [i for i, result in results.items() if isinstance(result, Error)]
+    assert sorted(failed) == [0, 4, 8, 12]
+    product_ids = [results[i] for i in results if i not in failed]
+    assert len(set(product_ids)) == 12
+
+    # Ensure the writes were committed in fewer transactions than writes
+    assert GROUP_COMMIT_SIZE.count() - groups < 16
+
+    # Ensure only the successful writes were committed
+    cnx = sqlite_connection.connect(database)
+    cursor = cnx.cursor()
+    cursor.execute("SELECT COUNT(*) FROM products WHERE name LIKE %s", ("product %",))
+    assert cursor.fetchone()[0] == 12
+    cnx.close()
+
+
+def test_aborted_group_is_run_again(database: str) -> None:
+    """
+    Test that the writes of a group whose transaction is aborted by
+    another write are run again, and never answered before that.
+    """
+    write_queue = GroupCommitQueue(
+        lambda: sqlite_connection.connect(database),
+        max_batch=8,
+        max_delay=0.2,
+        durability="statement",
+    )
+
+    def abort(cnx: Any) -> None:
+        # Roll back the whole transaction, as a deadlock would
+        cnx.rollback()
+        raise Error("Deadlock found when trying to get lock")
+
+    results: Dict[str, Any] = {}
+    committed = threading.Event()
+
+    def submit(name: str, operation: Any) -> None:
+        try:
+            results[name] = write_queue.submit(
+                operation, on_commit=lambda result: committed.set()
+            )
+        except Error as e:
+            results[name] = e
+
+    first = threading.Thread(target=submit, args=("first", insert("kept", 1)))
+    first.start()
+    # Queue the aborting write after the first one, in the same group
+    time.sleep(0.05)
+    second = threading.Thread(target=submit, args=("second", abort))
+    second.start()
+    first.join()
+    second.join()
+
+    # Ensure only the aborting write failed
+    assert isinstance(results["second"], Error)
+
+    # Ensure the first write was committed with the ID it was answered with,
+    # the requests being answered before the commit in this mode
+    assert committed.wait(5)
+    cnx = sqlite_connection.connect(database)
+    cursor = cnx.cursor()
+    cursor.execute("SELECT product_id FROM products WHERE name = %s", ("kept",))
+    assert cursor.fetchall() == [(results["first"],)]
+    cnx.close()
+
+
+def test_product_writes_with_group_commit(app: Flask) -> None:
+    """
+    Test the product and order endpoints with group commit enabled.
+    """
+    client = app.test_client()
+
+    # Simulate a POST request inserting a product
+    response = client.post(
+        "/products", json={"name": "grouped", "uom_id": 1, "price_per_unit": 2}
+    )
+    assert response.status_code == 201
+    product_id = response.get_json()["product_id"]
+
+    # Ensure the product is committed and readable
+    response = client.get(f"/products/{product_id}")
+    assert response.get_json()["name"] == "grouped"
+
+    # Ensure an order for a missing product still fails on its own
+    response = client.post(
+        "/orders",
+        json={"customer_name": "Tony", "items": [{"product_id": 0, "quantity": 1}]},
+    )
+    assert response.status_code == 400
+
+    # Simulate a POST request placing an order for the product
+    response = client.post(
+        "/orders",
+        json={
+            "customer_name": "Tony",
+            "items": [{"product_id": product_id, "quantity": 2}],
+        },
+    )
+    assert response.status_code == 201
+    assert response.get_json()["total"] == 4
+
+
+def test_group_writes_use_the_slow_query_log_of_the_app(database: str) -> None:
+    """
+    Test that the slow queries of the writer are recorded in the
+    slow-query log of its app, not in the default one.
+    """
+    app = create_app(
+        {
+            "DB_ENGINE": "sqlite",
+            "DB_SQLITE_PATH": database,
+            "GROUP_COMMIT": True,
+            "SLOW_QUERY_THRESHOLD": 0.0,
+        }
+    )
+    slow_query_log.clear()
+
+    # Simulate a POST request inserting a product through the writer
+    response = app.test_client().post(
+        "/products", json={"name": "logged", "uom_id": 1, "price_per_unit": 2}
+    )
+    assert response.status_code == 201
+
+    # Ensure the insertion is recorded in the log of the app
+    queries = [entry["query"] for entry in app.config["slow_query_log"].entries()]
+    assert any(query.startswith("INSERT INTO products") for query in queries)
+    assert slow_query_log.entries() == []
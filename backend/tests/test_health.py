@@ -0,0 +1,77 @@
+"""
+Test suite for the app factory and the health endpoints.
+"""
+
+from typing import Generator
+
+import pytest
+from database.sql_connection import get_pool
+from flask import Flask
+from flask.testing import FlaskClient
+from server import app as flask_app
+from server import create_app
+
+
+@pytest.fixture
+def app() -> Generator[Flask, Flask, Flask]:
+    """
+    This fixture provides a Flask application instance
+    for testing purposes.
+    """
+    yield flask_app
+
+
+@pytest.fixture
+def client(app: Flask) -> FlaskClient:
+    """
+    This fixture provides a test client that can be used
+    to simulate HTTP requests to the Flask application.
+    """
+    return app.test_client()
+
+
+def test_get_readiness(client: FlaskClient) -> None:
+    """
+    Test the GET /ready endpoint.
+    """
+    # Simulate a GET request to /ready endpoint
+    response = client.get("/ready")
+
+    # Ensure the request is successful (status code 200)
+    assert response.status_code == 200
+    assert response.get_json() == {"status": "ready"}
+
+
+def test_create_app_connects_lazily() -> None:
+    """
+    Test that the app opens no connection before its first request,
+    and that the readiness probe fails without a database.
+    """
+    app = create_app(
+        {
+            "DB_ENGINE": "mysql",
+            "DB_CONNECT_ARGS": {"host": "127.0.0.1", "port": 1, "user": "root"},
+            "DB_POOL_MIN_SIZE": 0,
+        }
+    )
+    assert "pool" not in app.config
+
+    # Simulate a GET request to /ready endpoint
+    response = app.test_client().get("/ready")
+
+    # Ensure the app is reported as unavailable (status code 503)
+    assert response.status_code == 503
+    assert response.get_json()["status"] == "unavailable"
+
+
+def test_pool_is_reopened_after_fork(app: Flask) -> None:
+    """
+    Test that a pool inherited from a parent process is not used.
+    """
+    with app.app_context():
+        pool = get_pool()
+        assert get_pool() is pool
+
+        # Simulate a pool created by the parent before the fork
+        pool.pid = -1
+        assert get_pool() is not pool
@@ -0,0 +1,215 @@
+"""
+Test suite for the inventory endpoints and the stock reservations of the orders.
+"""
+
+import threading
+from pathlib import Path
+from typing import Generator, List
+
+import pytest
+from database import sqlite_connection
+from flask import Flask
+from flask.testing import FlaskClient
+from server import create_app
+from services.service_inventory import InsufficientStockError, reserve_stock
+
+
+@pytest.fixture
+def database(tmp_path: Path) -> str:
+    """
+    This fixture provides the path of a SQLite database
+    loaded with the sample data.
+    """
+    path = str(tmp_path / "gs.db")
+    cnx = sqlite_connection.connect(path)
+    sqlite_connection.initialize(cnx, seed=True)
+    cnx.close()
+
+    return path
+
+
+@pytest.fixture
+def app(database: str) -> Generator[Flask, Flask, Flask]:
+    """
+    This fixture provides a Flask application instance
+    with its own database, whose stock the tests can change.
+    """
+    yield create_app({"DB_ENGINE": "sqlite", "DB_SQLITE_PATH": database})
+
+
+@pytest.fixture
+def client(app: Flask) -> FlaskClient:
+    """
+    This fixture provides a test client that can be used
+    to simulate HTTP requests to the Flask application.
+    """
+    return app.test_client()
+
+
+def order(client: FlaskClient, *items: tuple) -> int:
+    """
+    Place an order for (product_id, quantity) items and return its status code.
+    """
+    return client.post(
+        "/orders",
+        json={
+            "customer_name": "Tony",
+            "items": [{"product_id": p, "quantity": q} for p, q in items],
+        },
+    ).status_code
+
+
+def test_set_stock_and_low_stock_report(client: FlaskClient) -> None:
+    """
+    Test the PUT /inventory/<id> and GET /inventory endpoints.
+    """
+    for product_id, stock in [(1, 50), (2, 3), (3, 8)]:
+        response = client.put(f"/inventory/{product_id}", json={"stock": stock})
+        assert response.status_code == 200
+        assert response.get_json() == {
+            "product_id": product_id,
+            "stock": stock,
+            "version": 0,
+        }
+
+    # Ensure all the tracked products are listed
+    response = client.get("/inventory")
+    assert [level["product_id"] for level in response.get_json()] == [1, 2, 3]
+
+    # Ensure the low-stock report lists the lowest stock first
+    response = client.get("/inventory?max_stock=10")
+    assert [level["name"] for level in response.get_json()] == ["rice", "meat"]
+
+    # Ensure the stock of a nonexisting product cannot be set
+    response = client.put("/inventory/9999", json={"stock": 1})
+    assert response.status_code == 404
+
+    # Ensure a negative stock is rejected
+    response = client.put("/inventory/1", json={"stock": -1})
+    assert response.status_code == 400
+
+    # Ensure a stock that is not a finite number is rejected
+    for stock in [float("nan"), float("inf")]:
+        response = client.put("/inventory/1", json={"stock": stock})
+        assert response.status_code == 400
+    assert client.get("/inventory?max_stock=nan").status_code == 400
+
+
+def test_orders_reserve_stock(client: FlaskClient) -> None:
+    """
+    Test that the orders take their quantities from the stock,
+    all or nothing, while untracked products are not limited.
+    """
+    client.put("/inventory/1", json={"stock": 5})
+    client.put("/inventory/2", json={"stock": 1})
+
+    # Ensure an order within the stock is placed and reserves it
+    assert order(client, (1, 3), (3, 100)) == 201
+
+    # Ensure an order short of one product is rejected as a whole
+    response = client.post(
+        "/orders",
+        json={
+            "customer_name": "Tony",
+            "items": [
+                {"product_id": 1, "quantity": 1},
+                {"product_id": 2, "quantity": 2},
+            ],
+        },
+    )
+    assert response.status_code == 409
+    assert response.get_json()["product_ids"] == [2]
+
+    levels = {
+        level["product_id"]: level for level in client.get("/inventory").get_json()
+    }
+    assert levels[1]["stock"] == 2 and levels[1]["version"] == 1
+    assert levels[2]["stock"] == 1
+
+
+def test_reserve_stock_after_concurrent_order(database: str) -> None:
+    """
+    Test that a reservation whose stock was taken since it was read
+    is rejected, and names the product short of stock.
+    """
+    cnx = sqlite_connection.connect(database)
+    cursor = cnx.cursor()
+    cursor.execute("INSERT INTO inventory (product_id, stock) VALUES (1, 2), (2, 10)")
+
+    # The order read a stock of 10 for both products
+    with pytest.raises(InsufficientStockError) as error:
+        reserve_stock(cursor, {1: 3, 2: 1}, {1: (10, 0), 2: (10, 0)})
+    assert error.value.product_ids == [1]
+    cnx.rollback()
+    cnx.close()
+
+
+def test_set_stock_with_version(client: FlaskClient) -> None:
+    """
+    Test that a stock set from a stale version is rejected.
+    """
+    client.put("/inventory/1", json={"stock": 10})
+    assert order(client, (1, 4)) == 201
+
+    # Ensure the stock read before the order cannot be written back
+    response = client.put("/inventory/1", json={"stock": 20, "version": 0})
+    assert response.status_code == 409
+    assert response.get_json()["current"] == {
+        "product_id": 1,
+        "stock": 6,
+        "version": 1,
+    }
+
+    # Ensure a version that is not an integer is rejected
+    response = client.put("/inventory/1", json={"stock": 20, "version": True})
+    assert response.status_code == 400
+
+    # Ensure the stock read at the current version is set
+    response = client.put("/inventory/1", json={"stock": 20, "version": 1})
+    assert response.get_json() == {"product_id": 1, "stock": 20, "version": 2}
+
+
+def test_adjust_stock(client: FlaskClient) -> None:
+    """
+    Test the PATCH /inventory/<id> endpoint.
+    """
+    client.put("/inventory/1", json={"stock": 10})
+
+    response = client.patch("/inventory/1", json={"delta": 5})
+    assert response.get_json() == {"product_id": 1, "stock": 15, "version": 1}
+
+    # Ensure a delta that is not a finite number is rejected
+    for delta in [float("nan"), float("-inf")]:
+        response = client.patch("/inventory/1", json={"delta": delta})
+        assert response.status_code == 400
+
+    # Ensure the stock cannot become negative
+    response = client.patch("/inventory/1", json={"delta": -16})
+    assert response.status_code == 409
+
+    # Ensure an untracked product cannot be adjusted
+    response = client.patch("/inventory/2", json={"delta": 5})
+    assert response.status_code == 404
+
+
+def test_concurrent_orders_do_not_oversell(app: Flask) -> None:
+    """
+    Test that concurrent orders of the same product never take
+    more than its stock.
+    """
+    client = app.test_client()
+    client.put("/inventory/2", json={"stock": 10})
+    statuses: List[int] = []
+
+    def checkout() -> None:
+        statuses.append(order(app.test_client(), (2, 1), (1, 1)))
+
+    threads = [threading.Thread(target=checkout) for _ in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert statuses.count(201) == 10
+    assert statuses.count(409) == 6
+    assert client.get("/inventory").get_json()[0]["stock"] == 0
@@ -0,0 +1,68 @@
+"""
+Test suite for the metrics endpoint.
+"""
+
+from typing import Generator
+
+import pytest
+from flask import Flask
+from flask.testing import FlaskClient
+from server import app as flask_app
+from services.metrics import Histogram
+
+
+@pytest.fixture
+def app() -> Generator[Flask, Flask, Flask]:
+    """
+    This fixture provides a Flask application instance
+    for testing purposes.
+    """
+    yield flask_app
+
+
+@pytest.fixture
+def client(app: Flask) -> FlaskClient:
+    """
+    This fixture provides a test client that can be used
+    to simulate HTTP requests to the Flask application.
+    """
+    return app.test_client()
+
+
+def test_get_metrics(client: FlaskClient) -> None:
+    """
+    Test the GET /metrics endpoint after a request reading the database.
+    """
+    client.get("/products/1")
+
+    # Simulate a GET request to /metrics endpoint
+    response = client.get("/metrics")
+
+    # Ensure the metrics are served in the Prometheus text format
+    assert response.status_code == 200
+    assert response.content_type.startswith("text/plain; version=0.0.4")
+
+    body = response.get_data(as_text=True)
+    assert (
+        'gs_http_responses_total{blueprint="single_product_bp",'
+        'route="/products/<int:product_id>",method="GET",status="200"}' in body
+    )
+    assert 'gs_db_query_duration_seconds_count{function="get_single_product"' in body
+    assert "gs_db_pool_wait_seconds_count" in body
+
+
+def test_histogram_buckets_are_cumulative() -> None:
+    """
+    Test the rendering of a histogram.
+    """
+    histogram = Histogram("test_seconds", "Test.", ("route",), buckets=(0.1, 1.0))
+    histogram.observe(0.05, "/a")
+    histogram.observe(0.5, "/a")
+    histogram.observe(5.0, "/a")
+
+    lines = histogram.render().splitlines()
+
+    assert 'test_seconds_bucket{route="/a",le="0.1"} 1' in lines
+    assert 'test_seconds_bucket{route="/a",le="1"} 2' in lines
+    assert 'test_seconds_bucket{route="/a",le="+Inf"} 3' in lines
+    assert 'test_seconds_count{route="/a"} 3' in lines
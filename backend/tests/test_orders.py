@@ -0,0 +1,167 @@
+"""
+Test suite for the orders endpoints.
+"""
+
+from typing import Generator
+
+import pytest
+from flask import Flask
+from flask.testing import FlaskClient
+from server import app as flask_app
+
+
+@pytest.fixture
+def app() -> Generator[Flask, Flask, Flask]:
+    """
+    This fixture provides a Flask application instance
+    for testing purposes.
+    """
+    yield flask_app
+
+
+@pytest.fixture
+def client(app: Flask) -> FlaskClient:
+    """
+    This fixture provides a test client that can be used
+    to simulate HTTP requests to the Flask application.
+    """
+    return app.test_client()
+
+
+def test_insert_order_without_items(client: FlaskClient) -> None:
+    """
+    Test the POST /orders endpoint with an empty basket.
+    """
+    # Simulate a POST request with an order holding no item
+    response = client.post("/orders", json={"customer_name": "Tony", "items": []})
+
+    # Ensure the request is rejected (status code 400)
+    assert response.status_code == 400
+
+    # Ensure the response is in JSON format
+    assert response.content_type == "application/json"
+
+    # Ensure the error message is the one defined in the routes implementation
+    assert response.get_json().get("error") == "An order needs at least one item"
+
+
+def test_insert_order_non_finite_quantity(client: FlaskClient) -> None:
+    """
+    Test the POST /orders endpoint with quantities that are not finite numbers.
+    """
+    for item in [
+        {"product_id": 1, "quantity": float("nan")},
+        {"product_id": 1, "quantity": float("inf")},
+        {"product_id": 1, "quantity": "nan"},
+        {"product_id": float("inf"), "quantity": 1},
+    ]:
+        # Simulate a POST request with the invalid item
+        response = client.post(
+            "/orders", json={"customer_name": "Tony", "items": [item]}
+        )
+
+        # Ensure the request is rejected (status code 400)
+        assert response.status_code == 400
+        assert response.get_json().get("error") == "Invalid product_id or quantity"
+
+
+def test_insert_order_nonexisting_product(client: FlaskClient) -> None:
+    """
+    Test the POST /orders endpoint with an item for a nonexisting product.
+    """
+    # Define a variable containing a nonexisting ID in the db
+    nonexistent_id: int = 9999
+
+    # Simulate a POST request with an order for a nonexisting product
+    response = client.post(
+        "/orders",
+        json={
+            "customer_name": "Tony",
+            "items": [{"product_id": nonexistent_id, "quantity": 1}],
+        },
+    )
+
+    # Ensure the request is rejected (status code 400)
+    assert response.status_code == 400
+
+    # Ensure the error message names the nonexisting product
+    assert response.get_json().get("error") == f"Product not found: {nonexistent_id}"
+
+
+def place_order(client: FlaskClient) -> dict:
+    """
+    Place an order of two products and return it.
+    """
+    response = client.post(
+        "/orders",
+        json={
+            "customer_name": "Export",
+            "items": [
+                {"product_id": 1, "quantity": 2},
+                {"product_id": 2, "quantity": 3},
+            ],
+        },
+    )
+    assert response.status_code == 201
+
+    return response.get_json()
+
+
+def test_export_orders_csv(client: FlaskClient) -> None:
+    """
+    Test the GET /orders/export endpoint with the CSV format.
+    """
+    order = place_order(client)
+    today = order["date"][:10]
+
+    # Simulate a GET request exporting the orders of the day
+    response = client.get(f"/orders/export?from={today}&to={today}")
+
+    # Ensure the export is a CSV file
+    assert response.status_code == 200
+    assert response.mimetype == "text/csv"
+    assert "attachment" in response.headers["Content-Disposition"]
+
+    # Ensure the export holds the lines of the order
+    rows = [row.split(",") for row in response.get_data(as_text=True).splitlines()]
+    assert rows[0][:3] == ["order_id", "customer_name", "date"]
+    lines = [row for row in rows[1:] if row[0] == str(order["order_id"])]
+    assert [line[4] for line in lines] == ["1", "2"]
+    assert lines[0][1] == "Export"
+
+    # Ensure the orders placed after the period are not exported
+    response = client.get("/orders/export?to=2000-01-01")
+    assert response.get_data(as_text=True).splitlines()[1:] == []
+
+
+def test_export_orders_parquet(client: FlaskClient) -> None:
+    """
+    Test the GET /orders/export endpoint with the Parquet format.
+    """
+    pyarrow = pytest.importorskip("pyarrow")
+    import pyarrow.parquet
+
+    order = place_order(client)
+
+    # Simulate a GET request exporting all the orders
+    response = client.get("/orders/export?format=parquet")
+    assert response.status_code == 200
+    assert response.mimetype == "application/vnd.apache.parquet"
+
+    # Ensure the file can be read back with the lines of the order
+    table = pyarrow.parquet.read_table(pyarrow.BufferReader(response.get_data()))
+    lines = [
+        line for line in table.to_pylist() if line["order_id"] == order["order_id"]
+    ]
+    assert [line["product_id"] for line in lines] == [1, 2]
+    assert lines[1]["quantity"] == 3
+    assert lines[0]["uom_name"] is not None
+
+
+def test_export_orders_invalid_format(client: FlaskClient) -> None:
+    """
+    Test the GET /orders/export endpoint with an unknown format.
+    """
+    response = client.get("/orders/export?format=xlsx")
+    assert response.status_code == 400
+    assert "csv" in response.get_json()["error"]
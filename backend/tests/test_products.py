@@ -2,12 +2,27 @@
 Test suite for the products endpoints.
 """
 
+import json
+import os
+import time
+from pathlib import Path
 from typing import Generator
 
 import pytest
+from database import sqlite_connection
 from flask import Flask
 from flask.testing import FlaskClient
 from server import app as flask_app
+from server import create_app
+from werkzeug.http import http_date
+from mysql.connector import Error
+from services import service_products
+from services.service_products import (
+    ALL_PRODUCTS_JSON_KEY,
+    catalog_version,
+    invalidate_products,
+    product_cache,
+)
 
 
 @pytest.fixture
@@ -146,3 +161,446 @@ def test_get_nonexisting_product(client: FlaskClient) -> None:
     # Ensure the value of the "error" field is the same
     # as defined in the routes implementation
     assert error_message.get("error") == "Product not found"
+
+
+def test_get_product_cache_stats(client: FlaskClient) -> None:
+    """
+    Test the GET /products/cache endpoint.
+    """
+    # Read the same product twice, the second read is served from the cache
+    client.get("/products/1")
+    client.get("/products/1")
+
+    # Simulate a GET request to /products/cache endpoint
+    response = client.get("/products/cache")
+
+    # Ensure the request is successful (status code 200)
+    assert response.status_code == 200
+
+    # Store the response body into a variable
+    stats = response.get_json()
+
+    # Ensure the counters are exposed
+    assert "hits" in stats
+    assert "misses" in stats
+    assert "evictions" in stats
+    assert stats.get("hits") >= 1
+
+
+def test_get_products_page(client: FlaskClient) -> None:
+    """
+    Test the GET /products endpoint with keyset pagination and a projection.
+    """
+    # Simulate a GET request for the first page of two products
+    response = client.get("/products?limit=2&fields=product_id,name")
+
+    # Ensure the request is successful (status code 200)
+    assert response.status_code == 200
+
+    # Store the response body into a variable
+    products = response.get_json()
+
+    # Ensure the page holds two products with the projected fields only
+    assert len(products) == 2
+    assert set(products[0]) == {"product_id", "name"}
+
+    # Ensure the cursor of the next page is returned
+    cursor = response.headers.get("X-Next-Cursor")
+    assert cursor
+
+    # Simulate a GET request for the next page
+    response = client.get(f"/products?limit=2&fields=product_id,name&after={cursor}")
+    next_products = response.get_json()
+
+    # Ensure the next page starts after the last product of the first page
+    assert next_products[0]["product_id"] > products[-1]["product_id"]
+
+
+def test_get_products_invalid_page(client: FlaskClient) -> None:
+    """
+    Test the GET /products endpoint with an invalid page size.
+    """
+    # Simulate a GET request with a page size out of bounds
+    response = client.get("/products?limit=0")
+
+    # Ensure the request is rejected (status code 400)
+    assert response.status_code == 400
+
+
+def test_export_products(client: FlaskClient) -> None:
+    """
+    Test the GET /products/export endpoint.
+    """
+    # Simulate a GET request to /products/export endpoint
+    response = client.get("/products/export")
+
+    # Ensure the request is successful (status code 200)
+    assert response.status_code == 200
+
+    # Ensure the response is in NDJSON format
+    assert response.mimetype == "application/x-ndjson"
+
+    # Ensure each line is a JSON object representing a product
+    lines = response.get_data(as_text=True).splitlines()
+    if lines:
+        extract_product([json.loads(line) for line in lines])
+
+
+def test_get_products_not_modified(client: FlaskClient) -> None:
+    """
+    Test the GET /products endpoint with a conditional request.
+    """
+    # Simulate a catalog last written two seconds ago, so that
+    # the second of the last write is over and its date is sent
+    client.get("/products")
+    catalog_version.modified_at -= 2
+
+    # Simulate a GET request to /products endpoint
+    response = client.get("/products")
+
+    # Ensure the response is tagged with the catalog version
+    etag = response.headers.get("ETag")
+    assert etag
+    assert response.headers.get("Last-Modified")
+
+    # Simulate the same GET request with the tag of the copy already held
+    response = client.get("/products", headers={"If-None-Match": etag})
+
+    # Ensure the request is answered without a body (status code 304)
+    assert response.status_code == 304
+    assert response.get_data() == b""
+
+
+def test_insert_products_bulk_invalid_rows(client: FlaskClient) -> None:
+    """
+    Test the POST /products/bulk endpoint with rows that fail validation.
+    """
+    # Simulate a POST request with two invalid products
+    response = client.post(
+        "/products/bulk",
+        json=[{"name": "salt", "uom_id": 1}, {"name": "pepper", "uom_id": "x"}],
+    )
+
+    # Ensure the request failed since no product was inserted (status code 400)
+    assert response.status_code == 400
+
+    # Store the response body into a variable
+    result = response.get_json()
+
+    # Ensure each rejected row is reported with its number
+    assert result.get("product_ids") == []
+    assert [error["row"] for error in result.get("errors")] == [1, 2]
+    assert result["errors"][0]["error"] == "Missing required field: price_per_unit"
+
+
+def test_insert_products_bulk_rejects_bad_rows_only(client: FlaskClient) -> None:
+    """
+    Test the POST /products/bulk endpoint with non-finite prices
+    and unknown units of measure among valid rows.
+    """
+    # Simulate a POST request with a CSV body holding two non-finite prices
+    response = client.post(
+        "/products/bulk",
+        data="name,uom_id,price_per_unit\n"
+        "bulk a,1,2\nbulk b,1,nan\nbulk c,1,inf\nbulk d,1,3\n",
+        content_type="text/csv",
+    )
+
+    # Ensure the valid rows are inserted and the others reported
+    assert response.status_code == 201
+    result = response.get_json()
+    assert result["inserted"] == 2
+    assert [error["row"] for error in result["errors"]] == [2, 3]
+    assert result["errors"][0]["error"] == "Invalid price_per_unit"
+    product_ids = result["product_ids"]
+
+    # Simulate a POST request with a product of an unknown unit of measure
+    response = client.post(
+        "/products/bulk",
+        json=[
+            {"name": "bulk e", "uom_id": 1, "price_per_unit": 4},
+            {"name": "bulk f", "uom_id": 999, "price_per_unit": 5},
+        ],
+    )
+
+    # Ensure only the product of the unknown unit of measure is rejected
+    assert response.status_code == 201
+    result = response.get_json()
+    assert result["inserted"] == 1
+    assert result["errors"] == [{"row": 2, "error": "Unknown uom_id"}]
+    product_ids += result["product_ids"]
+
+    assert client.delete("/products", json={"ids": product_ids}).status_code == 200
+
+
+def test_insert_products_bulk_failed_batch(
+    client: FlaskClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """
+    Test that the rows of a batch failing in the database
+    are inserted again one at a time.
+    """
+    insert_products_batch = service_products.insert_products_batch
+
+    def failing_insert(cnx, products):
+        # Simulate a row the database refuses, failing its whole batch
+        if any(product["name"] == "bulk refused" for product in products):
+            raise Error("Refused")
+        return insert_products_batch(cnx, products)
+
+    monkeypatch.setattr(service_products, "insert_products_batch", failing_insert)
+
+    # Simulate a POST request with the refused row in the middle of a batch
+    response = client.post(
+        "/products/bulk",
+        json=[
+            {"name": "bulk g", "uom_id": 1, "price_per_unit": 1},
+            {"name": "bulk refused", "uom_id": 1, "price_per_unit": 2},
+            {"name": "bulk h", "uom_id": 1, "price_per_unit": 3},
+        ],
+    )
+
+    # Ensure only the refused row is rejected
+    assert response.status_code == 201
+    result = response.get_json()
+    assert result["inserted"] == 2
+    assert result["errors"] == [{"row": 2, "error": "Failed to insert product"}]
+
+    assert (
+        client.delete("/products", json={"ids": result["product_ids"]}).status_code
+        == 200
+    )
+
+
+def test_search_products(client: FlaskClient) -> None:
+    """
+    Test the GET /products/search endpoint.
+    """
+    # Simulate a GET request searching the products starting with "ric"
+    response = client.get("/products/search?q=ric")
+
+    # Ensure the request is successful (status code 200)
+    assert response.status_code == 200
+
+    # Store the response body into a variable
+    products = response.get_json()
+
+    # I know the product "rice" is in the db
+    # So, I check that it is the best match
+    assert isinstance(products, list)
+    if products:
+        extract_product(products)
+        assert products[0].get("name") == "rice"
+
+
+def test_search_products_without_query(client: FlaskClient) -> None:
+    """
+    Test the GET /products/search endpoint without a query.
+    """
+    # Simulate a GET request without the "q" parameter
+    response = client.get("/products/search")
+
+    # Ensure the request is rejected (status code 400)
+    assert response.status_code == 400
+
+
+def test_get_products_encoded_once(client: FlaskClient) -> None:
+    """
+    Test that the encoded catalog is reused until the next product write.
+    """
+    response = client.get("/products")
+    assert response.status_code == 200
+
+    # The response body is the cached encoding of the catalog
+    assert product_cache.get(ALL_PRODUCTS_JSON_KEY) == response.get_data()
+
+    # A product write drops the encoded catalog
+    invalidate_products(1)
+    assert product_cache.get(ALL_PRODUCTS_JSON_KEY) is None
+    assert client.get("/products").get_data() == response.get_data()
+
+
+def test_get_products_by_ids(client: FlaskClient) -> None:
+    """
+    Test the GET /products endpoint with a list of IDs.
+    """
+    # Simulate a GET request for two products, in a given order
+    response = client.get("/products?ids=2,1,999999")
+
+    # Ensure the request is successful (status code 200)
+    assert response.status_code == 200
+
+    # Ensure the existing products are returned in the requested order
+    products = response.get_json()
+    extract_product(products)
+    assert [p["product_id"] for p in products] == [2, 1]
+
+    # Ensure an invalid list of IDs is rejected (status code 400)
+    assert client.get("/products?ids=1,x").status_code == 400
+
+
+def test_update_and_delete_products_bulk(client: FlaskClient) -> None:
+    """
+    Test the PATCH /products and DELETE /products endpoints.
+    """
+    # Insert the products to work on
+    response = client.post(
+        "/products/bulk",
+        json=[
+            {"name": "bulk flour", "uom_id": 2, "price_per_unit": 10},
+            {"name": "bulk sugar", "uom_id": 2, "price_per_unit": 20},
+        ],
+    )
+    product_ids = response.get_json()["product_ids"]
+
+    # Set the price of each product
+    response = client.patch(
+        "/products", json={"prices": {str(i): 100 for i in product_ids}}
+    )
+    assert response.status_code == 200
+    assert response.get_json()["updated"] == 2
+
+    # Raise the prices of the products by 5%
+    response = client.patch(
+        "/products",
+        json={"where": {"ids": product_ids}, "multiply": {"price_per_unit": 1.05}},
+    )
+    assert response.get_json()["updated"] == 2
+
+    # Ensure the products are read with their new price
+    products = client.get(f"/products?ids={product_ids[0]},{product_ids[1]}")
+    assert [p["price_per_unit"] for p in products.get_json()] == [105, 105]
+
+    # Ensure a field that cannot be updated is rejected (status code 400)
+    response = client.patch("/products", json={"set": {"name": "x"}})
+    assert response.status_code == 400
+
+    # Ensure no product is deleted when one of them is part of an order
+    response = client.delete("/products", json={"ids": product_ids + [1]})
+    assert response.status_code == 409
+    assert len(client.get(f"/products?ids={product_ids[0]}").get_json()) == 1
+
+    # Delete the products
+    response = client.delete("/products", json={"ids": product_ids})
+    assert response.status_code == 200
+    assert response.get_json()["deleted"] == 2
+    assert client.get(f"/products?ids={product_ids[0]}").status_code == 404
+
+
+def test_update_products_bulk_invalid_prices(client: FlaskClient) -> None:
+    """
+    Test the PATCH /products endpoint with negative and non-finite prices.
+    """
+    price = client.get("/products?ids=1").get_json()[0]["price_per_unit"]
+
+    for body in (
+        '{"where": {}, "multiply": {"price_per_unit": -1}}',
+        '{"where": {}, "multiply": {"price_per_unit": Infinity}}',
+        '{"where": {"ids": [1]}, "set": {"price_per_unit": -1}}',
+        '{"where": {"ids": [1]}, "set": {"price_per_unit": NaN}}',
+        '{"prices": {"1": Infinity}}',
+    ):
+        # Simulate a PATCH request with an invalid price or factor
+        response = client.patch("/products", data=body, content_type="application/json")
+
+        # Ensure the request is rejected (status code 400)
+        assert response.status_code == 400, body
+
+    # Ensure the price of the product is left as it was
+    assert client.get("/products?ids=1").get_json()[0]["price_per_unit"] == price
+
+
+def test_writes_of_other_processes_are_picked_up(tmp_path: Path) -> None:
+    """
+    Test that a product written by another process is not served
+    from the cache, nor revalidated with the tag of the old copy.
+    """
+    path = str(tmp_path / "gs.db")
+    client = create_app(
+        {
+            "DB_ENGINE": "sqlite",
+            "DB_SQLITE_PATH": path,
+            "DB_SQLITE_SEED": True,
+            "CATALOG_SYNC_INTERVAL": 0,
+        }
+    ).test_client()
+
+    # Simulate a GET request caching the product
+    response = client.get("/products/1")
+    etag = response.headers["ETag"]
+    assert response.get_json()["name"] == "toothpaste"
+
+    # Simulate a write of another process, bumping the shared version
+    cnx = sqlite_connection.connect(path)
+    cursor = cnx.cursor()
+    cursor.execute("UPDATE products SET name = %s WHERE product_id = 1", ("paste",))
+    cursor.execute("UPDATE catalog_version SET version = version + 1 WHERE id = 1")
+    cnx.commit()
+    cnx.close()
+
+    # Ensure the copy held by the client is not revalidated
+    response = client.get("/products/1", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.get_json()["name"] == "paste"
+    product_cache.clear()
+
+
+def test_forked_process_resets_caches(client: FlaskClient) -> None:
+    """
+    Test that a forked process starts with an empty product cache
+    and a catalog version of its own.
+    """
+    assert client.get("/products/1").status_code == 200
+    assert product_cache.stats()["entries"] > 0
+
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        # Report the state of the forked process to the parent
+        os.write(
+            write_fd,
+            json.dumps(
+                [catalog_version.epoch, product_cache.stats()["entries"]]
+            ).encode(),
+        )
+        os._exit(0)
+
+    os.close(write_fd)
+    with os.fdopen(read_fd) as pipe:
+        epoch, entries = json.loads(pipe.read())
+    os.waitpid(pid, 0)
+
+    assert epoch != catalog_version.epoch
+    assert entries == 0
+
+
+def test_modified_since_same_second_write(
+    client: FlaskClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """
+    Test that a copy is not revalidated with If-Modified-Since
+    after a write in the same second as its date.
+    """
+    now = [int(time.time()) + 0.2]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    product = client.get("/products/1").get_json()
+    fields = {k: product[k] for k in ("name", "uom_id", "price_per_unit")}
+
+    # Ensure the date is not sent within the second of the last write
+    assert client.put("/products/1", json=fields).status_code == 200
+    response = client.get("/products/1")
+    assert response.headers.get("ETag")
+    assert "Last-Modified" not in response.headers
+
+    # Ensure a copy dated in that second is not revalidated after another write
+    assert client.put("/products/1", json=fields).status_code == 200
+    response = client.get(
+        "/products/1", headers={"If-Modified-Since": http_date(int(now[0]))}
+    )
+    assert response.status_code == 200
+
+    # Ensure the date is sent and the copy revalidated once the second is over
+    now[0] += 1
+    last_modified = client.get("/products/1").headers["Last-Modified"]
+    response = client.get("/products/1", headers={"If-Modified-Since": last_modified})
+    assert response.status_code == 304
@@ -0,0 +1,107 @@
+"""
+Test suite for the routing of the reads to the replicas.
+
+The primary and the replica are two SQLite databases, the replica holding
+a different name for the first product, so that the tests can tell which
+database served a read.
+"""
+
+from pathlib import Path
+from typing import Generator
+
+import pytest
+from database import sqlite_connection
+from flask import Flask
+from server import create_app
+from services.service_products import product_cache
+
+
+@pytest.fixture
+def app(tmp_path: Path) -> Generator[Flask, Flask, Flask]:
+    """
+    This fixture provides a Flask application instance reading from
+    a replica, whose first product is named "replica toothpaste".
+    """
+    replica_path = str(tmp_path / "replica.db")
+    cnx = sqlite_connection.connect(replica_path)
+    sqlite_connection.initialize(cnx, seed=True)
+    cursor = cnx.cursor()
+    cursor.execute(
+        "UPDATE products SET name = %s WHERE product_id = %s",
+        ("replica toothpaste", 1),
+    )
+    cnx.commit()
+    cnx.close()
+
+    yield create_app(
+        {
+            "DB_ENGINE": "sqlite",
+            "DB_SQLITE_PATH": str(tmp_path / "primary.db"),
+            "DB_SQLITE_SEED": True,
+            "DB_REPLICAS": [{"database": replica_path}],
+        }
+    )
+    product_cache.clear()
+
+
+def get_product_name(app: Flask, **kwargs: str) -> str:
+    """
+    Read the name of the first product, bypassing the product cache.
+    """
+    product_cache.clear()
+
+    return app.test_client().get("/products/1", **kwargs).get_json()["name"]
+
+
+def test_reads_go_to_replica(app: Flask) -> None:
+    """
+    Test that the reads are served by the replica.
+    """
+    assert get_product_name(app) == "replica toothpaste"
+
+    # Ensure the pool statistics include the replica
+    replicas = app.test_client().get("/pool").get_json()["replicas"]
+    assert replicas[0]["healthy"] and replicas[0]["checkouts"] == 1
+
+
+def test_reads_stick_to_primary_after_write(app: Flask) -> None:
+    """
+    Test that a client reads its own writes from the primary.
+    """
+    client = app.test_client()
+
+    # Simulate a PUT request updating the first product on the primary
+    response = client.put(
+        "/products/1",
+        json={"name": "primary toothpaste", "uom_id": 2, "price_per_unit": 1200},
+    )
+    assert response.status_code == 200
+
+    # Simulate a read of another client, served by the lagging replica
+    response = app.test_client().get("/products/1")
+    assert response.get_json()["name"] == "replica toothpaste"
+
+    # Ensure the replica read is neither cached nor tagged with the catalog version
+    assert response.headers.get("ETag") is None
+    assert response.headers.get("Last-Modified") is None
+
+    # Ensure the next reads of the client go to the primary
+    response = client.get("/products/1")
+    assert response.get_json()["name"] == "primary toothpaste"
+    assert response.headers.get("ETag") is not None
+
+    # Ensure the reads of the other clients still go to the replica
+    assert get_product_name(app) == "replica toothpaste"
+
+
+def test_reads_fail_over_to_primary(app: Flask, tmp_path: Path) -> None:
+    """
+    Test that the reads are served by the primary when the replica is down.
+    """
+    app.config["DB_REPLICAS"] = [{"database": str(tmp_path / "missing" / "x.db")}]
+
+    assert get_product_name(app) == "toothpaste"
+
+    # Ensure the replica is skipped until its retry interval has passed
+    replicas = app.test_client().get("/pool").get_json()["replicas"]
+    assert not replicas[0]["healthy"]
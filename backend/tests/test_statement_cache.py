@@ -0,0 +1,63 @@
+"""
+Test suite for the prepared statement cache.
+"""
+
+from typing import Any, Generator
+
+import pytest
+from database.sql_connection import get_sql_connection
+from database.statement_cache import StatementCache, prepared_cursor
+from flask import Flask
+from server import app as flask_app
+
+
+@pytest.fixture
+def app() -> Generator[Flask, Flask, Flask]:
+    """
+    This fixture provides a Flask application instance
+    for testing purposes.
+    """
+    yield flask_app
+
+
+class FakeConnection:
+    """
+    A connection handing out a new cursor object on each call.
+    """
+
+    connection_id: int = 1
+
+    def cursor(self, **kwargs: Any) -> object:
+        return object()
+
+
+def test_prepared_cursor_is_reused(app: Flask) -> None:
+    """
+    Test that a statement is prepared once per connection.
+    """
+    query = "SELECT name FROM products WHERE product_id = %s"
+
+    with app.app_context():
+        cnx = get_sql_connection().connection
+        cursor = prepared_cursor(cnx, query)
+
+        assert prepared_cursor(cnx, query) is cursor
+        assert prepared_cursor(cnx, query, dictionary=True) is not cursor
+
+        cursor.execute(query, (1,))
+        assert cursor.fetchone() is not None
+
+
+def test_statements_are_prepared_again_after_reconnect() -> None:
+    """
+    Test that the statements of a previous session are not reused.
+    """
+    cnx = FakeConnection()
+    statements = StatementCache(max_statements=2)
+    cursor = statements.cursor(cnx, "SELECT 1")
+
+    assert statements.cursor(cnx, "SELECT 1") is cursor
+
+    cnx.connection_id = 2
+    assert statements.cursor(cnx, "SELECT 1") is not cursor
+    assert len(statements) == 1
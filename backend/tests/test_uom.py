@@ -0,0 +1,64 @@
+"""
+Test suite for the units of measure endpoints.
+"""
+
+from typing import Generator
+
+import pytest
+from flask import Flask
+from flask.testing import FlaskClient
+from server import app as flask_app
+
+
+@pytest.fixture
+def app() -> Generator[Flask, Flask, Flask]:
+    """
+    This fixture provides a Flask application instance
+    for testing purposes.
+    """
+    yield flask_app
+
+
+@pytest.fixture
+def client(app: Flask) -> FlaskClient:
+    """
+    This fixture provides a test client that can be used
+    to simulate HTTP requests to the Flask application.
+    """
+    return app.test_client()
+
+
+def test_get_uoms(client: FlaskClient) -> None:
+    """
+    Test the GET /uom endpoint.
+    """
+    # Simulate a GET request to /uom endpoint
+    response = client.get("/uom")
+
+    # Ensure the request is successful (status code 200)
+    assert response.status_code == 200
+
+    # Ensure the response is in JSON format
+    assert response.content_type == "application/json"
+
+    # Store the response body into a variable
+    uoms = response.get_json()
+
+    # I know the units of measure in the db
+    # So, I check the values in the list
+    assert {"uom_id": 1, "uom_name": "kg"} in uoms
+    assert {"uom_id": 2, "uom_name": "each"} in uoms
+
+
+def test_insert_uom_without_name(client: FlaskClient) -> None:
+    """
+    Test the POST /uom endpoint without the name of the unit of measure.
+    """
+    # Simulate a POST request with an empty body
+    response = client.post("/uom", json={})
+
+    # Ensure the request is rejected (status code 400)
+    assert response.status_code == 400
+
+    # Ensure the error message is the one defined in the routes implementation
+    assert response.get_json().get("error") == "Missing required field: uom_name"